@@ -0,0 +1,48 @@
+"""
+API views for the enterprise security accounts
+The security models need PostgreSQL (ArrayField), so they are imported inside
+the views to keep this module importable on SQLite deployments
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_security_users(request, account_id):
+    """Bulk-create users for a security account from an uploaded CSV ('file')"""
+    try:
+        from .models_security import SecurityAccount
+    except ImportError:
+        # Security tables are not available in this deployment
+        return Response(
+            {'error': 'Security accounts are not available on this server'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    from .provisioning import ProvisioningError, provision_users, read_csv
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'CSV file is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        account = SecurityAccount.objects.get(pk=account_id)
+    except SecurityAccount.DoesNotExist:
+        return Response({'error': 'Security account not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        result = provision_users(
+            account,
+            read_csv(upload),
+            dry_run=request.query_params.get('dry_run') == '1'
+        )
+    except ProvisioningError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except (UnicodeDecodeError, ValueError) as e:
+        return Response({'error': f'Could not read CSV: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
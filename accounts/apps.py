@@ -2,4 +2,10 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts'
\ No newline at end of file
+    name = 'accounts'
+
+    def ready(self):
+        # Registers the directory search-index and JWT user-cache receivers
+        from . import authentication, directory  # noqa: F401
+        from .weak_passwords import weak_passwords
+        weak_passwords.preload()
@@ -0,0 +1,133 @@
+"""
+DRF authentication without a user query per request
+"""
+import copy
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from utils.json_storage import has_mirrored_changes
+from .models import CustomUser, TokenUser
+
+
+class UserCache:
+    """Short-lived per-process cache of fully loaded users, keyed by id.
+    
+    Entries are dropped when the user is saved or deleted. Deactivated ids are
+    also remembered (here and in the shared cache, for other workers) for as
+    long as an access token can live, so claim-built principals are refused.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}
+        self._inactive = {}
+    
+    @property
+    def ttl(self) -> float:
+        return float(getattr(settings, 'JWT_USER_CACHE_TTL', 30))
+    
+    def _inactive_timeout(self) -> int:
+        return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    
+    def get(self, user_id):
+        """A private copy of the cached user, or None"""
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        user = copy.copy(entry[0])
+        if hasattr(user, '_loaded_values'):
+            user._loaded_values = dict(user._loaded_values)
+        return user
+    
+    def put(self, user):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._users[user.pk] = (copy.copy(user), time.monotonic() + self.ttl)
+    
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+    
+    def mark_inactive(self, user_id):
+        timeout = self._inactive_timeout()
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._inactive[user_id] = time.monotonic() + timeout
+        cache.set(f"auth:inactive:{user_id}", True, timeout)
+    
+    def mark_active(self, user_id):
+        with self._lock:
+            self._inactive.pop(user_id, None)
+        cache.delete(f"auth:inactive:{user_id}")
+    
+    def is_inactive(self, user_id) -> bool:
+        with self._lock:
+            expires = self._inactive.get(user_id)
+            if expires is not None and expires < time.monotonic():
+                del self._inactive[user_id]
+                expires = None
+        return expires is not None or bool(cache.get(f"auth:inactive:{user_id}"))
+    
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._inactive.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request user query.
+    
+    A recently loaded user comes from the per-process UserCache. Otherwise
+    tokens carrying the email and user_type claims yield a TokenUser that only
+    queries the database if a view reads another column. Tokens without those
+    claims fall back to the normal lookup.
+    """
+    
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        
+        user = user_cache.get(user_id)
+        if user is not None:
+            if not user.is_active:
+                raise AuthenticationFailed('User is inactive', code='user_inactive')
+            return user
+        
+        if user_cache.is_inactive(user_id):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        
+        if all(name in validated_token for name in TokenUser.CLAIM_FIELDS):
+            return TokenUser.from_claims(user_id, validated_token)
+        
+        user = super().get_user(validated_token)
+        user_cache.put(user)
+        return user
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=TokenUser)
+def refresh_cached_user(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    user_cache.invalidate(instance.pk)
+    if not raw and has_mirrored_changes(instance, ['is_active'], created, update_fields):
+        if instance.is_active:
+            user_cache.mark_active(instance.pk)
+        else:
+            user_cache.mark_inactive(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    user_cache.mark_inactive(instance.pk)
+
+
+user_cache = UserCache()
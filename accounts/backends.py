@@ -1,21 +1,63 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from utils.helpers import get_client_ip
+from .brute_force import detector
 
 User = get_user_model()
 
+_dummy_hashes = {}
+
+
+def dummy_password_check(password):
+    """Spend the same hashing time as a real check so unknown logins are not faster"""
+    algorithm = get_hasher().algorithm
+    encoded = _dummy_hashes.get(algorithm)
+    if encoded is None:
+        encoded = _dummy_hashes[algorithm] = make_password('dummy-password-for-timing')
+    check_password(password, encoded)
+
+
+def resolve_login(identifier):
+    """The user an email address or username refers to, in one query.
+
+    An email match wins over a username match, as it did when the two were
+    looked up one after another.
+    """
+    if not identifier:
+        return None
+    candidates = list(User.objects.filter(Q(email=identifier) | Q(username=identifier))[:3])
+    for user in candidates:
+        if user.email == identifier:
+            return user
+    return candidates[0] if candidates else None
+
+
 class EmailBackend(ModelBackend):
+    """Log in with either email or username.
+
+    The password hasher runs exactly once per attempt, including for unknown
+    identifiers. A failed attempt raises PermissionDenied so authenticate()
+    stops here instead of hashing again in ModelBackend. Sources the
+    brute-force detector has locked are refused before any query or hashing.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            # Try email first
-            user = User.objects.get(email=username)
-            if user.check_password(password):
-                return user
-        except User.DoesNotExist:
-            try:
-                # Try username if email fails
-                user = User.objects.get(username=username)
-                if user.check_password(password):
-                    return user
-            except User.DoesNotExist:
-                return None
-        return None
\ No newline at end of file
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        ip = get_client_ip(request) if request is not None else None
+        if detector.check(ip, username):
+            raise PermissionDenied
+        user = resolve_login(username)
+        if user is None:
+            dummy_password_check(password)
+        elif user.check_password(password) and self.user_can_authenticate(user):
+            detector.record_success(ip, username)
+            return user
+        user_agent = request.META.get('HTTP_USER_AGENT', '') if request is not None else ''
+        detector.record_failure(ip, username, user_agent)
+        raise PermissionDenied
@@ -0,0 +1,158 @@
+"""
+Brute-force login detection
+Sliding-window failure counters per IP, username and subnet decide whether a
+login may even be tried, so attackers are turned away before any password
+hashing or user lookup. A username is only locked for the IP that keeps
+failing it; once it fails from many places, each source that fails it again
+must also wait a few seconds between tries. No lock covers a username from
+an address that has not failed it, so nobody can lock another person out of
+their account.
+"""
+import ipaddress
+import threading
+import time
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from utils.rate_limit import SlidingWindowLimiter
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'WINDOW': 300,            # seconds the failure counters look back
+    'IP_LIMIT': 20,           # failures per client IP
+    'USERNAME_LIMIT': 5,      # failures per attempted username from one IP
+    'SUBNET_LIMIT': 100,      # failures per /24 (IPv4) or /64 (IPv6)
+    'LOCKOUT': 900,           # seconds an offender stays blocked
+    'USERNAME_SLOWDOWN': 20,  # failures per username from any IP before tries are spaced out
+    'USERNAME_DELAY': 5,      # seconds between tries on such a username
+    'BACKEND': 'local',       # 'cache' shares counters and locks between workers
+}
+
+
+def subnet_of(ip: str) -> Optional[str]:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    prefix = 24 if address.version == 4 else 64
+    return str(ipaddress.ip_network(f'{ip}/{prefix}', strict=False))
+
+
+class BruteForceDetector:
+    """Per-IP, per-username and per-subnet failure tracking with lockouts.
+
+    check() is a few dictionary (or cache) lookups and must run before the
+    password is hashed. record_failure() counts a failure everywhere and locks
+    whichever key crossed its limit, emitting one BRUTE_FORCE_ATTEMPT event
+    per lockout. Past USERNAME_SLOWDOWN failures from anywhere, the username
+    key locks the failing source (its user@ip key) for USERNAME_DELAY instead
+    of itself, reported once when it first crosses.
+    """
+
+    def __init__(self):
+        self._limiter = None
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    @property
+    def config(self) -> dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'BRUTE_FORCE', {})}
+
+    @property
+    def limiter(self) -> SlidingWindowLimiter:
+        if self._limiter is None:
+            self._limiter = SlidingWindowLimiter(backend=self.config['BACKEND'])
+        return self._limiter
+
+    def _keys(self, ip: Optional[str], username: Optional[str]):
+        """(counted key, failure limit, lock seconds, key locked at the limit) of one attempt"""
+        config = self.config
+        keys = []
+        if ip:
+            keys.append((f'ip:{ip}', config['IP_LIMIT'], config['LOCKOUT'], f'ip:{ip}'))
+            subnet = subnet_of(ip)
+            if subnet:
+                keys.append((f'net:{subnet}', config['SUBNET_LIMIT'], config['LOCKOUT'], f'net:{subnet}'))
+        if username:
+            name = username.lower()
+            source = f'user:{name}@{ip}' if ip else None
+            if ip:
+                keys.append((source, config['USERNAME_LIMIT'], config['LOCKOUT'], source))
+            # Slows down the failing source only, never the username everywhere
+            keys.append((f'user:{name}', config['USERNAME_SLOWDOWN'], config['USERNAME_DELAY'], source))
+        return keys
+
+    def check(self, ip: Optional[str], username: Optional[str]) -> int:
+        """Seconds the caller must wait before trying again (0 = go ahead)"""
+        now = time.time()
+        for _, _, _, locked in self._keys(ip, username):
+            if locked is None:
+                continue
+            until = self._locked_until(locked)
+            if until > now:
+                return max(1, int(until - now))
+        return 0
+
+    def record_failure(self, ip: Optional[str], username: Optional[str], user_agent: str = ''):
+        config = self.config
+        for key, limit, seconds, locked in self._keys(ip, username):
+            failures = self.limiter.record(f'bf:{key}', config['WINDOW'])
+            if failures < limit:
+                continue
+            newly_locked = locked is not None and self._lock_key(locked, seconds)
+            # A slowdown locks a different source on every failure but is reported once
+            if newly_locked if locked == key else failures - 1 < limit:
+                self._emit(key, failures, ip, username, user_agent)
+
+    def record_success(self, ip: Optional[str], username: Optional[str]):
+        """A correct password clears the username's failures (not the IP's)"""
+        if username:
+            name = username.lower()
+            if ip:
+                self.limiter.forget(f'bf:user:{name}@{ip}', self.config['WINDOW'])
+            self.limiter.forget(f'bf:user:{name}', self.config['WINDOW'])
+
+    def _locked_until(self, key: str) -> float:
+        if self.config['BACKEND'] == 'cache':
+            return float(cache.get(f'bf:lock:{key}') or 0)
+        with self._lock:
+            until = self._locks.get(key, 0)
+            if until and until <= time.time():
+                del self._locks[key]
+                until = 0
+            return until
+
+    def _lock_key(self, key: str, seconds: int) -> bool:
+        """Lock key; False if it was already locked"""
+        until = time.time() + seconds
+        if self.config['BACKEND'] == 'cache':
+            return cache.add(f'bf:lock:{key}', until, timeout=seconds)
+        with self._lock:
+            if self._locks.get(key, 0) > time.time():
+                return False
+            self._locks[key] = until
+            return True
+
+    def _emit(self, key: str, failures: float, ip: Optional[str], username: Optional[str], user_agent: str):
+        details = f'{key} locked after {failures:.0f} failed logins (last username: {username})'
+        logger.warning(f'Brute force attempt: {details} from {ip}')
+        try:
+            from .security_log import log_security_event
+        except ImportError:
+            # Security tables are not available in this deployment
+            return
+        log_security_event('BRUTE_FORCE_ATTEMPT', 3, ip or '0.0.0.0', details, user_agent=user_agent)
+
+    def reset(self):
+        """Forget all local counters and locks"""
+        with self._lock:
+            self._locks.clear()
+        if self._limiter is not None:
+            self._limiter.reset()
+        self._limiter = None
+
+
+# Global instance
+detector = BruteForceDetector()
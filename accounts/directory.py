@@ -0,0 +1,145 @@
+"""
+Public user directory: search index maintenance and first-page caching
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Set
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CustomUser, UserProfile, UserSearchToken
+from utils.json_storage import has_mirrored_changes
+
+# Fields returned by the directory API
+DIRECTORY_FIELDS = [
+    'id', 'username', 'first_name', 'last_name', 'company_name',
+    'job_title', 'bio', 'location', 'skill_level', 'date_joined',
+]
+
+# User fields feeding the search index (skills come from the profile)
+SEARCH_FIELDS = frozenset([
+    'username', 'first_name', 'last_name', 'company_name', 'job_title', 'location',
+])
+
+# Changes to any of these make cached directory pages stale
+DIRECTORY_CACHE_FIELDS = frozenset(DIRECTORY_FIELDS[1:] + ['is_profile_public'])
+
+CACHE_VERSION_KEY = 'directory:version'
+CACHE_TIMEOUT = 300
+MAX_TOKEN_LENGTH = 50
+
+_token_re = re.compile(r'[\w+#]+')
+
+
+def tokenize(*values) -> Set[str]:
+    """Lowercased word tokens of the given strings"""
+    tokens = set()
+    for value in values:
+        if value:
+            tokens.update(t[:MAX_TOKEN_LENGTH] for t in _token_re.findall(str(value).lower()))
+    return tokens
+
+
+def user_tokens(user, skills: Iterable[str] = ()) -> Set[str]:
+    return tokenize(*(getattr(user, name) for name in SEARCH_FIELDS), *skills)
+
+
+def _profile_skills(user) -> List[str]:
+    try:
+        return list(user.profile.skills or [])
+    except UserProfile.DoesNotExist:
+        return []
+
+
+def index_user(user, skills: Iterable[str] = None):
+    """Replace the search tokens of one user"""
+    if skills is None:
+        skills = _profile_skills(user)
+    UserSearchToken.objects.filter(user=user).delete()
+    UserSearchToken.objects.bulk_create([
+        UserSearchToken(user=user, token=token) for token in user_tokens(user, skills)
+    ])
+
+
+def rebuild_index(batch_size: int = 2000) -> int:
+    """Rebuild the whole search index; returns the number of users indexed"""
+    skills_by_user: Dict[int, list] = dict(
+        UserProfile.objects.values_list('user_id', 'skills')
+    )
+    UserSearchToken.objects.all().delete()
+
+    fields = ['id'] + sorted(SEARCH_FIELDS)
+    batch = []
+    count = 0
+    for user in CustomUser.objects.only(*fields).iterator(chunk_size=batch_size):
+        batch.extend(
+            UserSearchToken(user_id=user.id, token=token)
+            for token in user_tokens(user, skills_by_user.get(user.id) or [])
+        )
+        count += 1
+        if len(batch) >= batch_size:
+            UserSearchToken.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    if batch:
+        UserSearchToken.objects.bulk_create(batch, batch_size=batch_size)
+    invalidate_cache()
+    return count
+
+
+def search(queryset, query: str):
+    """Narrow a user queryset to rows matching every term of query (prefix match)"""
+    for term in tokenize(query):
+        # Range scan on the token index; works as a prefix match on every backend
+        matching = UserSearchToken.objects.filter(
+            token__gte=term, token__lt=term + '\uffff'
+        ).values('user_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
+
+
+def cache_version() -> int:
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(CACHE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CACHE_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_cache():
+    """Make every cached directory page stale"""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def first_page_cache_key(filters: Dict[str, str]) -> str:
+    normalized = '&'.join(f"{k}={filters[k]}" for k in sorted(filters) if filters[k])
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"directory:v{cache_version()}:{digest}"
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_directory(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the search index and cached pages in step with user edits"""
+    if raw:
+        return
+    if has_mirrored_changes(instance, SEARCH_FIELDS, created, update_fields):
+        index_user(instance)
+    if has_mirrored_changes(instance, DIRECTORY_CACHE_FIELDS, created, update_fields):
+        invalidate_cache()
+
+
+@receiver(post_save, sender=UserProfile)
+def update_profile_directory(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Reindex a user whose skills changed"""
+    if raw:
+        return
+    if has_mirrored_changes(instance, ['skills'], created, update_fields):
+        index_user(instance.user, instance.skills or [])
+        invalidate_cache()
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_user_directory(sender, instance, **kwargs):
+    invalidate_cache()
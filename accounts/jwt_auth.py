@@ -1,17 +1,21 @@
 """
 JWT Authentication for NeuralFlow
 """
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenBlacklistView
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer, TokenRefreshSerializer, TokenBlacklistSerializer
+)
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
 from utils.secure_json_storage import secure_storage
+from .revocation import RevocableRefreshToken
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+    
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -23,6 +27,20 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens and revokes the old one on rotation"""
+    token_class = RevocableRefreshToken
+
+class RevokingTokenRefreshView(TokenRefreshView):
+    serializer_class = RevokingTokenRefreshSerializer
+
+class RevokingTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = RevocableRefreshToken
+
+class LogoutJWTView(TokenBlacklistView):
+    """Revoke a refresh token (JWT logout)"""
+    serializer_class = RevokingTokenBlacklistSerializer
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_jwt(request):
@@ -33,9 +51,9 @@ def login_jwt(request):
     if not email or not password:
         return Response({'error': 'Email and password required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = authenticate(username=email, password=password)
+    user = authenticate(request, username=email, password=password)
     if user:
-        refresh = RefreshToken.for_user(user)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         
         # Log activity
         secure_storage.update_user_activity(
@@ -89,7 +107,7 @@ def register_jwt(request):
     secure_storage.save_user_data(user)
     
     # Generate tokens
-    refresh = RefreshToken.for_user(user)
+    refresh = CustomTokenObtainPairSerializer.get_token(user)
     
     return Response({
         'access': str(refresh.access_token),
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:45
+
+from django.db import migrations, models
+
+import utils.rate_limit
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0006_idsequence"),
+    ]
+
+    operations = [
+        # Existing accounts start outside any period, so their lifetime count resets on the next call
+        migrations.AddField(
+            model_name="customuser",
+            name="api_calls_period",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="customuser",
+            name="api_calls_period",
+            field=models.IntegerField(default=utils.rate_limit.current_api_quota_period),
+        ),
+    ]
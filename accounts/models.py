@@ -6,9 +6,44 @@ from django.db import models
 from django.core.validators import RegexValidator
 from utils.validators import validate_phone_number, validate_image_extension, validate_file_size
 from utils.helpers import generate_unique_filename
+from utils.counters import usage_counters
+from utils.rate_limit import api_quota_window, current_api_quota_period
 
 
-class CustomUser(AbstractUser):
+class LoadedValuesMixin:
+    """Remember field values as they were loaded from (or last saved to) the database.
+
+    post_save receivers compare against _loaded_values to see what a save
+    changed; the snapshot is refreshed only after every receiver has run.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_values(fields)
+
+    def _remember_values(self, names=None):
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if names is not None and field.name not in names and field.attname not in names:
+                continue
+            loaded[field.attname] = getattr(self, field.attname)
+
+class CustomUser(LoadedValuesMixin, AbstractUser):
     """Extended User model with additional fields"""
     USER_TYPES = [
         ('individual', 'Individual'),
@@ -54,6 +89,8 @@ class CustomUser(AbstractUser):
     subscription_plan = models.CharField(max_length=20, default='free')
     api_calls_limit = models.IntegerField(default=1000)
     api_calls_used = models.IntegerField(default=0)
+    # Quota period api_calls_used belongs to (see utils.rate_limit.api_quota_window)
+    api_calls_period = models.IntegerField(default=current_api_quota_period)
     subscription_expires = models.DateTimeField(null=True, blank=True)
     
     # Timestamps
@@ -77,25 +114,89 @@ class CustomUser(AbstractUser):
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username
     
+    @property
+    def current_api_calls_used(self):
+        """Persisted usage of the current quota period plus increments still buffered in usage_counters"""
+        used = self.api_calls_used if self.api_calls_period == api_quota_window()[0] else 0
+        return used + usage_counters.pending(CustomUser, self.pk, 'api_calls_used')
+    
     @property
     def api_calls_remaining(self):
-        return max(0, self.api_calls_limit - self.api_calls_used)
+        return max(0, self.api_calls_limit - self.current_api_calls_used)
     
     @property
     def api_usage_percentage(self):
         if self.api_calls_limit == 0:
             return 0
-        return (self.api_calls_used / self.api_calls_limit) * 100
+        return (self.current_api_calls_used / self.api_calls_limit) * 100
     
     def can_make_api_call(self):
-        return self.api_calls_used < self.api_calls_limit
+        return self.current_api_calls_used < self.api_calls_limit
     
     def increment_api_usage(self, count=1):
-        self.api_calls_used += count
-        self.save(update_fields=['api_calls_used'])
+        period = api_quota_window()[0]
+        if self.api_calls_period != period:
+            # First call of a new period; the conditional UPDATE resets the count once across workers
+            CustomUser.objects.filter(pk=self.pk).exclude(api_calls_period=period).update(
+                api_calls_used=0, api_calls_period=period
+            )
+            self.api_calls_used, self.api_calls_period = 0, period
+            self._remember_values(['api_calls_used', 'api_calls_period'])
+            from .authentication import user_cache
+            user_cache.invalidate(self.pk)
+        usage_counters.increment(CustomUser, self.pk, 'api_calls_used', count)
+
 
 
-class UserProfile(models.Model):
+class TokenUser(CustomUser):
+    """CustomUser built from verified JWT claims without a query.
+    
+    Only id, email, user_type and is_active are set; touching any other
+    column loads all of them in one query (not one per field).
+    """
+    
+    CLAIM_FIELDS = ['email', 'user_type']
+    
+    class Meta:
+        proxy = True
+    
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        return cls.from_db(
+            None,
+            ['id', 'is_active'] + cls.CLAIM_FIELDS,
+            [user_id, True] + [claims[name] for name in cls.CLAIM_FIELDS]
+        )
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred | {'is_active'}
+        super().refresh_from_db(using, fields, from_queryset)
+        if not self.get_deferred_fields():
+            from .authentication import user_cache
+            user_cache.put(self)
+
+
+class RevokedToken(models.Model):
+    """Refresh token ids revoked before their expiry; rows can go once expired"""
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at})"
+
+
+class IdSequence(models.Model):
+    """Named counter from which blocks of custom ids (USR000123) are reserved"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+class UserProfile(LoadedValuesMixin, models.Model):
     """Extended profile information"""
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='profile')
     
@@ -126,6 +227,13 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
+    
+    @property
+    def current_profile_views(self):
+        return self.profile_views + usage_counters.pending(UserProfile, self.pk, 'profile_views')
+    
+    def increment_profile_views(self, count=1):
+        usage_counters.increment(UserProfile, self.pk, 'profile_views', count)
 
 
 class UserActivity(models.Model):
@@ -156,4 +264,19 @@ class UserActivity(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.get_activity_type_display()}"
\ No newline at end of file
+        return f"{self.user.username} - {self.get_activity_type_display()}"
+
+
+class UserSearchToken(models.Model):
+    """Prebuilt directory search index: one row per (user, token)"""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=50)
+    
+    class Meta:
+        unique_together = ['user', 'token']
+        indexes = [
+            models.Index(fields=['token', 'user']),
+        ]
+    
+    def __str__(self):
+        return f"{self.token} -> {self.user_id}"
@@ -8,6 +8,7 @@ from django.core.validators import RegexValidator, MinValueValidator, MaxValueVa
 from django.utils import timezone
 from utils.validators import validate_phone_number, validate_image_extension, validate_file_size
 from utils.helpers import generate_unique_filename
+from .id_allocator import BlockIdAllocator, highest_number
 
 
 class UserGroup(models.Model):
@@ -229,13 +230,8 @@ class CustomUser(AbstractUser):
     
     def save(self, *args, **kwargs):
         if not self.user_id:
-            # Generate custom user ID
-            last_user = CustomUser.objects.filter(user_id__startswith='USR').order_by('-user_id').first()
-            if last_user and last_user.user_id:
-                last_num = int(last_user.user_id[3:])
-                self.user_id = f'USR{last_num + 1:06d}'
-            else:
-                self.user_id = 'USR000001'
+            # Generate custom user ID from a reserved block (no per-insert MAX query)
+            self.user_id = enhanced_user_ids.next_id()
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -269,6 +265,12 @@ class CustomUser(AbstractUser):
         self.save(update_fields=['api_calls_used', 'last_activity'])
 
 
+enhanced_user_ids = BlockIdAllocator(
+    'enhanced_user',
+    seed=lambda: highest_number(CustomUser.objects.all(), 'user_id', 'USR')
+)
+
+
 class UserGroupMembership(models.Model):
     """Through model for user-group relationships"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
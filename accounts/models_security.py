@@ -4,7 +4,6 @@ Enterprise Security Models - SQL Server inspired security system for Django
 import uuid
 import hashlib
 import secrets
-import ipaddress
 from datetime import datetime, timedelta
 from django.db import models
 from django.contrib.auth.models import AbstractUser
@@ -12,6 +11,12 @@ from django.core.validators import RegexValidator, MinValueValidator, MaxValueVa
 from django.utils import timezone
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.conf import settings
+from utils.counters import CachedCount
+from utils.ip_allowlist import AllowlistCache
+from . import privileges
+from .id_allocator import BlockIdAllocator, highest_number
 
 
 class WeakPassword(models.Model):
@@ -55,7 +60,8 @@ class SecurityEvent(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     application_name = models.CharField(max_length=50)
-    event_datetime = models.DateTimeField(auto_now_add=True)
+    # default (not auto_now_add) so batched inserts keep the time of the event
+    event_datetime = models.DateTimeField(default=timezone.now)
     remote_host = models.GenericIPAddressField()
     event_type = models.CharField(max_length=50, choices=EVENT_TYPES)
     severity = models.IntegerField(choices=SEVERITY_CHOICES)
@@ -68,6 +74,7 @@ class SecurityEvent(models.Model):
         db_table = 'security_events'
         ordering = ['-event_datetime']
         indexes = [
+            models.Index(fields=['event_datetime']),
             models.Index(fields=['event_type', 'event_datetime']),
             models.Index(fields=['remote_host', 'event_datetime']),
             models.Index(fields=['severity', 'event_datetime']),
@@ -101,6 +108,26 @@ class PasswordPolicy(models.Model):
     def __str__(self):
         return self.policy_name
 
+    def validate_password(self, raw_password):
+        """List of reasons raw_password breaks this policy (empty if it complies)"""
+        from .weak_passwords import weak_passwords
+        errors = []
+        if len(raw_password) < self.min_password_length:
+            errors.append(f'Password must be at least {self.min_password_length} characters long')
+        counts = (
+            (sum(c.islower() for c in raw_password), self.min_lower_chars, 'lowercase letters'),
+            (sum(c.isupper() for c in raw_password), self.min_upper_chars, 'uppercase letters'),
+            (sum(c.isdigit() for c in raw_password), self.min_numeric_chars, 'digits'),
+            (sum(not c.isalnum() for c in raw_password), self.min_special_chars, 'special characters'),
+        )
+        for found, required, label in counts:
+            if found < required:
+                errors.append(f'Password must contain at least {required} {label}')
+        # The Bloom filter answers most passwords without touching security_weak_passwords
+        if not self.allow_weak_passwords and weak_passwords.is_weak(raw_password):
+            errors.append('Password is too common')
+        return errors
+
 
 class SecurityAccount(models.Model):
     """Security account with IP restrictions"""
@@ -109,6 +136,8 @@ class SecurityAccount(models.Model):
     password_policy = models.ForeignKey(PasswordPolicy, on_delete=models.PROTECT)
     ip_range_start = models.GenericIPAddressField(null=True, blank=True)
     ip_range_end = models.GenericIPAddressField(null=True, blank=True)
+    # Extra ranges: CIDR blocks ('10.0.0.0/8'), 'start-end' ranges or single addresses
+    allowed_ip_ranges = models.JSONField(default=list, blank=True)
     is_active = models.BooleanField(default=True)
     
     # Account limits
@@ -129,18 +158,44 @@ class SecurityAccount(models.Model):
     def __str__(self):
         return self.account_name
     
+    def ip_range_entries(self):
+        """Every allowlist entry: the legacy start/end range plus allowed_ip_ranges"""
+        entries = list(self.allowed_ip_ranges or [])
+        if self.ip_range_start and self.ip_range_end:
+            entries.append(f'{self.ip_range_start}-{self.ip_range_end}')
+        return entries
+
+    @property
+    def ip_allowlist(self):
+        """Compiled allowlist, rebuilt when updated_at changes"""
+        return account_allowlists.get(self.pk, self.updated_at, self.ip_range_entries)
+
     def check_ip_range(self, ip_address):
         """Check if IP address is within allowed range"""
-        if not self.ip_range_start or not self.ip_range_end:
-            return True
-        
-        try:
-            ip = ipaddress.ip_address(ip_address)
-            start = ipaddress.ip_address(self.ip_range_start)
-            end = ipaddress.ip_address(self.ip_range_end)
-            return start <= ip <= end
-        except ValueError:
-            return False
+        return ip_address in self.ip_allowlist
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        account_allowlists.invalidate(self.pk)
+
+    @classmethod
+    def check_ips(cls, pairs):
+        """[(account_id, ip), ...] -> [allowed, ...] with one query for all accounts"""
+        pairs = list(pairs)
+        account_ids = {account_id for account_id, _ in pairs}
+        accounts = cls.objects.only(
+            'id', 'ip_range_start', 'ip_range_end', 'allowed_ip_ranges', 'updated_at'
+        ).in_bulk(account_ids)
+        return [
+            account_id in accounts and ip in accounts[account_id].ip_allowlist
+            for account_id, ip in pairs
+        ]
+
+
+account_allowlists = AllowlistCache()
+
+# Active UserSession count per SecurityUser pk
+active_sessions = CachedCount('sessions:active')
 
 
 class SecurityUser(AbstractUser):
@@ -165,6 +220,8 @@ class SecurityUser(AbstractUser):
     password_last_changed = models.DateTimeField(auto_now_add=True)
     last_login_ip = models.GenericIPAddressField(null=True, blank=True)
     login_count = models.IntegerField(default=0)
+    # Effective privileges (user + account) as a bitset; maintained by accounts.privileges
+    privilege_bits = models.BinaryField(default=bytes, editable=False)
     
     # Two-factor authentication
     two_factor_enabled = models.BooleanField(default=False)
@@ -198,28 +255,40 @@ class SecurityUser(AbstractUser):
     
     def save(self, *args, **kwargs):
         if not self.user_id:
-            # Generate custom user ID
-            last_user = SecurityUser.objects.filter(user_id__startswith='USR').order_by('-user_id').first()
-            if last_user and last_user.user_id:
-                last_num = int(last_user.user_id[3:])
-                self.user_id = f'USR{last_num + 1:06d}'
-            else:
-                self.user_id = 'USR000001'
+            # Generate custom user ID from a reserved block (no per-insert MAX query)
+            self.user_id = security_user_ids.next_id()
         super().save(*args, **kwargs)
     
+    def _count_active_sessions(self):
+        return self.active_sessions.filter(is_active=True, expires_at__gt=timezone.now()).count()
+
+    def active_session_count(self):
+        """Active, unexpired sessions; counted once, then kept current in the cache"""
+        return active_sessions.get(self.pk, self._count_active_sessions)
+
+    def session_limit(self):
+        return min(self.max_concurrent_sessions, self.account.max_concurrent_sessions)
+
+    def can_open_session(self):
+        """Concurrency check for login; no query while the cached count is under the limit"""
+        limit = self.session_limit()
+        if self.active_session_count() < limit:
+            return True
+        # The cached count only drops on logout or a sweep, so sessions that
+        # lapsed since still fill it; recount before turning the user away
+        return active_sessions.refresh(self.pk, self._count_active_sessions) < limit
+    
     def set_secure_password(self, raw_password):
         """Set password with salt and hash"""
         self.password_salt = secrets.token_hex(16)
-        password_with_salt = f"{raw_password}{self.password_salt}"
-        self.password_hash = hashlib.sha256(password_with_salt.encode()).hexdigest()
+        self.password_hash = hash_secure_password(raw_password, self.password_salt)
         self.password_last_changed = timezone.now()
         self.failed_login_attempts = 0
         self.locked_until_datetime = None
     
     def check_password(self, raw_password):
         """Check password against hash"""
-        password_with_salt = f"{raw_password}{self.password_salt}"
-        return hashlib.sha256(password_with_salt.encode()).hexdigest() == self.password_hash
+        return hash_secure_password(raw_password, self.password_salt) == self.password_hash
     
     def is_account_locked(self):
         """Check if account is currently locked"""
@@ -264,6 +333,17 @@ class SecurityUser(AbstractUser):
         return f"{self.display_name} ({self.user_id})"
 
 
+def hash_secure_password(raw_password, salt):
+    """Salted SHA-256 stored in SecurityUser.password_hash"""
+    return hashlib.sha256(f"{raw_password}{salt}".encode()).hexdigest()
+
+
+security_user_ids = BlockIdAllocator(
+    'security_user',
+    seed=lambda: highest_number(SecurityUser.objects.all(), 'user_id', 'USR')
+)
+
+
 class UserPasswordHistory(models.Model):
     """Password history for reuse prevention"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -308,6 +388,8 @@ class Privilege(models.Model):
     application_name = models.CharField(max_length=50)
     privilege_description = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
+    # Position in SecurityUser.privilege_bits; assigned once, never reused
+    bit = models.PositiveIntegerField(unique=True, null=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -322,6 +404,22 @@ class Privilege(models.Model):
     def __str__(self):
         return f"{self.privilege_code} - {self.application_name}"
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            # From a sequence, so a deleted privilege's bit stays retired
+            self.bit = privilege_bit_numbers.reserve_numbers(1)[0] - 1
+        super().save(*args, **kwargs)
+
+
+def _privilege_bits_in_use():
+    """Bits handed out before the sequence existed; seeds it once"""
+    last = Privilege.objects.aggregate(last=models.Max('bit'))['last']
+    return 0 if last is None else last + 1
+
+
+# Sequence number n is bit n - 1
+privilege_bit_numbers = BlockIdAllocator('privilege_bit', block_size=1, seed=_privilege_bits_in_use)
+
 
 class AccountPrivilege(models.Model):
     """Account-level privileges"""
@@ -395,16 +493,43 @@ class UserSession(models.Model):
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['session_key']),
             models.Index(fields=['expires_at']),
+            models.Index(fields=['is_active', 'expires_at']),
         ]
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created and self.is_active:
+            active_sessions.incr(self.user_id)
     
     def is_expired(self):
         """Check if session is expired"""
         return timezone.now() > self.expires_at
     
     def extend_session(self, minutes=60):
-        """Extend session expiry"""
-        self.expires_at = timezone.now() + timedelta(minutes=minutes)
+        """Extend session expiry; skipped (False) when it would move by less than SESSION_EXTEND_MIN_SECONDS"""
+        expires_at = timezone.now() + timedelta(minutes=minutes)
+        min_step = getattr(settings, 'SESSION_EXTEND_MIN_SECONDS', 60)
+        if self.expires_at and (expires_at - self.expires_at).total_seconds() < min_step:
+            return False
+        self.expires_at = expires_at
         self.save(update_fields=['expires_at', 'last_activity'])
+        return True
+
+    def terminate(self):
+        """Deactivate the session and release its slot in the user's session count"""
+        if UserSession.objects.filter(pk=self.pk, is_active=True).update(is_active=False):
+            active_sessions.decr(self.user_id)
+        self.is_active = False
+
+    @classmethod
+    def outside_allowlist(cls, sessions=None):
+        """Ids of sessions whose IP their account no longer allows"""
+        if sessions is None:
+            sessions = cls.objects.filter(is_active=True)
+        rows = list(sessions.values_list('id', 'user__account_id', 'ip_address'))
+        allowed = SecurityAccount.check_ips((account_id, ip) for _, account_id, ip in rows)
+        return [session_id for (session_id, _, _), ok in zip(rows, allowed) if not ok]
 
 
 class LoginAttempt(models.Model):
@@ -421,12 +546,13 @@ class LoginAttempt(models.Model):
     country = models.CharField(max_length=100, blank=True)
     city = models.CharField(max_length=100, blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'security_login_attempts'
         ordering = ['-created_at']
         indexes = [
+            models.Index(fields=['created_at']),
             models.Index(fields=['ip_address', 'created_at']),
             models.Index(fields=['username', 'created_at']),
             models.Index(fields=['success', 'created_at']),
@@ -466,13 +592,101 @@ class SecurityAuditLog(models.Model):
     user_agent = models.TextField(blank=True)
     application_name = models.CharField(max_length=50, blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'security_audit_log'
         ordering = ['-created_at']
         indexes = [
+            models.Index(fields=['created_at']),
             models.Index(fields=['action', 'created_at']),
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['performed_by', 'created_at']),
-        ]
\ No newline at end of file
+        ]
+
+
+# Archive tables: rows older than SECURITY_LOG_HOT_DAYS move here so the hot
+# tables (and dashboard queries on them) stay small. Users are kept as plain
+# ids so deleting a user does not have to scan the archive.
+
+class SecurityEventArchive(models.Model):
+    """Archived SecurityEvent rows"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    application_name = models.CharField(max_length=50)
+    event_datetime = models.DateTimeField()
+    remote_host = models.GenericIPAddressField()
+    event_type = models.CharField(max_length=50, choices=SecurityEvent.EVENT_TYPES)
+    severity = models.IntegerField(choices=SecurityEvent.SEVERITY_CHOICES)
+    event_details = models.TextField()
+    user_id = models.UUIDField(null=True, blank=True)
+    session_id = models.CharField(max_length=100, blank=True)
+    user_agent = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'security_events_archive'
+        ordering = ['-event_datetime']
+        indexes = [
+            models.Index(fields=['event_datetime']),
+            models.Index(fields=['event_type', 'severity', 'event_datetime']),
+        ]
+
+
+class LoginAttemptArchive(models.Model):
+    """Archived LoginAttempt rows"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    username = models.CharField(max_length=255)
+    ip_address = models.GenericIPAddressField()
+    user_agent = models.TextField(blank=True)
+    success = models.BooleanField()
+    failure_reason = models.CharField(max_length=100, blank=True)
+    application_name = models.CharField(max_length=50)
+    country = models.CharField(max_length=100, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'security_login_attempts_archive'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['success', 'created_at']),
+        ]
+
+
+class SecurityAuditLogArchive(models.Model):
+    """Archived SecurityAuditLog rows"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    action = models.CharField(max_length=50, choices=SecurityAuditLog.AUDIT_ACTIONS)
+    user_id = models.UUIDField(null=True, blank=True)
+    performed_by_id = models.UUIDField(null=True, blank=True)
+    target_user_id = models.UUIDField(null=True, blank=True)
+    description = models.TextField()
+    old_values = models.JSONField(default=dict, blank=True)
+    new_values = models.JSONField(default=dict, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(blank=True)
+    application_name = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'security_audit_log_archive'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['action', 'created_at']),
+        ]
+
+
+def _session_deleted(sender, instance, **kwargs):
+    if instance.is_active:
+        active_sessions.decr(instance.user_id)
+
+
+post_save.connect(privileges.privilege_changed, sender=Privilege)
+post_delete.connect(privileges.privilege_changed, sender=Privilege)
+post_save.connect(privileges.user_privilege_changed, sender=UserPrivilege)
+post_delete.connect(privileges.user_privilege_changed, sender=UserPrivilege)
+post_save.connect(privileges.account_privilege_changed, sender=AccountPrivilege)
+post_delete.connect(privileges.account_privilege_changed, sender=AccountPrivilege)
+post_save.connect(privileges.security_user_created, sender=SecurityUser)
+post_delete.connect(_session_deleted, sender=UserSession)
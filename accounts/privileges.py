@@ -0,0 +1,144 @@
+"""
+Precomputed effective privileges
+Every Privilege owns a fixed bit; each SecurityUser carries the union of its
+user and account privileges as a bitset (on the row and in the cache), so a
+privilege check is a dictionary lookup and a shift instead of a join.
+Models are imported inside functions: models_security is optional.
+"""
+from typing import Dict, Iterable, List
+from django.core.cache import cache
+from rest_framework.permissions import BasePermission
+from utils.bitset import BitRegistry, decode, encode, has_bit, mask_of
+
+CACHE_PREFIX = 'privbits:'
+CACHE_TIMEOUT = 24 * 3600
+CHUNK = 1000
+
+
+def _load_bits() -> Dict:
+    from .models_security import Privilege
+    return {
+        (app, code): bit
+        for app, code, bit in Privilege.objects.exclude(bit=None)
+        .values_list('application_name', 'privilege_code', 'bit')
+    }
+
+
+privilege_bits = BitRegistry(_load_bits)
+
+
+def _cache_key(user_pk) -> str:
+    return f'{CACHE_PREFIX}{user_pk}'
+
+
+def mask_for(user) -> int:
+    """Effective privilege bitset of a user; no query once the user is loaded"""
+    mask = getattr(user, '_privilege_mask', None)
+    if mask is not None:
+        return mask
+    mask = cache.get(_cache_key(user.pk))
+    if mask is None:
+        mask = decode(getattr(user, 'privilege_bits', b''))
+        cache.set(_cache_key(user.pk), mask, CACHE_TIMEOUT)
+    user._privilege_mask = mask
+    return mask
+
+
+def has_privilege(user, application_name: str, privilege_code: str) -> bool:
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return False
+    if getattr(user, 'is_superuser', False):
+        return True
+    if not hasattr(user, 'privilege_bits'):
+        return False
+    return has_bit(mask_for(user), privilege_bits.bit((application_name, privilege_code)))
+
+
+def refresh_privilege_bits(user_ids: Iterable) -> int:
+    """Recompute and store the bitsets of users; three queries per chunk of users"""
+    from .models_security import AccountPrivilege, SecurityUser, UserPrivilege
+    user_ids = list(user_ids)
+    updated = 0
+    for i in range(0, len(user_ids), CHUNK):
+        chunk = user_ids[i:i + CHUNK]
+        accounts = dict(SecurityUser.objects.filter(pk__in=chunk).values_list('pk', 'account_id'))
+        bits: Dict = {pk: [] for pk in accounts}
+        for user_id, bit in UserPrivilege.objects.filter(
+            user_id__in=accounts, privilege__is_active=True
+        ).values_list('user_id', 'privilege__bit'):
+            bits[user_id].append(bit)
+        account_bits: Dict = {}
+        for account_id, bit in AccountPrivilege.objects.filter(
+            account_id__in=set(accounts.values()), privilege__is_active=True
+        ).values_list('account_id', 'privilege__bit'):
+            account_bits.setdefault(account_id, []).append(bit)
+
+        masks = {
+            pk: mask_of(bits[pk] + account_bits.get(account_id, []))
+            for pk, account_id in accounts.items()
+        }
+        SecurityUser.objects.bulk_update(
+            [SecurityUser(pk=pk, privilege_bits=encode(mask)) for pk, mask in masks.items()],
+            ['privilege_bits'], batch_size=CHUNK,
+        )
+        cache.set_many({_cache_key(pk): mask for pk, mask in masks.items()}, CACHE_TIMEOUT)
+        updated += len(masks)
+    return updated
+
+
+def users_with_privilege(privilege_id) -> List:
+    """Ids of users holding a privilege directly or through their account"""
+    from .models_security import AccountPrivilege, SecurityUser, UserPrivilege
+    direct = UserPrivilege.objects.filter(privilege_id=privilege_id).values('user_id')
+    via_account = AccountPrivilege.objects.filter(privilege_id=privilege_id).values('account_id')
+    return list(
+        SecurityUser.objects.filter(pk__in=direct).union(
+            SecurityUser.objects.filter(account_id__in=via_account)
+        ).values_list('pk', flat=True)
+    )
+
+
+# Signal handlers; connected in models_security next to the models
+
+def user_privilege_changed(sender, instance, **kwargs):
+    refresh_privilege_bits([instance.user_id])
+
+
+def account_privilege_changed(sender, instance, **kwargs):
+    from .models_security import SecurityUser
+    refresh_privilege_bits(
+        SecurityUser.objects.filter(account_id=instance.account_id).values_list('pk', flat=True)
+    )
+
+
+def privilege_changed(sender, instance, created=False, **kwargs):
+    privilege_bits.reset()
+    if not created:
+        # is_active may have flipped; a deleted privilege's grants cascade on their own
+        refresh_privilege_bits(users_with_privilege(instance.pk))
+
+
+def security_user_created(sender, instance, created=False, **kwargs):
+    if created:
+        # Account privileges apply from the start
+        refresh_privilege_bits([instance.pk])
+
+
+class HasPrivilege(BasePermission):
+    """Require every (application_name, privilege_code) in view.required_privileges.
+
+    Use privilege_required(app, code) where a view cannot carry attributes
+    (function views decorated with @api_view).
+    """
+
+    required_privileges = ()
+
+    def has_permission(self, request, view):
+        required = getattr(view, 'required_privileges', None) or self.required_privileges
+        return all(has_privilege(request.user, app, code) for app, code in required)
+
+
+def privilege_required(application_name: str, privilege_code: str):
+    return type('HasPrivilege', (HasPrivilege,), {
+        'required_privileges': ((application_name, privilege_code),),
+    })
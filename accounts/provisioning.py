@@ -0,0 +1,163 @@
+"""
+Bulk SecurityUser provisioning from CSV
+Passwords are hashed in a process pool, custom ids come from one reserved
+block, and rows go in with bulk_create in batches.
+Models are imported inside functions: models_security is optional.
+"""
+import csv
+import io
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.contrib.auth.hashers import make_password
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .privileges import refresh_privilege_bits
+
+CSV_FIELDS = [
+    'email', 'username', 'display_name', 'first_name', 'last_name',
+    'employee_id', 'department', 'job_title', 'phone_number', 'password',
+]
+
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 50
+
+
+class ProvisioningError(Exception):
+    """The import as a whole cannot proceed (e.g. it would exceed max_users)"""
+
+
+def read_csv(source) -> List[Dict[str, str]]:
+    """Rows of a CSV file (path, text or binary file object) keyed by lowercased header"""
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            return read_csv(f)
+    text = source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        for row in reader
+    ]
+
+
+def _hash_password(raw_password: Optional[str]) -> Tuple[str, str, str]:
+    """(Django password, salt, salted SHA-256) for one user; runs in pool workers"""
+    if not raw_password:
+        return make_password(None), '', ''
+    from .models_security import hash_secure_password
+    salt = secrets.token_hex(16)
+    return make_password(raw_password), salt, hash_secure_password(raw_password, salt)
+
+
+def hash_passwords(passwords: List[Optional[str]], workers: Optional[int] = None) -> List[Tuple[str, str, str]]:
+    if workers == 1 or len(passwords) < POOL_THRESHOLD:
+        return [_hash_password(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_password, passwords, chunksize=64))
+
+
+def _existing(field: str, values: Iterable[str], chunk: int = 1000) -> set:
+    from .models_security import SecurityUser
+    values = list(values)
+    found = set()
+    for i in range(0, len(values), chunk):
+        found.update(
+            SecurityUser.objects.filter(**{f'{field}__in': values[i:i + chunk]})
+            .values_list(field, flat=True)
+        )
+    return found
+
+
+def validate_rows(rows: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], List[Dict]]:
+    """Split rows into importable ones and per-row errors (bad email, duplicates)"""
+    valid, errors = [], []
+    seen_emails, seen_usernames = set(), set()
+    for line, row in enumerate(rows, start=2):
+        email = row.get('email', '').lower()
+        username = row.get('username') or email
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append({'line': line, 'email': email, 'error': 'Invalid email'})
+            continue
+        if email in seen_emails or username in seen_usernames:
+            errors.append({'line': line, 'email': email, 'error': 'Duplicate in file'})
+            continue
+        seen_emails.add(email)
+        seen_usernames.add(username)
+        valid.append({**row, 'email': email, 'username': username, '_line': line})
+
+    taken_emails = _existing('email', seen_emails)
+    taken_usernames = _existing('username', seen_usernames)
+    importable = []
+    for row in valid:
+        if row['email'] in taken_emails or row['username'] in taken_usernames:
+            errors.append({'line': row['_line'], 'email': row['email'], 'error': 'User already exists'})
+        else:
+            importable.append(row)
+    return importable, errors
+
+
+def _check_limit(account, adding: int):
+    existing = account.users.count()
+    if existing + adding > account.max_users:
+        raise ProvisioningError(
+            f'Importing {adding} users would exceed the limit of {account.max_users} '
+            f'({existing} already exist)'
+        )
+
+
+def provision_users(account, rows: List[Dict[str, str]], created_by=None,
+                    batch_size: int = 1000, workers: Optional[int] = None, dry_run: bool = False) -> Dict:
+    """Create SecurityUsers for account from CSV rows.
+
+    Rows that fail validation are reported and skipped; the import is refused
+    as a whole if it would take the account past max_users. Rows without a
+    password get an unusable one and must_reset_password.
+    """
+    from .models_security import SecurityAccount, SecurityUser, security_user_ids
+    importable, errors = validate_rows(rows)
+    _check_limit(account, len(importable))
+    if dry_run or not importable:
+        return {'created': 0, 'importable': len(importable), 'errors': errors}
+
+    # Hash before taking the account lock; this is the slow part
+    hashes = hash_passwords([row.get('password') for row in importable], workers)
+
+    with transaction.atomic():
+        # Re-check under lock so concurrent imports cannot both pass the limit
+        account = SecurityAccount.objects.select_for_update().get(pk=account.pk)
+        _check_limit(account, len(importable))
+        user_ids = security_user_ids.reserve(len(importable))
+
+        users = []
+        for row, user_id, (password, salt, secure_hash) in zip(importable, user_ids, hashes):
+            display_name = row.get('display_name') or ' '.join(
+                filter(None, [row.get('first_name'), row.get('last_name')])
+            ) or row['username']
+            users.append(SecurityUser(
+                user_id=user_id,
+                account=account,
+                email=row['email'],
+                username=row['username'],
+                display_name=display_name,
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                employee_id=row.get('employee_id', ''),
+                department=row.get('department', ''),
+                job_title=row.get('job_title', ''),
+                phone_number=row.get('phone_number', ''),
+                password=password,
+                password_salt=salt,
+                password_hash=secure_hash,
+                must_reset_password=not salt,
+                created_by=created_by,
+            ))
+        SecurityUser.objects.bulk_create(users, batch_size=batch_size)
+        # bulk_create sends no post_save; account privileges still apply
+        refresh_privilege_bits([user.pk for user in users])
+
+    return {'created': len(users), 'importable': len(importable), 'errors': errors}
@@ -0,0 +1,124 @@
+"""
+Refresh-token revocation backed by the RevokedToken table.
+Lookups go through an in-memory Bloom filter, so the usual "not revoked"
+answer costs no query; only possible hits are confirmed in the database.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from utils.bloom import BloomFilter
+from .models import RevokedToken
+
+
+class RevocationStore:
+    """Revoked JTIs with a per-process Bloom filter in front of the table.
+
+    Revocations made by this process are added to the filter at once; those
+    made by other workers are picked up every JWT_REVOCATION_SYNC_SECONDS with
+    an indexed query on revoked_at. The filter is rebuilt from unexpired rows
+    every JWT_REVOCATION_REBUILD_SECONDS (or once it outgrows its capacity) so
+    expired tokens stop occupying it.
+    """
+
+    # Allowance for clock differences between the workers writing revoked_at
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._synced_until = None
+
+    @property
+    def sync_interval(self) -> float:
+        return float(getattr(settings, 'JWT_REVOCATION_SYNC_SECONDS', 2))
+
+    @property
+    def rebuild_interval(self) -> float:
+        return float(getattr(settings, 'JWT_REVOCATION_REBUILD_SECONDS', 3600))
+
+    def revoke(self, jti: str, expires_at: datetime):
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True
+        )
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._current_bloom():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def _current_bloom(self) -> BloomFilter:
+        now = time.monotonic()
+        if self._bloom is None or now - self._built_at >= self.rebuild_interval:
+            self.rebuild()
+        elif now - self._checked_at >= self.sync_interval:
+            self._sync()
+        return self._bloom
+
+    def rebuild(self):
+        """Reload the filter from every unexpired revocation"""
+        started = timezone.now()
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True))
+        bloom = BloomFilter.from_items(jtis, capacity=max(1024, len(jtis) * 2))
+        with self._lock:
+            self._bloom = bloom
+            self._built_at = self._checked_at = time.monotonic()
+            self._synced_until = started
+
+    def _sync(self):
+        started = timezone.now()
+        jtis = list(RevokedToken.objects.filter(
+            revoked_at__gte=self._synced_until - self.SYNC_OVERLAP
+        ).values_list('jti', flat=True))
+        with self._lock:
+            for jti in jtis:
+                self._bloom.add(jti)
+            self._checked_at = time.monotonic()
+            self._synced_until = started
+        if len(self._bloom) > self._bloom.capacity:
+            self.rebuild()
+
+    def reset(self):
+        """Forget the in-memory filter; the next lookup rebuilds it"""
+        with self._lock:
+            self._bloom = None
+
+
+def prune_expired(batch_size: int = 1000) -> int:
+    """Delete expired revocations in batches; returns the number of rows removed"""
+    now = timezone.now()
+    removed = 0
+    while True:
+        jtis = list(
+            RevokedToken.objects.filter(expires_at__lte=now).values_list('jti', flat=True)[:batch_size]
+        )
+        if not jtis:
+            return removed
+        removed += RevokedToken.objects.filter(jti__in=jtis).delete()[0]
+
+
+class RevocableRefreshToken(RefreshToken):
+    """RefreshToken checked against, and revoked into, the RevocationStore"""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revoked_tokens.is_revoked(self[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+
+    def blacklist(self):
+        """Revoke this token until it would have expired anyway"""
+        expires_at = datetime.fromtimestamp(self['exp'], tz=dt_timezone.utc)
+        revoked_tokens.revoke(self[api_settings.JTI_CLAIM], expires_at)
+
+
+# Global instance
+revoked_tokens = RevocationStore()
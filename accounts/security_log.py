@@ -0,0 +1,105 @@
+"""
+Security logging: batched writes, hot/archive tables and retention
+SecurityEvent, LoginAttempt and SecurityAuditLog rows are queued and written
+in bulk by a background thread. Rows older than SECURITY_LOG_HOT_DAYS move to
+the *Archive tables, and both are pruned per SECURITY_LOG_RETENTION.
+"""
+from typing import Dict, Optional
+from django.conf import settings
+from django.utils import timezone
+from utils.batch_writer import get_writer
+from utils.log_tables import archive_rows, prune_rows
+from .models_security import (
+    SecurityEvent, SecurityEventArchive, LoginAttempt, LoginAttemptArchive,
+    SecurityAuditLog, SecurityAuditLogArchive,
+)
+
+DEFAULT_RETENTION = {
+    # Days to keep rows; event_type overrides win over severity overrides
+    'security_event': {
+        'default': 365,
+        'severity': {0: 90, 3: 730, 4: 1095},
+        'event_type': {'LOGIN_SUCCESS': 90},
+    },
+    'login_attempt': {'default': 180},
+    'audit_log': {'default': 2555},
+}
+
+# (hot model, archive model, timestamp field) per log kind
+LOG_TABLES = {
+    'security_event': (SecurityEvent, SecurityEventArchive, 'event_datetime'),
+    'login_attempt': (LoginAttempt, LoginAttemptArchive, 'created_at'),
+    'audit_log': (SecurityAuditLog, SecurityAuditLogArchive, 'created_at'),
+}
+
+writer = get_writer('security')
+
+
+def log_security_event(event_type: str, severity: int, remote_host: str, event_details: str = '',
+                       application_name: str = 'neuralflow', user=None, session_id: str = '',
+                       user_agent: str = '') -> bool:
+    """Queue a SecurityEvent; returns False if the queue was full"""
+    return writer.submit(SecurityEvent(
+        event_type=event_type,
+        severity=severity,
+        remote_host=remote_host,
+        event_details=event_details,
+        application_name=application_name,
+        user=user,
+        session_id=session_id,
+        user_agent=user_agent,
+        event_datetime=timezone.now(),
+    ))
+
+
+def log_login_attempt(username: str, ip_address: str, success: bool, failure_reason: str = '',
+                      application_name: str = 'neuralflow', user_agent: str = '') -> bool:
+    return writer.submit(LoginAttempt(
+        username=username,
+        ip_address=ip_address,
+        success=success,
+        failure_reason=failure_reason,
+        application_name=application_name,
+        user_agent=user_agent,
+        created_at=timezone.now(),
+    ))
+
+
+def log_audit(action: str, description: str, user=None, performed_by=None, target_user=None,
+              old_values: Optional[Dict] = None, new_values: Optional[Dict] = None,
+              ip_address: Optional[str] = None, user_agent: str = '', application_name: str = '') -> bool:
+    return writer.submit(SecurityAuditLog(
+        action=action,
+        description=description,
+        user=user,
+        performed_by=performed_by,
+        target_user=target_user,
+        old_values=old_values or {},
+        new_values=new_values or {},
+        ip_address=ip_address,
+        user_agent=user_agent,
+        application_name=application_name,
+        created_at=timezone.now(),
+    ))
+
+
+def recent(kind: str):
+    """Queryset on the hot table only; dashboards should start here"""
+    return LOG_TABLES[kind][0].objects.all()
+
+
+def _retention() -> Dict:
+    return getattr(settings, 'SECURITY_LOG_RETENTION', DEFAULT_RETENTION)
+
+
+def archive_logs(kind: str, batch_size: int = 1000) -> int:
+    """Move rows older than SECURITY_LOG_HOT_DAYS from the hot to the archive table"""
+    model, archive_model, timestamp = LOG_TABLES[kind]
+    hot_days = int(getattr(settings, 'SECURITY_LOG_HOT_DAYS', 30))
+    return archive_rows(model, archive_model, timestamp, hot_days, batch_size)
+
+
+def prune_logs(kind: str, batch_size: int = 1000) -> int:
+    """Delete rows past their retention from both the hot and archive tables"""
+    model, archive_model, timestamp = LOG_TABLES[kind]
+    return prune_rows((model, archive_model), timestamp, _retention().get(kind, {}), batch_size)
@@ -0,0 +1,52 @@
+"""
+Expired UserSession cleanup
+Expired sessions are deactivated, and long-dead ones deleted, in batches that
+walk the (is_active, expires_at) index; affected users' session counters are
+invalidated so they are recounted on their next login
+"""
+from datetime import timedelta
+from typing import Optional
+from django.db import transaction
+from django.utils import timezone
+from .models_security import UserSession, active_sessions
+
+
+def deactivate_expired(batch_size: int = 1000, now=None) -> int:
+    """Mark expired sessions inactive; returns how many were deactivated"""
+    now = now or timezone.now()
+    swept = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                UserSession.objects.filter(is_active=True, expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'user_id')[:batch_size]
+            )
+            if not rows:
+                return swept
+            UserSession.objects.filter(pk__in=[pk for pk, _ in rows]).update(is_active=False)
+        active_sessions.invalidate(*{user_id for _, user_id in rows})
+        swept += len(rows)
+
+
+def delete_inactive(older_than_days: int, batch_size: int = 1000, now=None) -> int:
+    """Delete inactive sessions that expired more than older_than_days ago"""
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    removed = 0
+    while True:
+        pks = list(
+            UserSession.objects.filter(is_active=False, expires_at__lt=cutoff)
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return removed
+        removed += UserSession.objects.filter(pk__in=pks).delete()[0]
+
+
+def sweep(delete_after_days: Optional[int] = None, batch_size: int = 1000) -> dict:
+    now = timezone.now()
+    result = {'deactivated': deactivate_expired(batch_size, now), 'deleted': 0}
+    if delete_after_days is not None:
+        result['deleted'] = delete_inactive(delete_after_days, batch_size, now)
+    return result
@@ -14,6 +14,7 @@ from django.urls import path, include
 from django.contrib.auth.views import LoginView, LogoutView
 from . import views
 from .api_views import TaskAPIView, ProjectAPIView, ModelAPIView, dashboard_data
+from .api_security import import_security_users
 
 # URL patterns for user authentication and account management
 urlpatterns = [
@@ -29,4 +30,7 @@ urlpatterns = [
     path('api/projects/', ProjectAPIView.as_view(), name='api_projects'),
     path('api/models/', ModelAPIView.as_view(), name='api_models'),
     path('api/dashboard/', dashboard_data, name='api_dashboard'),
+    
+    # Enterprise security accounts (staff only)
+    path('api/security/accounts/<uuid:account_id>/users/import/', import_security_users, name='api_import_security_users'),
 ]
\ No newline at end of file
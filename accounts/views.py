@@ -25,9 +25,8 @@ def signup(request):
                 # Create user profile
                 UserProfile.objects.get_or_create(user=user)
                 
-                # Save user data to JSON and initialize empty data files
+                # User JSON is written by the post_save sync; initialize empty data files
                 try:
-                    json_storage.save_user_data(user)
                     # Initialize empty data files for new user
                     json_storage.get_user_tasks(user.id)  # Creates empty tasks file
                     json_storage.get_user_projects(user.id)  # Creates empty projects file
@@ -75,22 +74,14 @@ def custom_login(request):
             messages.error(request, 'Please provide both username and password.')
             return render(request, 'registration/login.html')
         
-        # Try email authentication first
+        # EmailBackend accepts an email or a username in one lookup
         user = authenticate(request, username=username, password=password)
-        if not user:
-            # Try with email as username
-            try:
-                user_obj = User.objects.get(email=username)
-                user = authenticate(request, username=user_obj.username, password=password)
-            except User.DoesNotExist:
-                pass
         
         if user is not None and user.is_active:
             login(request, user)
             
-            # Update user data in JSON
+            # User JSON picks up last_login through the post_save sync
             try:
-                json_storage.save_user_data(user)
                 json_storage.update_user_activity(
                     user.id,
                     'login',
@@ -127,9 +118,6 @@ def profile(request):
         if form.is_valid():
             user = form.save()
             
-            # Update user data in JSON
-            json_storage.save_user_data(user)
-            
             # Log profile update activity
             json_storage.update_user_activity(
                 user.id,
@@ -0,0 +1,177 @@
+"""
+Weak-password screening through a Bloom filter
+The filter covers Django's common-password list, the WeakPassword table and
+any extra breach lists, and is memory-mapped from WEAK_PASSWORD_FILTER_PATH.
+A password the filter rejects costs no query; only a filter hit is confirmed
+against the WeakPassword table (when the security models are installed).
+"""
+import gzip
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
+from utils.bloom import BloomFilter
+import logging
+
+logger = logging.getLogger(__name__)
+
+ERROR_RATE = 1e-6
+
+# The list CommonPasswordValidator ships with (without loading it into a set)
+DJANGO_PASSWORD_LIST = Path(password_validation.__file__).resolve().parent / 'common-passwords.txt.gz'
+
+
+def normalize(password: str) -> str:
+    return password.strip().lower()
+
+
+def _weak_password_model():
+    try:
+        from .models_security import WeakPassword
+    except ImportError:
+        # Security tables are not available in this deployment
+        return None
+    return WeakPassword
+
+
+def read_password_file(path) -> Iterator[str]:
+    """One password per line; .gz files are decompressed on the fly"""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            password = normalize(line)
+            if password:
+                yield password
+
+
+def default_sources() -> List:
+    return [DJANGO_PASSWORD_LIST] + list(
+        getattr(settings, 'WEAK_PASSWORD_LISTS', [])
+    )
+
+
+def iter_weak_passwords(files: Optional[Iterable] = None, include_table: bool = True) -> Iterator[str]:
+    for path in default_sources() if files is None else files:
+        yield from read_password_file(path)
+    model = _weak_password_model() if include_table else None
+    if model is not None:
+        for password in model.objects.values_list('password', flat=True).iterator(chunk_size=10000):
+            yield normalize(password)
+
+
+def sync_table(model, files: Optional[Iterable] = None, batch_size: int = 10000) -> int:
+    """Copy list-file passwords into the WeakPassword table so filter hits can be confirmed"""
+    max_length = model._meta.get_field('password').max_length
+    added, batch = 0, []
+    for password in iter_weak_passwords(files, include_table=False):
+        if len(password) <= max_length:
+            batch.append(model(password=password))
+        if len(batch) >= batch_size:
+            added += len(model.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        added += len(model.objects.bulk_create(batch, ignore_conflicts=True))
+    return added
+
+
+def build_filter(passwords: Iterable[str], capacity: Optional[int] = None,
+                 error_rate: float = ERROR_RATE) -> BloomFilter:
+    passwords = passwords if capacity else list(passwords)
+    bloom = BloomFilter(capacity or len(passwords), error_rate)
+    for password in passwords:
+        bloom.add(password)
+    return bloom
+
+
+class WeakPasswordChecker:
+    """Process-wide, lazily loaded weak-password filter.
+
+    Falls back to building the filter in memory from the default sources when
+    the file does not exist yet (run rebuild_weak_password_filter to avoid
+    that cost at startup).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        # Only a filter written by rebuild() has its entries mirrored in the table
+        self._confirm_in_table = False
+
+    @property
+    def path(self) -> Path:
+        return Path(getattr(settings, 'WEAK_PASSWORD_FILTER_PATH',
+                            Path(settings.BASE_DIR) / 'data' / 'weak_passwords.bloom'))
+
+    @property
+    def filter(self) -> BloomFilter:
+        if self._filter is None:
+            with self._lock:
+                if self._filter is None:
+                    self._filter = self._load()
+        return self._filter
+
+    def _load(self) -> BloomFilter:
+        if self.path.exists():
+            try:
+                bloom = BloomFilter.load(str(self.path))
+                self._confirm_in_table = True
+                return bloom
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load weak password filter {self.path}: {str(e)}")
+        logger.warning(f"Weak password filter {self.path} missing, building it in memory")
+        self._confirm_in_table = False
+        return build_filter(iter_weak_passwords(include_table=False))
+
+    def preload(self):
+        """Map the filter file at startup if it exists (cheap: the OS pages it in on demand)"""
+        if self._filter is None and self.path.exists():
+            self.filter
+
+    def is_weak(self, password: str) -> bool:
+        password = normalize(password)
+        if password not in self.filter:
+            return False
+        model = _weak_password_model() if self._confirm_in_table else None
+        if model is None:
+            return True
+        # A hit is a real weak password or a false positive; the table decides
+        # (rebuild() copies the list files into it)
+        return model.objects.filter(password=password).exists()
+
+    def rebuild(self, files: Optional[Iterable] = None, include_table: bool = True) -> BloomFilter:
+        """Regenerate the filter file and swap it in for this process"""
+        model = _weak_password_model()
+        if model is not None:
+            sync_table(model, files)
+        bloom = build_filter(iter_weak_passwords(files, include_table))
+        os.makedirs(self.path.parent, exist_ok=True)
+        bloom.save(str(self.path))
+        self.reset()
+        return bloom
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._confirm_in_table = False
+
+
+# Global instance
+weak_passwords = WeakPasswordChecker()
+
+
+class WeakPasswordValidator:
+    """AUTH_PASSWORD_VALIDATORS entry; replaces CommonPasswordValidator"""
+
+    def validate(self, password, user=None):
+        if weak_passwords.is_weak(password):
+            raise ValidationError(
+                _('This password is too common.'),
+                code='password_too_common',
+            )
+
+    def get_help_text(self):
+        return _("Your password can’t be a commonly used password.")
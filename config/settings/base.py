@@ -59,8 +59,11 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'utils.perf.PerformanceMiddleware',
+    'utils.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'utils.rate_limit.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -98,11 +101,14 @@ DATABASES = {
     }
 }
 
+# Flushes write buffers into the test database before it is dropped
+TEST_RUNNER = 'utils.test_runner.TestRunner'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
-    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'accounts.weak_passwords.WeakPasswordValidator'},
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
@@ -134,16 +140,41 @@ LOGOUT_REDIRECT_URL = '/'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'utils.rate_limit.PlanRateThrottle',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# Reverse proxies in front of the app that append to X-Forwarded-For;
+# 0 keys rate limits and brute-force lockouts on REMOTE_ADDR alone
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+
+# Rate limiting (requests per RATE_LIMIT_WINDOW seconds)
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'local')  # 'local' or 'cache'
+RATE_LIMIT_WINDOW = 60
+RATE_LIMIT_PER_IP = 600
+RATE_LIMIT_ANONYMOUS = 60
+RATE_LIMIT_PLANS = {
+    'free': 60,
+    'basic': 300,
+    'pro': 1200,
+    'enterprise': 6000,
+}
+RATE_LIMIT_PATH_PREFIXES = ('/api/', '/accounts/api/')
+# Charge every allowed DRF call to api_calls_used
+API_QUOTA_COUNT_REQUESTS = True
+# api_calls_limit applies per period of this many seconds
+API_QUOTA_PERIOD = 30 * 24 * 3600
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -156,6 +187,72 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
+# Seconds a JWT-authenticated user stays cached per process (0 = no cache)
+JWT_USER_CACHE_TTL = 30
+# Refresh-token revocation: pick up other workers' revocations / rebuild the Bloom filter
+JWT_REVOCATION_SYNC_SECONDS = 2
+JWT_REVOCATION_REBUILD_SECONDS = 3600
+
+# Weak-password Bloom filter (accounts.weak_passwords); rebuild with rebuild_weak_password_filter
+WEAK_PASSWORD_FILTER_PATH = BASE_DIR / 'data' / 'weak_passwords.bloom'
+WEAK_PASSWORD_LISTS = []  # extra breach lists, one password per line (.gz allowed)
+
+# Per-request SQL / storage / crypto timings (utils.perf): Server-Timing header and 'perf' log line
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', 'false').lower() == 'true'
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', '1.0'))
+PERF_SERVER_TIMING = True
+PERF_LOG = True
+
+# Opt-in profiling (utils.profiling): a sampled share of requests, or any request with a
+# staff token from profile_token in X-Profile / ?profile=; aggregate with aggregate_profiles
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.0'))
+PROFILING_MODE = os.environ.get('PROFILING_MODE', 'sample')  # 'sample' or 'cprofile'
+PROFILING_INTERVAL = 0.005  # seconds between stack samples
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_DIR = BASE_DIR / 'logs' / 'profiles'
+
+# Unfiltered admin changelists show the planner's row estimate above this many rows
+ADMIN_ESTIMATE_COUNT_THRESHOLD = 100000
+
+# UserSession.extend_session skips the write unless expiry moves by at least this much
+SESSION_EXTEND_MIN_SECONDS = 60
+
+# Brute-force login detection (accounts.brute_force); 'cache' backend shares state between workers
+BRUTE_FORCE = {
+    'WINDOW': 300,
+    'IP_LIMIT': 20,
+    'USERNAME_LIMIT': 5,
+    'SUBNET_LIMIT': 100,
+    'LOCKOUT': 900,
+    'USERNAME_SLOWDOWN': 20,
+    'USERNAME_DELAY': 5,
+    'BACKEND': 'local',
+}
+
+# Security logs: batched background writes, hot table window and retention
+BATCH_WRITER_ASYNC = True
+BATCH_WRITER_MAX_QUEUE = 10000
+BATCH_WRITER_BATCH_SIZE = 500
+BATCH_WRITER_FLUSH_INTERVAL = 2
+SECURITY_LOG_HOT_DAYS = 30
+# SECURITY_LOG_RETENTION = {'security_event': {'default': 365, 'severity': {4: 1095}, 'event_type': {...}}, ...}
+
+# Storage sync and usage accounting
+# Seconds to fold repeated user -> JSON syncs outside a request (0 = write immediately)
+USER_JSON_SYNC_DEBOUNCE_SECONDS = 0
+# Buffered counters (api_calls_used, api_calls_count, profile_views)
+# 'local' keeps pending increments per process, 'cache' shares them through CACHES
+USAGE_COUNTER_BACKEND = os.environ.get('USAGE_COUNTER_BACKEND', 'local')
+USAGE_COUNTER_FLUSH_INTERVAL = 5      # seconds between bulk flushes
+USAGE_COUNTER_MAX_PENDING = 1000      # flush early once this many keys are pending
+# Flush from a timer thread too, so an idle worker does not hold its counts
+USAGE_COUNTER_BACKGROUND_FLUSH = True
+
+# Storage manifest (record counts, sizes, checksums of the JSON storage files)
+STORAGE_MANIFEST_ENABLED = True
+STORAGE_MANIFEST_FLUSH_INTERVAL = 5   # seconds between bulk upserts
+STORAGE_MANIFEST_MAX_PENDING = 1000   # flush early once this many files are pending
 
 # CORS
 CORS_ALLOWED_ORIGINS = [
@@ -50,6 +50,10 @@ urlpatterns = [
     # Board Management URLs
     # Access at: http://localhost:8000/api/boards/
     path('', include('core.board_urls')),
+    
+    # Enhanced API (projects, tasks, dashboard, user directory)
+    # Access at: http://localhost:8000/api/users/directory/
+    path('', include('core.urls_enhanced')),
 ]
 
 # Serve static and media files during development
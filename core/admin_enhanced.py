@@ -1,11 +1,16 @@
 """
 Enhanced Django Admin configuration for comprehensive data management
+Not loaded by any app: accounts.models_enhanced clashes with accounts.models
+and cannot be imported, so none of these admins run or are covered by tests.
+The changelist helpers they share live in utils.admin and are tested there.
 """
 from django.contrib import admin
+from django.db.models import Count, Q
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from utils.admin import LargeTableAdminMixin
 from accounts.models_enhanced import (
     CustomUser, UserGroup, UserGroupMembership, UserProfile, 
     UserActivity, UserSession
@@ -107,10 +112,18 @@ class UserGroupAdmin(admin.ModelAdmin):
     list_filter = ['group_type', 'is_active', 'requires_approval']
     search_fields = ['name', 'description']
     prepopulated_fields = {'name': ('name',)}
+    autocomplete_fields = ['created_by', 'parent_group']
+    
+    def get_queryset(self, request):
+        # One aggregate in the changelist query instead of a COUNT per row
+        return super().get_queryset(request).annotate(
+            active_member_count=Count('members', filter=Q(members__is_active=True), distinct=True)
+        )
     
     def member_count(self, obj):
-        return obj.member_count
+        return obj.active_member_count
     member_count.short_description = 'Members'
+    member_count.admin_order_field = 'active_member_count'
 
 
 @admin.register(UserGroupMembership)
@@ -119,6 +132,8 @@ class UserGroupMembershipAdmin(admin.ModelAdmin):
     list_display = ['user', 'group', 'role', 'status', 'joined_at']
     list_filter = ['role', 'status', 'joined_at']
     search_fields = ['user__username', 'user__email', 'group__name']
+    list_select_related = ['user', 'group']
+    autocomplete_fields = ['user', 'group', 'approved_by']
 
 
 @admin.register(UserProfile)
@@ -127,15 +142,19 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'theme', 'language', 'profile_views', 'updated_at']
     list_filter = ['theme', 'language', 'updated_at']
     search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
 
 
 @admin.register(UserActivity)
-class UserActivityAdmin(admin.ModelAdmin):
+class UserActivityAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """User Activity Admin"""
     list_display = ['user', 'activity_type', 'description', 'ip_address', 'created_at']
     list_filter = ['activity_type', 'created_at']
     search_fields = ['user__username', 'description', 'ip_address']
     readonly_fields = ['created_at']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
     
     def has_add_permission(self, request):
         return False
@@ -145,12 +164,14 @@ class UserActivityAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserSession)
-class UserSessionAdmin(admin.ModelAdmin):
+class UserSessionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """User Session Admin"""
     list_display = ['user', 'ip_address', 'browser', 'os', 'country', 'is_active', 'last_activity']
     list_filter = ['is_active', 'browser', 'os', 'country', 'created_at']
     search_fields = ['user__username', 'ip_address', 'session_key']
     readonly_fields = ['session_key', 'created_at', 'last_activity']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
 
 
 @admin.register(Organization)
@@ -160,6 +181,8 @@ class OrganizationAdmin(admin.ModelAdmin):
     list_filter = ['industry', 'size', 'is_active', 'created_at']
     search_fields = ['name', 'slug', 'owner__username']
     prepopulated_fields = {'slug': ('name',)}
+    list_select_related = ['owner']
+    autocomplete_fields = ['owner']
 
 
 @admin.register(Project)
@@ -176,6 +199,8 @@ class ProjectAdmin(admin.ModelAdmin):
     search_fields = ['name', 'slug', 'owner__username', 'description']
     prepopulated_fields = {'slug': ('name',)}
     date_hierarchy = 'created_at'
+    list_select_related = ['owner', 'organization']
+    autocomplete_fields = ['owner', 'organization']
     
     fieldsets = (
         ('Basic Information', {
@@ -203,6 +228,8 @@ class ProjectMembershipAdmin(admin.ModelAdmin):
     list_display = ['user', 'project', 'role', 'joined_at', 'invited_by']
     list_filter = ['role', 'joined_at']
     search_fields = ['user__username', 'project__name']
+    list_select_related = ['user', 'project']
+    autocomplete_fields = ['user', 'project']
 
 
 @admin.register(AIModel)
@@ -218,6 +245,8 @@ class AIModelAdmin(admin.ModelAdmin):
     ]
     search_fields = ['name', 'slug', 'owner__username', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    list_select_related = ['owner', 'project']
+    autocomplete_fields = ['owner', 'project']
     
     fieldsets = (
         ('Basic Information', {
@@ -266,6 +295,8 @@ class DatasetAdmin(admin.ModelAdmin):
     list_filter = ['dataset_type', 'format', 'is_public', 'created_at']
     search_fields = ['name', 'slug', 'owner__username', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    list_select_related = ['owner', 'project']
+    autocomplete_fields = ['owner', 'project']
     
     def file_size_mb(self, obj):
         return f"{obj.file_size_bytes / (1024*1024):.2f} MB"
@@ -273,7 +304,7 @@ class DatasetAdmin(admin.ModelAdmin):
 
 
 @admin.register(APIUsage)
-class APIUsageAdmin(admin.ModelAdmin):
+class APIUsageAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """API Usage Admin"""
     list_display = [
         'user', 'ai_model', 'endpoint', 'method', 'status_code',
@@ -288,6 +319,8 @@ class APIUsageAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['request_id', 'created_at']
     date_hierarchy = 'created_at'
+    list_select_related = ['user', 'ai_model']
+    raw_id_fields = ['user', 'ai_model']
     
     def has_add_permission(self, request):
         return False
@@ -305,10 +338,12 @@ class UserConnectionAdmin(admin.ModelAdmin):
     ]
     list_filter = ['connection_type', 'status', 'created_at']
     search_fields = ['from_user__username', 'to_user__username']
+    list_select_related = ['from_user', 'to_user']
+    autocomplete_fields = ['from_user', 'to_user']
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Enhanced Notification Admin"""
     list_display = [
         'user', 'notification_type', 'title', 'priority',
@@ -320,6 +355,8 @@ class NotificationAdmin(admin.ModelAdmin):
     ]
     search_fields = ['user__username', 'title', 'message']
     readonly_fields = ['created_at', 'read_at']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
     
     def mark_as_read(self, request, queryset):
         from django.utils import timezone
@@ -341,6 +378,8 @@ class FileUploadAdmin(admin.ModelAdmin):
     ]
     search_fields = ['original_name', 'user__username', 'description']
     readonly_fields = ['file_hash', 'file_size', 'created_at']
+    list_select_related = ['user', 'project']
+    autocomplete_fields = ['user', 'project']
     
     def file_size_mb(self, obj):
         return f"{obj.file_size / (1024*1024):.2f} MB"
@@ -348,7 +387,7 @@ class FileUploadAdmin(admin.ModelAdmin):
 
 
 @admin.register(SystemLog)
-class SystemLogAdmin(admin.ModelAdmin):
+class SystemLogAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """System Log Admin"""
     list_display = [
         'level', 'logger_name', 'message_preview', 'user',
@@ -357,6 +396,8 @@ class SystemLogAdmin(admin.ModelAdmin):
     list_filter = ['level', 'logger_name', 'created_at']
     search_fields = ['message', 'user__username', 'ip_address']
     readonly_fields = ['created_at']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
     
     def message_preview(self, obj):
         return obj.message[:100] + '...' if len(obj.message) > 100 else obj.message
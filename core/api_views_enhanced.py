@@ -5,14 +5,34 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Q
+from accounts import directory
+from core.models import UserConnection
 from utils.secure_json_storage import secure_storage
 from datetime import datetime, timedelta
 import json
 
 User = get_user_model()
 
+
+class DirectoryPagination(CursorPagination):
+    """Stable keyset pagination over the public directory"""
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ConnectionPagination(CursorPagination):
+    ordering = '-created_at'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_project(request):
@@ -163,28 +183,59 @@ def get_dashboard_data(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_directory(request):
-    """Get public user directory for networking"""
+    """Get public user directory for networking.
+
+    Query params: q (name, company, job title, location or skills),
+    skill_level, user_type and cursor. First pages are cached per filter
+    combination until a directory profile changes.
+    """
     try:
-        # Get users with public profiles
-        public_users = User.objects.filter(is_profile_public=True).exclude(id=request.user.id)
-        
-        users_data = []
-        for user in public_users:
-            user_data = {
-                'id': user.id,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'company_name': user.company_name,
-                'job_title': user.job_title,
-                'bio': user.bio,
-                'location': user.location,
-                'skill_level': user.skill_level,
-                'date_joined': user.date_joined.isoformat()
+        filters = {
+            'q': request.query_params.get('q', '').strip(),
+            'skill_level': request.query_params.get('skill_level', ''),
+            'user_type': request.query_params.get('user_type', ''),
+        }
+        cursor = request.query_params.get(DirectoryPagination.cursor_query_param)
+        page_size = request.query_params.get(DirectoryPagination.page_size_query_param, '')
+        cache_key = None if cursor else directory.first_page_cache_key({**filters, 'page_size': page_size})
+        
+        payload = cache.get(cache_key) if cache_key else None
+        if payload is None:
+            public_users = User.objects.filter(is_profile_public=True).only(*directory.DIRECTORY_FIELDS)
+            if filters['skill_level']:
+                public_users = public_users.filter(skill_level=filters['skill_level'])
+            if filters['user_type']:
+                public_users = public_users.filter(user_type=filters['user_type'])
+            if filters['q']:
+                public_users = directory.search(public_users, filters['q'])
+            
+            paginator = DirectoryPagination()
+            page = paginator.paginate_queryset(public_users, request)
+            payload = {
+                'users': [
+                    {
+                        'id': user.id,
+                        'username': user.username,
+                        'first_name': user.first_name,
+                        'last_name': user.last_name,
+                        'company_name': user.company_name,
+                        'job_title': user.job_title,
+                        'bio': user.bio,
+                        'location': user.location,
+                        'skill_level': user.skill_level,
+                        'date_joined': user.date_joined.isoformat()
+                    }
+                    for user in page
+                ],
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
             }
-            users_data.append(user_data)
+            if cache_key:
+                cache.set(cache_key, payload, directory.CACHE_TIMEOUT)
         
-        return Response({'users': users_data}, status=status.HTTP_200_OK)
+        # Pages are shared between users, so the requester is dropped afterwards
+        users_data = [user for user in payload['users'] if user['id'] != request.user.id]
+        return Response({**payload, 'users': users_data}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -200,38 +251,82 @@ def send_connection_request(request):
             return Response({'error': 'Target user ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            to_user = User.objects.get(id=to_user_id)
-        except User.DoesNotExist:
+            to_user = User.objects.only('id').get(id=to_user_id)
+        except (User.DoesNotExist, ValueError):
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Save connection request in both users' data
-        connection_data = {
-            'from_user_id': request.user.id,
-            'to_user_id': to_user_id,
-            'message': message,
-            'status': 'pending',
-            'created_at': datetime.now().isoformat()
-        }
+        if to_user.id == request.user.id:
+            return Response({'error': 'Cannot connect to yourself'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Add to sender's data
-        sender_data = secure_storage.get_user_data(request.user.id)
-        if 'connections' not in sender_data:
-            sender_data['connections'] = []
-        sender_data['connections'].append(connection_data)
-        secure_storage._write_secure_file(secure_storage._get_file_path('users', request.user.id), sender_data)
-        
-        # Add to receiver's data
-        receiver_data = secure_storage.get_user_data(to_user_id)
-        if 'connections' not in receiver_data:
-            receiver_data['connections'] = []
-        receiver_data['connections'].append(connection_data)
-        secure_storage._write_secure_file(secure_storage._get_file_path('users', to_user_id), receiver_data)
-        
-        return Response({'message': 'Connection request sent successfully'}, status=status.HTTP_201_CREATED)
+        # Repeated requests return the existing edge instead of duplicating it
+        connection, created = UserConnection.objects.request(request.user, to_user, message)
+        
+        return Response({
+            'message': 'Connection request sent successfully' if created else 'Connection already exists',
+            'connection': connection.as_dict(request.user.id)
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_connections(request):
+    """List the user's connections, filtered by status and direction"""
+    try:
+        connections = UserConnection.objects.involving(
+            request.user,
+            status=request.query_params.get('status') or None,
+            direction=request.query_params.get('direction') or None
+        ).only('id', 'from_user_id', 'to_user_id', 'status', 'message', 'created_at')
+        
+        paginator = ConnectionPagination()
+        page = paginator.paginate_queryset(connections, request)
+        return Response({
+            'connections': [c.as_dict(request.user.id) for c in page],
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def respond_connection_request(request, connection_id):
+    """Accept or reject an incoming connection request"""
+    try:
+        action = request.data.get('action')
+        if action not in ('accept', 'reject'):
+            return Response({'error': 'Action must be accept or reject'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            connection = UserConnection.objects.get(id=connection_id, to_user=request.user)
+        except UserConnection.DoesNotExist:
+            return Response({'error': 'Connection request not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if action == 'accept':
+            connection.accept()
+        else:
+            connection.reject()
+        
+        return Response({'connection': connection.as_dict(request.user.id)}, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_connection_status(request, user_id):
+    """Connection state and mutual connection count between the user and another user"""
+    try:
+        connection = UserConnection.objects.between(request.user, user_id).first()
+        return Response({
+            'connected': connection is not None and connection.status == 'accepted',
+            'connection': connection.as_dict(request.user.id) if connection else None,
+            'mutual_connections': UserConnection.objects.mutual_count(request.user, user_id)
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_analytics_charts(request):
@@ -0,0 +1,66 @@
+"""
+Management command to merge stored request profiles
+Sampling profiles (.stacks) are merged into one collapsed-stack file for
+flamegraph.pl / speedscope; cProfile dumps (.prof) into one pstats report.
+"""
+import pstats
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from utils.profiling import profile_files, profiles_dir, read_stacks
+
+
+class Command(BaseCommand):
+    help = 'Aggregate profiles from PROFILING_DIR into a collapsed-stack file (or a pstats report with --pstats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url-name',
+            default=None,
+            help='Only profiles of this URL name (directory under PROFILING_DIR)',
+        )
+        parser.add_argument(
+            '--since-hours',
+            type=float,
+            default=None,
+            help='Only profiles written in the last N hours',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Collapsed-stack file to write (default: stdout)',
+        )
+        parser.add_argument(
+            '--pstats',
+            type=int,
+            default=None,
+            metavar='N',
+            help='Merge cProfile dumps instead and print the top N functions by cumulative time',
+        )
+
+    def handle(self, *args, **options):
+        since = time.time() - options['since_hours'] * 3600 if options['since_hours'] else None
+
+        if options['pstats'] is not None:
+            paths = list(profile_files(options['url_name'], 'prof', since))
+            if not paths:
+                raise CommandError(f"No cProfile dumps found under {profiles_dir()}")
+            stats = pstats.Stats(*map(str, paths), stream=self.stdout)
+            stats.sort_stats('cumulative').print_stats(options['pstats'])
+            return
+
+        paths = list(profile_files(options['url_name'], 'stacks', since))
+        if not paths:
+            raise CommandError(f"No sampling profiles found under {profiles_dir()}")
+        merged = read_stacks(paths)
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for stack, count in sorted(merged.items()):
+                out.write(f'{stack} {count}\n')
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Merged {len(paths)} profiles ({sum(merged.values())} samples) into {options['output']}"
+            ))
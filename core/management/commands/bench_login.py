@@ -0,0 +1,58 @@
+"""
+Management command to benchmark login throughput of the authentication backends
+"""
+import time
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure authenticate() throughput and queries per attempt (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Attempts per scenario',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        password = 'bench-login-password'
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='bench_login_user',
+                email='bench_login_user@example.com',
+                password=password
+            )
+            scenarios = [
+                ('email, valid password', user.email, password),
+                ('username, valid password', user.username, password),
+                ('valid user, wrong password', user.email, 'wrong-password'),
+                ('unknown user', 'nobody@example.com', password),
+            ]
+            for label, identifier, secret in scenarios:
+                self._run(label, identifier, secret, iterations)
+            transaction.set_rollback(True)
+
+    def _run(self, label, identifier, secret, iterations):
+        # Warm up the hasher and any lazily computed dummy hash
+        authenticate(username=identifier, password=secret)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                authenticate(username=identifier, password=secret)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{label:28} {iterations / elapsed:8.1f} logins/s  '
+            f'{elapsed / iterations * 1000:7.1f} ms/login  '
+            f'{len(queries) / iterations:.1f} queries/login'
+        )
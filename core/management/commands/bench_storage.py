@@ -0,0 +1,166 @@
+"""
+Management command to benchmark the JSON storage layer
+Seeds synthetic users, boards and task trees into a scratch data directory,
+times BoardStorage, SecureJSONStorage and JSONStorageManager operations and
+prints a JSON report that can be stored and compared against later runs.
+"""
+import json
+import random
+import shutil
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from utils.board_storage import BoardStorage
+from utils.json_storage import JSONStorageManager
+from utils.secure_json_storage import SecureJSONStorage
+from utils.storage_bench import SCALES, compare, seed_user, time_operation
+from utils.storage_manifest import storage_manifest
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time storage operations on synthetic data and report p50/p95/p99 and throughput as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='1k',
+            help='Total number of tasks to seed',
+        )
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=None,
+            help='Exact number of tasks to seed (overrides --scale)',
+        )
+        parser.add_argument('--users', type=int, default=10, help='Synthetic users')
+        parser.add_argument('--boards', type=int, default=2, help='Boards per user')
+        parser.add_argument('--depth', type=int, default=3, help='Levels per task tree')
+        parser.add_argument('--fanout', type=int, default=5, help='Children per task')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Timed calls per operation',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+        parser.add_argument(
+            '--data-dir',
+            default=None,
+            help='Scratch directory for the storage files (default: a temporary directory, removed afterwards)',
+        )
+        parser.add_argument('--output', default=None, help='Also write the report to this file')
+        parser.add_argument('--baseline', default=None, help='Report of an earlier run to compare against')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Allowed p95 growth against the baseline (0.2 = 20%%)',
+        )
+
+    def handle(self, *args, **options):
+        tasks = options['tasks'] or SCALES[options['scale']]
+        users, boards = options['users'], options['boards']
+        if min(tasks, users, boards, options['depth'], options['fanout'], options['iterations']) < 1:
+            raise CommandError('Counts must be positive')
+        if tasks < users * boards:
+            raise CommandError('Need at least one task per board')
+
+        data_dir = options['data_dir'] or tempfile.mkdtemp(prefix='bench_storage_')
+        try:
+            # Fresh storage instances rooted in the scratch directory, with their own key
+            with override_settings(BASE_DIR=data_dir), transaction.atomic():
+                report = self._run(tasks, users, boards, options)
+                # Written while the scratch files still exist, then rolled back with them
+                storage_manifest.flush()
+                transaction.set_rollback(True)
+        finally:
+            if not options['data_dir']:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                report['regressions'] = compare(report, json.load(f), options['tolerance'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+        if report.get('regressions'):
+            raise CommandError(f"{len(report['regressions'])} operations regressed beyond the baseline")
+
+    def _run(self, tasks, users, boards, options):
+        rng = random.Random(options['seed'])
+        board_storage, secure_storage, json_storage = BoardStorage(), SecureJSONStorage(), JSONStorageManager()
+
+        start = time.perf_counter()
+        people = User.objects.bulk_create([
+            User(username=f'bench_storage_{i}', email=f'bench_storage_{i}@example.com')
+            for i in range(users)
+        ])
+        per_user = [tasks // users + (1 if u < tasks % users else 0) for u in range(users)]
+        board_ids = {
+            user.id: seed_user(board_storage, secure_storage, json_storage, user, boards, count,
+                               options['depth'], options['fanout'], rng)
+            for user, count in zip(people, per_user)
+        }
+        seed_seconds = time.perf_counter() - start
+
+        def target(i):
+            user = people[i % users]
+            return user, board_ids[user.id][(i // users) % boards]
+
+        # Leaves first: in breadth-first order the last task never has children
+        leaves = {
+            (user_id, board_id): [t['id'] for t in board_storage.get_board_tasks(user_id, board_id)]
+            for user_id, ids in board_ids.items() for board_id in ids
+        }
+
+        def delete_leaf(i):
+            user, board_id = target(i)
+            remaining = leaves[(user.id, board_id)]
+            if remaining:
+                board_storage.delete_board_task(user.id, board_id, remaining.pop())
+
+        def board_task_id(i):
+            user, board_id = target(i)
+            return leaves[(user.id, board_id)][i % len(leaves[(user.id, board_id)])]
+
+        operations = {
+            'board.create_board': lambda i: board_storage.create_board(target(i)[0].id, {'name': f'Bench {i}'}),
+            'board.get_user_boards': lambda i: board_storage.get_user_boards(target(i)[0].id),
+            'board.save_board_task': lambda i: board_storage.save_board_task(
+                target(i)[0].id, target(i)[1], {'title': f'Bench task {i}'}),
+            'board.get_board_tasks': lambda i: board_storage.get_board_tasks(target(i)[0].id, target(i)[1]),
+            'board.update_board_task': lambda i: board_storage.update_board_task(
+                target(i)[0].id, target(i)[1], board_task_id(i), {'progress': i % 100}),
+            'board.delete_board_task': delete_leaf,
+            'board.get_all_user_tasks': lambda i: board_storage.get_all_user_tasks(target(i)[0].id),
+            'secure.save_task_data': lambda i: secure_storage.save_task_data(
+                target(i)[0].id, {'title': f'Bench task {i}'}),
+            'secure.get_user_tasks': lambda i: secure_storage.get_user_tasks(target(i)[0].id),
+            'secure.update_task_progress': lambda i: secure_storage.update_task_progress(
+                target(i)[0].id, i + 1, i % 100),
+            'secure.dashboard': lambda i: secure_storage.generate_dashboard_data(target(i)[0].id),
+            'json.save_user_data': lambda i: json_storage.save_user_data(target(i)[0]),
+            'json.get_user_data': lambda i: json_storage.get_user_data(target(i)[0].id),
+            'json.save_task_data': lambda i: json_storage.save_task_data(
+                target(i)[0].id, {'title': f'Bench task {i}'}),
+            'json.get_user_tasks': lambda i: json_storage.get_user_tasks(target(i)[0].id),
+        }
+        return {
+            'config': {
+                'tasks': tasks, 'users': users, 'boards': boards, 'depth': options['depth'],
+                'fanout': options['fanout'], 'iterations': options['iterations'], 'seed': options['seed'],
+            },
+            'seed_seconds': round(seed_seconds, 3),
+            'operations': {
+                name: time_operation(fn, options['iterations']) for name, fn in operations.items()
+            },
+        }
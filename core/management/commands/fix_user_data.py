@@ -1,19 +1,58 @@
 """
 Management command to fix user ID issues and migrate to secure storage
 """
-from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from utils.maintenance import UserJob, UserJobCommand
 from utils.secure_json_storage import secure_storage
 from utils.json_storage import json_storage
+from utils.storage_migration import LegacyToSecureMigration, orphaned_legacy_files
 import os
-import json
 
 User = get_user_model()
 
-class Command(BaseCommand):
+
+class FixUserIdsJob(UserJob):
+    """Rewrite every user's secure data file under their real id"""
+
+    name = 'fix_user_ids'
+
+    def process(self, user):
+        if self.dry_run:
+            self.log(f'  - Would create secure data for user {user.id}: {user.email}')
+            return {'created': 1}
+        # Create secure user data with correct ID
+        if secure_storage.save_user_data(user):
+            self.log(f'  ✓ Created secure data for user {user.id}')
+            return {'created': 1}
+        self.log(f'  ✗ Failed to create secure data for user {user.id}')
+        return {'failed': 1}
+
+
+class CreateMissingJob(UserJob):
+    """Create the secure data file of users that have none"""
+
+    name = 'create_missing'
+
+    def process(self, user):
+        # Check if user data exists
+        if secure_storage.get_user_data(user.id):
+            return {'existing': 1}
+        if self.dry_run:
+            self.log(f'  - Would create data file for user {user.id}: {user.email}')
+            return {'created': 1}
+        if secure_storage.save_user_data(user):
+            self.log(f'  ✓ Created data file for user {user.id}: {user.email}')
+            return {'created': 1}
+        self.log(f'  ✗ Failed to create data file for user {user.id}')
+        return {'failed': 1}
+
+
+class Command(UserJobCommand):
     help = 'Fix user ID issues and migrate to secure storage'
     
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument(
             '--migrate-all',
             action='store_true',
@@ -32,120 +71,50 @@ class Command(BaseCommand):
     
     def handle(self, *args, **options):
         if options['fix_user_ids']:
-            self.fix_user_ids()
+            self.fix_user_ids(options)
         
         if options['migrate_all']:
-            self.migrate_to_secure_storage()
+            self.migrate_to_secure_storage(options)
         
         if options['create_missing']:
-            self.create_missing_user_files()
+            self.create_missing_user_files(options)
         
         self.stdout.write(self.style.SUCCESS('User data migration completed successfully'))
     
-    def fix_user_ids(self):
+    def fix_user_ids(self, options):
         """Fix user ID numbering to start from actual user IDs"""
         self.stdout.write('Fixing user ID numbering...')
-        
-        users = User.objects.all().order_by('id')
-        for user in users:
-            self.stdout.write(f'Processing user {user.id}: {user.email}')
-            
-            # Create secure user data with correct ID
-            success = secure_storage.save_user_data(user)
-            if success:
-                self.stdout.write(f'  ✓ Created secure data for user {user.id}')
-            else:
-                self.stdout.write(f'  ✗ Failed to create secure data for user {user.id}')
+        counters = self.run_job(FixUserIdsJob(dry_run=options['dry_run']), options)
+        self.stdout.write(f"Created secure data for {counters['created']} users, {counters['failed']} failed")
     
-    def migrate_to_secure_storage(self):
+    def migrate_to_secure_storage(self, options):
         """Migrate existing JSON data to secure storage"""
         self.stdout.write('Migrating existing data to secure storage...')
         
-        old_data_path = os.path.join('data')
-        if not os.path.exists(old_data_path):
+        if not os.path.exists(json_storage.base_path):
             self.stdout.write('No old data directory found')
             return
         
-        # Migrate user data
-        users_path = os.path.join(old_data_path, 'users')
-        if os.path.exists(users_path):
-            for filename in os.listdir(users_path):
-                if filename.startswith('user_') and filename.endswith('.json'):
-                    old_user_id = filename.replace('user_', '').replace('.json', '')
-                    try:
-                        old_user_id = int(old_user_id)
-                        user = User.objects.get(id=old_user_id)
-                        
-                        # Read old data
-                        with open(os.path.join(users_path, filename), 'r') as f:
-                            old_data = json.load(f)
-                        
-                        # Save to secure storage
-                        secure_storage.save_user_data(user)
-                        self.stdout.write(f'  ✓ Migrated user {old_user_id}')
-                        
-                    except (ValueError, User.DoesNotExist):
-                        self.stdout.write(f'  ✗ Skipped invalid user file: {filename}')
+        job = LegacyToSecureMigration(dry_run=options['dry_run'])
+        for filename in orphaned_legacy_files(job.queryset()):
+            self.stdout.write(f'  ✗ Skipped file without a user: {filename}')
         
-        # Migrate task data
-        tasks_path = os.path.join(old_data_path, 'tasks')
-        if os.path.exists(tasks_path):
-            for filename in os.listdir(tasks_path):
-                if filename.startswith('tasks_') and filename.endswith('.json'):
-                    old_user_id = filename.replace('tasks_', '').replace('.json', '')
-                    try:
-                        old_user_id = int(old_user_id)
-                        
-                        # Read old task data
-                        with open(os.path.join(tasks_path, filename), 'r') as f:
-                            old_data = json.load(f)
-                        
-                        if 'tasks' in old_data:
-                            for task in old_data['tasks']:
-                                secure_storage.save_task_data(old_user_id, task)
-                        
-                        self.stdout.write(f'  ✓ Migrated tasks for user {old_user_id}')
-                        
-                    except (ValueError, json.JSONDecodeError):
-                        self.stdout.write(f'  ✗ Skipped invalid task file: {filename}')
-        
-        # Migrate project data
-        projects_path = os.path.join(old_data_path, 'projects')
-        if os.path.exists(projects_path):
-            for filename in os.listdir(projects_path):
-                if filename.startswith('projects_') and filename.endswith('.json'):
-                    old_user_id = filename.replace('projects_', '').replace('.json', '')
-                    try:
-                        old_user_id = int(old_user_id)
-                        
-                        # Read old project data
-                        with open(os.path.join(projects_path, filename), 'r') as f:
-                            old_data = json.load(f)
-                        
-                        if 'projects' in old_data:
-                            for project in old_data['projects']:
-                                secure_storage.save_project_data(old_user_id, project)
-                        
-                        self.stdout.write(f'  ✓ Migrated projects for user {old_user_id}')
-                        
-                    except (ValueError, json.JSONDecodeError):
-                        self.stdout.write(f'  ✗ Skipped invalid project file: {filename}')
+        counters = self.run_job(job, options)
+        verb = 'Would migrate' if options['dry_run'] else 'Migrated'
+        self.stdout.write(
+            f"{verb} {counters['user_data']} user files, {counters['tasks']} tasks and "
+            f"{counters['projects']} projects ({counters['already_migrated']} already migrated, "
+            f"{counters['invalid']} invalid sources, "
+            f"{counters['failed']} failed writes, {counters['mismatches']} count mismatches)"
+        )
+        if counters['failed'] or counters['mismatches']:
+            raise CommandError('Migration finished with errors; see the messages above')
     
-    def create_missing_user_files(self):
+    def create_missing_user_files(self, options):
         """Create missing user data files for all users"""
         self.stdout.write('Creating missing user data files...')
-        
-        users = User.objects.all()
-        for user in users:
-            # Check if user data exists
-            user_data = secure_storage.get_user_data(user.id)
-            if not user_data:
-                success = secure_storage.save_user_data(user)
-                if success:
-                    self.stdout.write(f'  ✓ Created data file for user {user.id}: {user.email}')
-                else:
-                    self.stdout.write(f'  ✗ Failed to create data file for user {user.id}')
-            else:
-                self.stdout.write(f'  - User {user.id} already has data file')
-        
-        self.stdout.write(f'Processed {users.count()} users')
\ No newline at end of file
+        counters = self.run_job(CreateMissingJob(dry_run=options['dry_run']), options)
+        self.stdout.write(
+            f"Processed {counters['users']} users: {counters['created']} created, "
+            f"{counters['existing']} already had data files, {counters['failed']} failed"
+        )
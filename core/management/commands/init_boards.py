@@ -1,35 +1,37 @@
 """
 Initialize default boards for users
 """
-from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from utils.board_storage import BoardStorage
+from utils.board_storage import board_storage
+from utils.maintenance import UserJob, UserJobCommand
 
-User = get_user_model()
+DEFAULT_BOARD = {
+    'name': 'My Dashboard',
+    'description': 'Default dashboard for task and project management',
+    'type': 'dashboard'
+}
 
-class Command(BaseCommand):
+
+class InitBoardsJob(UserJob):
+    name = 'init_boards'
+    user_fields = ('id', 'username')
+
+    def process(self, user):
+        # Check if user already has boards
+        if board_storage.get_user_boards(user.id):
+            return {'skipped': 1}
+        if not self.dry_run:
+            board_id = board_storage.create_board(user.id, dict(DEFAULT_BOARD))
+            self.log(f'Created default board for user {user.username}: {board_id}')
+        return {'created': 1}
+
+
+class Command(UserJobCommand):
     help = 'Initialize default boards for all users'
-    
+
     def handle(self, *args, **options):
-        board_storage = BoardStorage()
-        
-        for user in User.objects.all():
-            # Check if user already has boards
-            existing_boards = board_storage.get_user_boards(user.id)
-            
-            if not existing_boards:
-                # Create default dashboard board
-                default_board = {
-                    'name': 'My Dashboard',
-                    'description': 'Default dashboard for task and project management',
-                    'type': 'dashboard'
-                }
-                
-                board_id = board_storage.create_board(user.id, default_board)
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created default board for user {user.username}: {board_id}')
-                )
-            else:
-                self.stdout.write(f'User {user.username} already has {len(existing_boards)} boards')
-        
-        self.stdout.write(self.style.SUCCESS('Board initialization complete'))
\ No newline at end of file
+        counters = self.run_job(InitBoardsJob(dry_run=options['dry_run']), options)
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(
+            f"{verb} {counters['created']} default boards; {counters['skipped']} users already have boards"
+        )
+        self.stdout.write(self.style.SUCCESS('Board initialization complete'))
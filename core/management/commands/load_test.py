@@ -0,0 +1,124 @@
+"""
+Management command to load-test the board and dashboard endpoints
+Creates throw-away users, drives them through utils.load_test against the
+WSGI app in-process (default) or a running server (--url), and prints a JSON
+report with per-operation latency histograms, error rates and throughput.
+"""
+import json
+import os
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from utils.load_test import DEFAULT_MIX, HTTPSession, WSGISession, parse_mix, parse_stages, run
+from utils.json_storage import json_storage
+from utils.secure_json_storage import secure_storage
+from utils.storage_manifest import storage_manifest
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'loadtest_'
+
+
+class Command(BaseCommand):
+    help = 'Replay a mix of board and dashboard requests from many simulated users and report latencies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default=None,
+            help='Base URL of a running server, e.g. http://127.0.0.1:8000 (default: in-process WSGI)',
+        )
+        parser.add_argument('--users', type=int, default=10, help='Simulated users')
+        parser.add_argument(
+            '--ramp-up',
+            type=float,
+            default=10,
+            help='Seconds over which the users start',
+        )
+        parser.add_argument(
+            '--stages',
+            default=None,
+            help='Ramp-up schedule as users:seconds pairs, e.g. 10:30,50:60 (overrides --users/--ramp-up)',
+        )
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run in total')
+        parser.add_argument(
+            '--mix',
+            default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+            help='Operation weights',
+        )
+        parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between requests per user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--password', default='load-test-password', help='Password of the simulated users')
+        parser.add_argument(
+            '--plan',
+            default='enterprise',
+            help='Subscription plan of the simulated users (sets their per-user rate limit)',
+        )
+        parser.add_argument('--output', default=None, help='Also write the report to this file')
+        parser.add_argument(
+            '--keep-users',
+            action='store_true',
+            help='Leave the simulated users and their storage files in place',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+            stages = parse_stages(options['stages']) if options['stages'] else [(options['users'], options['ramp_up'])]
+        except ValueError as e:
+            raise CommandError(str(e))
+        user_count = max(users for users, _ in stages)
+        if user_count < 1 or options['duration'] <= 0:
+            raise CommandError('Need at least one user and a positive duration')
+
+        users = self._create_users(user_count, options['password'], options['plan'])
+        if options['url']:
+            # All users share this machine's address, so the server's per-IP limit applies
+            def session_factory(index):
+                return HTTPSession(options['url'], users[index].username, options['password'])
+        else:
+            def session_factory(index):
+                return WSGISession(users[index], f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}')
+
+        try:
+            report = run(session_factory, user_count, stages, options['duration'], mix,
+                         options['think_time'], options['seed'])
+        finally:
+            if not options['keep_users']:
+                self._delete_users(users)
+
+        report['target'] = options['url'] or 'wsgi'
+        report['mix'] = mix
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+
+    def _create_users(self, count, password, plan):
+        # Leftovers of an interrupted run
+        self._delete_users(User.objects.filter(username__startswith=USERNAME_PREFIX))
+        # One hash for everyone: hashing per user would dominate setup
+        hashed = make_password(password)
+        # A long run can send more than a period's worth of calls per user; measure latency, not the quota
+        User.objects.bulk_create([
+            User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=hashed,
+                 subscription_plan=plan, api_calls_limit=10 ** 9)
+            for i in range(count)
+        ])
+        return list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+
+    def _delete_users(self, users):
+        users = list(users)
+        removed = []
+        for user in users:
+            paths = [secure_storage._get_file_path(data_type, user.id)
+                     for data_type in os.listdir(secure_storage.base_path)]
+            paths += [json_storage._get_user_file_path(user.id), json_storage._get_task_file_path(user.id),
+                      json_storage._get_project_file_path(user.id), json_storage._get_model_file_path(user.id)]
+            for path in paths:
+                if os.path.isfile(path):
+                    os.remove(path)
+                    removed.append(path)
+        storage_manifest.forget(removed)
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
@@ -0,0 +1,37 @@
+"""
+Management command to archive and prune security log tables
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Move old security log rows to the archive tables and delete rows past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows moved or deleted per statement',
+        )
+        parser.add_argument(
+            '--skip-archive',
+            action='store_true',
+            help='Only prune, do not move rows to the archive tables',
+        )
+
+    def handle(self, *args, **options):
+        from accounts.security_log import LOG_TABLES, archive_logs, prune_logs, writer
+
+        batch_size = options['batch_size']
+        # Write out anything this process still has queued
+        writer.flush()
+
+        for kind in LOG_TABLES:
+            if not options['skip_archive']:
+                moved = archive_logs(kind, batch_size)
+                self.stdout.write(f'{kind}: archived {moved} rows')
+            removed = prune_logs(kind, batch_size)
+            self.stdout.write(f'{kind}: pruned {removed} rows')
+
+        self.stdout.write(self.style.SUCCESS('Security logs maintained'))
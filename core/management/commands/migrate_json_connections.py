@@ -0,0 +1,113 @@
+"""
+Management command to move connections stored in encrypted user files into UserConnection
+"""
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from accounts.models import UserProfile
+from core.models import UserConnection
+from utils.secure_json_storage import SecureJSONStorage
+
+User = get_user_model()
+
+STATUSES = {choice for choice, _ in UserConnection.STATUS_CHOICES}
+
+
+class Command(BaseCommand):
+    help = 'Import connections from encrypted user files into the UserConnection table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be imported without making changes',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Remove the connections list from user files after importing',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = SecureJSONStorage()
+        user_ids = set(User.objects.values_list('id', flat=True))
+
+        # Both users' files carry a copy of the same request; keep one edge per pair
+        edges = {}
+        files_with_connections = []
+        for user_id in sorted(user_ids):
+            file_path = storage._get_file_path('users', user_id)
+            user_data = storage._read_secure_file(file_path)
+            connections = user_data.get('connections') or []
+            if not connections:
+                continue
+            files_with_connections.append((file_path, user_data))
+            for record in connections:
+                edge = self._parse(record, user_id)
+                if edge is None or edge[0] == edge[1] or not {edge[0], edge[1]} <= user_ids:
+                    continue
+                pair = frozenset(edge[:2])
+                current = edges.get(pair)
+                # An accepted copy wins over a stale pending one
+                if current is None or (edge[2] == 'accepted' and current[2] != 'accepted'):
+                    edges[pair] = edge
+
+        existing = set()
+        for from_id, to_id in UserConnection.objects.values_list('from_user_id', 'to_user_id').iterator():
+            existing.add(frozenset((from_id, to_id)))
+        new_edges = [edge for pair, edge in edges.items() if pair not in existing]
+
+        self.stdout.write(
+            f'Found {len(edges)} connections in {len(files_with_connections)} user files, '
+            f'{len(new_edges)} not yet imported'
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes made'))
+            return
+
+        with transaction.atomic():
+            UserConnection.objects.bulk_create([
+                UserConnection(from_user_id=from_id, to_user_id=to_id, status=status, message=message)
+                for from_id, to_id, status, message in new_edges
+            ], batch_size=1000, ignore_conflicts=True)
+            self._recount()
+
+        if options['prune']:
+            for file_path, user_data in files_with_connections:
+                user_data.pop('connections', None)
+                storage._write_secure_file(file_path, user_data)
+            self.stdout.write(f'Pruned connections from {len(files_with_connections)} user files')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(new_edges)} connections'))
+
+    def _parse(self, record, owner_id):
+        """(from_user_id, to_user_id, status, message) of one stored record"""
+        try:
+            if 'from_user_id' in record and 'to_user_id' in record:
+                from_id, to_id = int(record['from_user_id']), int(record['to_user_id'])
+            elif 'connected_user_id' in record:
+                from_id, to_id = owner_id, int(record['connected_user_id'])
+            else:
+                return None
+        except (TypeError, ValueError):
+            return None
+        status = record.get('status', 'pending')
+        return from_id, to_id, status if status in STATUSES else 'pending', record.get('message', '')
+
+    def _recount(self):
+        """Rewrite UserProfile.connections_count from the edge table"""
+        accepted = Q(status='accepted')
+        outgoing = dict(
+            UserConnection.objects.filter(accepted).values('from_user_id')
+            .annotate(n=Count('id')).values_list('from_user_id', 'n')
+        )
+        incoming = dict(
+            UserConnection.objects.filter(accepted).values('to_user_id')
+            .annotate(n=Count('id')).values_list('to_user_id', 'n')
+        )
+        profiles = list(UserProfile.objects.only('id', 'user_id', 'connections_count'))
+        for profile in profiles:
+            profile.connections_count = outgoing.get(profile.user_id, 0) + incoming.get(profile.user_id, 0)
+        UserProfile.objects.bulk_update(profiles, ['connections_count'], batch_size=1000)
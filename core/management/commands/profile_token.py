@@ -0,0 +1,25 @@
+"""
+Management command to issue a profiling token to a staff user
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.core.management.base import BaseCommand, CommandError
+from utils.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed token that profiles requests sent with X-Profile: <token> or ?profile=<token>'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Staff user the token is issued to')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: options['username']})
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+        try:
+            self.stdout.write(make_token(user))
+        except PermissionDenied as e:
+            raise CommandError(str(e))
@@ -0,0 +1,68 @@
+"""
+Management command to bulk-create SecurityUsers for an account from CSV
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV file into a SecurityAccount (columns: email, username, display_name, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account', help='SecurityAccount name or id')
+        parser.add_argument('csv_file', help='Path to the CSV file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per INSERT',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes (default: CPU count)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating users',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from accounts.models_security import SecurityAccount
+        except ImportError:
+            raise CommandError('Security accounts are not available on this server')
+        from accounts.provisioning import ProvisioningError, provision_users, read_csv
+
+        account = (
+            SecurityAccount.objects.filter(account_name=options['account']).first()
+            or self._by_id(SecurityAccount, options['account'])
+        )
+        if account is None:
+            raise CommandError(f"Security account not found: {options['account']}")
+
+        rows = read_csv(options['csv_file'])
+        self.stdout.write(f'Read {len(rows)} rows for account {account.account_name}')
+        try:
+            result = provision_users(
+                account, rows,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+            )
+        except ProvisioningError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"  line {error['line']} ({error['email']}): {error['error']}"))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"DRY RUN MODE - {result['importable']} users would be created"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Created {result['created']} users"))
+
+    def _by_id(self, model, value):
+        try:
+            return model.objects.filter(pk=value).first()
+        except Exception:
+            return None
@@ -0,0 +1,21 @@
+"""
+Management command to delete expired refresh-token revocations
+"""
+from django.core.management.base import BaseCommand
+from accounts.revocation import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens that have expired (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per DELETE statement',
+        )
+
+    def handle(self, *args, **options):
+        removed = prune_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired revocations'))
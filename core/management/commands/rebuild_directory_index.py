@@ -0,0 +1,21 @@
+"""
+Management command to rebuild the user directory search index
+"""
+from django.core.management.base import BaseCommand
+from accounts import directory
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the user directory search index from user and profile data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of index rows written per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        count = directory.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} users'))
@@ -0,0 +1,28 @@
+"""
+Management command to regenerate the weak-password Bloom filter
+"""
+from django.core.management.base import BaseCommand
+from accounts.weak_passwords import default_sources, weak_passwords
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weak-password Bloom filter from the password lists and the WeakPassword table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='*',
+            help='Extra password lists (one per line, .gz allowed) on top of WEAK_PASSWORD_LISTS',
+        )
+        parser.add_argument(
+            '--skip-table',
+            action='store_true',
+            help='Do not read passwords from the WeakPassword table',
+        )
+
+    def handle(self, *args, **options):
+        files = default_sources() + options['files']
+        bloom = weak_passwords.rebuild(files, include_table=not options['skip_table'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(bloom)} passwords ({len(bloom.bits) // 1024} KiB) to {weak_passwords.path}'
+        ))
@@ -1,26 +1,34 @@
 """
 Django management command to setup JSON data storage system
 Usage: python manage.py setup_data
+
+--sync-users is the only per-user job: --workers, --chunk-size and
+--checkpoint apply to it alone. --dry-run also skips creating the data
+directories. --validate and --stats read the storage manifest; --full
+rescans every storage file into it first, and is how a deployment that
+predates the manifest backfills it.
 """
-from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from utils.data_initializer import data_initializer
+from utils.data_initializer import SyncUsersJob, data_initializer
+from utils.maintenance import UserJobCommand
+from utils.storage_manifest import storage_manifest
 
 User = get_user_model()
 
-class Command(BaseCommand):
+class Command(UserJobCommand):
     help = 'Initialize JSON data storage system for NeuralFlow'
     
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument(
             '--sync-users',
             action='store_true',
-            help='Sync existing users to JSON storage'
+            help='Sync existing users to JSON storage (honours --workers, --chunk-size, --checkpoint, --dry-run)'
         )
         parser.add_argument(
             '--validate',
             action='store_true',
-            help='Validate data integrity'
+            help='Validate data integrity from the storage manifest'
         )
         parser.add_argument(
             '--backup',
@@ -30,7 +38,12 @@ class Command(BaseCommand):
         parser.add_argument(
             '--stats',
             action='store_true',
-            help='Show storage statistics'
+            help='Show storage statistics from the storage manifest'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rescan every storage file into the storage manifest (before --validate/--stats)'
         )
     
     def handle(self, *args, **options):
@@ -38,18 +51,31 @@ class Command(BaseCommand):
             self.style.SUCCESS('Setting up NeuralFlow JSON Data Storage System')
         )
         
+        if not options['sync_users'] and (options['workers'] != 1 or options['checkpoint']):
+            self.stdout.write(
+                self.style.WARNING('--workers and --checkpoint only apply to --sync-users; ignoring them')
+            )
+        
         # Initialize data structure
-        self.stdout.write('Initializing data structure...')
-        data_initializer.initialize_data_structure()
+        if not options['dry_run']:
+            self.stdout.write('Initializing data structure...')
+            data_initializer.initialize_data_structure()
         
         # Sync existing users if requested
         if options['sync_users']:
             self.stdout.write('Syncing existing users...')
-            synced_count = data_initializer.sync_existing_users()
+            counters = self.run_job(SyncUsersJob(dry_run=options['dry_run']), options)
             self.stdout.write(
-                self.style.SUCCESS(f'Synced {synced_count} users')
+                self.style.SUCCESS(f"{'Would sync' if options['dry_run'] else 'Synced'} {counters['synced']} users "
+                                   f"({counters['failed']} failed)")
             )
         
+        # Rescan the storage files into the manifest if requested
+        if options['full'] and not options['dry_run']:
+            self.stdout.write('Rescanning storage files...')
+            scanned = storage_manifest.rebuild(on_progress=lambda line: self.stdout.write(f'  {line}'))
+            self.stdout.write(self.style.SUCCESS(f'Storage manifest holds {scanned} files'))
+        
         # Validate data integrity if requested
         if options['validate']:
             self.stdout.write('Validating data integrity...')
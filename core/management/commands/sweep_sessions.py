@@ -0,0 +1,41 @@
+"""
+Management command to expire and purge security sessions
+"""
+import time
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Deactivate expired UserSessions and optionally delete old inactive ones (run from cron or with --interval)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-after-days',
+            type=int,
+            default=None,
+            help='Also delete inactive sessions that expired more than this many days ago',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sessions updated or deleted per statement',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running, sweeping every INTERVAL seconds',
+        )
+
+    def handle(self, *args, **options):
+        from accounts.session_sweeper import sweep
+
+        while True:
+            result = sweep(options['delete_after_days'], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Deactivated {result['deactivated']} expired sessions, deleted {result['deleted']}"
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -1,51 +1,50 @@
-from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from utils.maintenance import UserJob, UserJobCommand
 from utils.secure_json_storage import SecureJSONStorage
 from core.models_enhanced import HierarchicalTask, UserConnection, AIAutomation, EnhancedProject
 import json
 
 User = get_user_model()
 
-class Command(BaseCommand):
-    help = 'Sync enhanced models and initialize secure storage for all users'
 
-    def add_arguments(self, parser):
-        parser.add_argument('--create-sample-data', action='store_true', help='Create sample data for testing')
+class SyncEnhancedModelsJob(UserJob):
+    """Initialize a user's secure data, optionally seed sample data, and count what they have"""
 
-    def handle(self, *args, **options):
+    name = 'sync_enhanced_models'
+
+    def process(self, user):
         storage = SecureJSONStorage()
         
-        self.stdout.write(self.style.SUCCESS('Starting enhanced models sync...'))
-        
-        # Initialize storage for all users
-        users = User.objects.all()
-        for user in users:
-            self.stdout.write(f'Syncing user: {user.username} (ID: {user.id})')
-            
-            # Initialize user data if not exists
-            user_data = storage.get_user_data(user.id)
-            if not user_data:
-                storage.save_user_data(user.id, {
-                    'user_id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'profile': {
-                        'skills': [],
-                        'preferences': {},
-                        'account_type': 'personal'
-                    },
-                    'activities': [],
-                    'created_at': user.date_joined.isoformat() if user.date_joined else None
-                })
-            
-            # Create sample data if requested
-            if options['create_sample_data']:
-                self.create_sample_data(storage, user.id)
+        # Initialize user data if not exists
+        user_data = storage.get_user_data(user.id)
+        if not user_data and not self.dry_run:
+            storage.save_user_data(user.id, {
+                'user_id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'profile': {
+                    'skills': [],
+                    'preferences': {},
+                    'account_type': 'personal'
+                },
+                'activities': [],
+                'created_at': user.date_joined.isoformat() if user.date_joined else None
+            })
         
-        self.stdout.write(self.style.SUCCESS('Enhanced models sync completed!'))
+        # Create sample data if requested
+        if self.options.get('create_sample_data') and not self.dry_run:
+            self.create_sample_data(storage, user.id)
         
-        # Display statistics
-        self.display_statistics(storage)
+        # Statistics
+        counts = {
+            'tasks': len(storage.get_user_tasks(user.id)),
+            'projects': len(storage.get_user_projects(user.id)),
+            'connections': len(storage.get_user_connections(user.id)),
+            'automations': len(storage.get_user_automations(user.id)),
+        }
+        self.log(f"User {user.username}: {counts['tasks']} tasks, {counts['projects']} projects, "
+                 f"{counts['connections']} connections, {counts['automations']} automations")
+        return counts
 
     def create_sample_data(self, storage, user_id):
         """Create sample hierarchical tasks, connections, and automations"""
@@ -147,32 +146,31 @@ class Command(BaseCommand):
         storage.save_user_automations(user_id, sample_automations)
         storage.save_user_projects(user_id, sample_projects)
         
-        self.stdout.write(f'  Created sample data for user {user_id}')
+        self.log(f'  Created sample data for user {user_id}')
+
+
+class Command(UserJobCommand):
+    help = 'Sync enhanced models and initialize secure storage for all users'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--create-sample-data', action='store_true', help='Create sample data for testing')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting enhanced models sync...'))
+        
+        job = SyncEnhancedModelsJob(dry_run=options['dry_run'], create_sample_data=options['create_sample_data'])
+        counters = self.run_job(job, options)
+        
+        self.stdout.write(self.style.SUCCESS('Enhanced models sync completed!'))
+        
+        # Display statistics
+        self.display_statistics(counters)
 
-    def display_statistics(self, storage):
+    def display_statistics(self, counters):
         """Display storage statistics"""
         self.stdout.write('\n' + '='*50)
         self.stdout.write(self.style.SUCCESS('STORAGE STATISTICS'))
         self.stdout.write('='*50)
-        
-        users = User.objects.all()
-        total_tasks = 0
-        total_projects = 0
-        total_connections = 0
-        total_automations = 0
-        
-        for user in users:
-            tasks = storage.get_user_tasks(user.id)
-            projects = storage.get_user_projects(user.id)
-            connections = storage.get_user_connections(user.id)
-            automations = storage.get_user_automations(user.id)
-            
-            total_tasks += len(tasks)
-            total_projects += len(projects)
-            total_connections += len(connections)
-            total_automations += len(automations)
-            
-            self.stdout.write(f'User {user.username}: {len(tasks)} tasks, {len(projects)} projects, {len(connections)} connections, {len(automations)} automations')
-        
-        self.stdout.write(f'\nTOTAL: {total_tasks} tasks, {total_projects} projects, {total_connections} connections, {total_automations} automations')
-        self.stdout.write('='*50)
\ No newline at end of file
+        self.stdout.write(f"\nTOTAL: {counters['tasks']} tasks, {counters['projects']} projects, {counters['connections']} connections, {counters['automations']} automations")
+        self.stdout.write('='*50)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 08:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userconnection",
+            index=models.Index(
+                fields=["from_user", "status", "created_at"],
+                name="core_userco_from_us_2ff3f8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userconnection",
+            index=models.Index(
+                fields=["to_user", "status", "created_at"],
+                name="core_userco_to_user_f998be_idx",
+            ),
+        ),
+    ]
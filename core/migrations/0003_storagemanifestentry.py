@@ -0,0 +1,47 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_userconnection_core_userco_from_us_2ff3f8_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StorageManifestEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("storage", models.CharField(max_length=20)),
+                ("data_type", models.CharField(max_length=30)),
+                ("owner_key", models.CharField(max_length=64)),
+                ("records", models.IntegerField(default=0)),
+                ("size", models.BigIntegerField(default=0)),
+                ("modified_at", models.DateTimeField()),
+                ("checksum", models.CharField(max_length=64)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["storage", "owner_key"],
+                        name="core_storag_storage_4d4f78_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("storage", "data_type", "owner_key"),
+                        name="unique_manifest_file",
+                    )
+                ],
+            },
+        ),
+    ]
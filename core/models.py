@@ -1,11 +1,12 @@
 """
 Core models for NeuralFlow application
 """
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from utils.helpers import generate_unique_filename
 from utils.validators import validate_file_size, validate_image_extension
+from utils.counters import usage_counters
 
 User = get_user_model()
 
@@ -56,6 +57,13 @@ class AIModel(TimeStampedModel):
     
     def __str__(self):
         return f"{self.name} ({self.get_model_type_display()})"
+    
+    @property
+    def current_api_calls_count(self):
+        return self.api_calls_count + usage_counters.pending(AIModel, self.pk, 'api_calls_count')
+    
+    def increment_api_calls(self, count=1):
+        usage_counters.increment(AIModel, self.pk, 'api_calls_count', count)
 
 
 class Project(TimeStampedModel):
@@ -96,6 +104,58 @@ class APIUsage(TimeStampedModel):
         return f"{self.user.username} - {self.endpoint} ({self.created_at})"
 
 
+class UserConnectionQuerySet(models.QuerySet):
+    def between(self, user_a, user_b):
+        """Edges joining two users in either direction (uses the unique index)"""
+        return self.filter(
+            models.Q(from_user=user_a, to_user=user_b) | models.Q(from_user=user_b, to_user=user_a)
+        )
+    
+    def involving(self, user, status=None, direction=None):
+        """Edges of one user; direction is 'incoming', 'outgoing' or None for both"""
+        if direction == 'incoming':
+            edges = self.filter(to_user=user)
+        elif direction == 'outgoing':
+            edges = self.filter(from_user=user)
+        else:
+            edges = self.filter(models.Q(from_user=user) | models.Q(to_user=user))
+        if status:
+            edges = edges.filter(status=status)
+        return edges
+
+
+class UserConnectionManager(models.Manager.from_queryset(UserConnectionQuerySet)):
+    def are_connected(self, user_a, user_b):
+        return self.between(user_a, user_b).filter(status='accepted').exists()
+    
+    def connected_user_ids(self, user):
+        """Ids of users with an accepted connection to user"""
+        outgoing = self.filter(from_user=user, status='accepted').values_list('to_user_id', flat=True)
+        incoming = self.filter(to_user=user, status='accepted').values_list('from_user_id', flat=True)
+        return set(outgoing) | set(incoming)
+    
+    def mutual_count(self, user_a, user_b):
+        return len(self.connected_user_ids(user_a) & self.connected_user_ids(user_b))
+    
+    def request(self, from_user, to_user, message=''):
+        """Idempotently ask to connect; returns (connection, created).
+        
+        An existing edge between the pair is returned unchanged, except that a
+        pending request in the opposite direction is accepted.
+        """
+        existing = self.between(from_user, to_user).first()
+        if existing is not None:
+            if existing.status == 'pending' and existing.to_user_id == getattr(from_user, 'pk', from_user):
+                existing.accept()
+            return existing, False
+        try:
+            with transaction.atomic():
+                return self.create(from_user=from_user, to_user=to_user, message=message), True
+        except IntegrityError:
+            # A concurrent request for the same pair won the race
+            return self.between(from_user, to_user).get(), False
+
+
 class UserConnection(TimeStampedModel):
     """User connections/following system"""
     STATUS_CHOICES = [
@@ -109,12 +169,60 @@ class UserConnection(TimeStampedModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     message = models.TextField(blank=True)
     
+    objects = UserConnectionManager()
+    
     class Meta:
         unique_together = ['from_user', 'to_user']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['from_user', 'status', 'created_at']),
+            models.Index(fields=['to_user', 'status', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.from_user.username} -> {self.to_user.username} ({self.status})"
+    
+    def as_dict(self, user_id):
+        """Edge as seen from one of its two users"""
+        outgoing = self.from_user_id == user_id
+        return {
+            'id': self.id,
+            'from_user_id': self.from_user_id,
+            'to_user_id': self.to_user_id,
+            'connected_user_id': self.to_user_id if outgoing else self.from_user_id,
+            'direction': 'outgoing' if outgoing else 'incoming',
+            'message': self.message,
+            'status': self.status,
+            'created_at': self.created_at.isoformat()
+        }
+    
+    def accept(self):
+        self._set_status('accepted')
+    
+    def reject(self):
+        self._set_status('rejected')
+    
+    def _set_status(self, status):
+        from accounts.models import UserProfile
+        
+        old_status = self.status
+        if old_status == status:
+            return
+        with transaction.atomic():
+            # Only the caller that still finds old_status moves the counts, so
+            # two concurrent accepts count the connection once
+            changed = UserConnection.objects.filter(pk=self.pk, status=old_status).update(
+                status=status, updated_at=timezone.now()
+            )
+            if not changed:
+                self.refresh_from_db(fields=['status', 'updated_at'])
+                return
+            self.status = status
+            delta = (status == 'accepted') - (old_status == 'accepted')
+            if delta:
+                UserProfile.objects.filter(user_id__in=[self.from_user_id, self.to_user_id]).update(
+                    connections_count=models.F('connections_count') + delta
+                )
 
 
 class Notification(TimeStampedModel):
@@ -161,4 +269,29 @@ class FileUpload(TimeStampedModel):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.original_name} - {self.user.username}"
\ No newline at end of file
+        return f"{self.original_name} - {self.user.username}"
+
+class StorageManifestEntry(models.Model):
+    """One JSON storage file: what it holds and what it looked like when last written.
+
+    owner_key is the part of the file name after the type: the user id under
+    data/, the user hash under secure_data/. Maintained by utils.storage_manifest.
+    """
+    storage = models.CharField(max_length=20)  # 'data' or 'secure_data'
+    data_type = models.CharField(max_length=30)
+    owner_key = models.CharField(max_length=64)
+    records = models.IntegerField(default=0)  # -1: the file could not be parsed
+    size = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField()
+    checksum = models.CharField(max_length=64)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['storage', 'data_type', 'owner_key'], name='unique_manifest_file'),
+        ]
+        indexes = [
+            models.Index(fields=['storage', 'owner_key']),
+        ]
+    
+    def __str__(self):
+        return f"{self.storage}/{self.data_type}/{self.owner_key}: {self.records} records"
@@ -1,7 +1,161 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from accounts.models import CustomUser
+from accounts.models import CustomUser, UserProfile
+from .models import AIModel, Project
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'bio', 'location']
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'bio', 'location']
+
+
+class ExpandableModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose relations are rendered as ids unless expanded.
+
+    ``expandable_fields`` maps a field name to ``{'serializer': cls,
+    'source': ..., 'many': bool, 'visible': fn}``; ``visible(queryset,
+    request)`` narrows the related rows of a to-many expansion to those the
+    requester may see, and is applied by ``optimize()``. The expansion tree comes from the
+    ``expand`` argument or, for the outermost serializer, from
+    ``context['expand']``; ``context['fields']`` trims the outermost
+    serializer's fields. Unexpanded to-many and reverse one-to-one relations
+    are left out entirely, since rendering their ids would cost a query per
+    row; forward foreign keys become ids read from the row itself.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=None, **kwargs):
+        context = kwargs.get('context') or {}
+        root = expand is None
+        super().__init__(*args, **kwargs)
+        tree = context.get('expand', {}) if root else expand
+        for name, spec in self.expandable_fields.items():
+            source = spec.get('source', name)
+            many = spec.get('many', False)
+            if name in tree:
+                self.fields[name] = spec['serializer'](
+                    source=source if source != name else None, many=many,
+                    read_only=True, expand=tree[name],
+                )
+            elif many or not self.Meta.model._meta.get_field(source).concrete:
+                self.fields.pop(name, None)
+            else:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=source if source != name else None, read_only=True,
+                )
+        only = context.get('fields') if root else None
+        if only:
+            for name in set(self.fields) - set(only) - {'id'}:
+                self.fields.pop(name)
+
+    @classmethod
+    def optimize(cls, queryset, tree, prefix='', request=None):
+        """Add the select_related/prefetch_related an expansion tree needs"""
+        for name, subtree in tree.items():
+            spec = cls.expandable_fields.get(name)
+            if spec is None:
+                continue
+            child = spec['serializer']
+            path = prefix + spec.get('source', name)
+            if spec.get('many', False):
+                inner = child.optimize(child.Meta.model._default_manager.all(), subtree, request=request)
+                if 'visible' in spec:
+                    inner = spec['visible'](inner, request)
+                queryset = queryset.prefetch_related(Prefetch(path, queryset=inner))
+            else:
+                queryset = child.optimize(queryset.select_related(path), subtree, path + '__', request)
+        return queryset
+
+
+def owned_by_requester(queryset, request):
+    """Rows of queryset belonging to the requesting user; none without one"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return queryset.none()
+    return queryset.filter(user=user)
+
+
+class UserProfileSerializer(ExpandableModelSerializer):
+    class Meta:
+        model = UserProfile
+        fields = [
+            'skills', 'interests', 'experience_years', 'education',
+            'profile_views', 'projects_count', 'connections_count',
+        ]
+
+
+class PublicUserSerializer(ExpandableModelSerializer):
+    """What other users may see of an account"""
+    full_name = serializers.ReadOnlyField()
+
+    expandable_fields = {
+        'profile': {'serializer': UserProfileSerializer},
+    }
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            'id', 'username', 'first_name', 'last_name', 'full_name',
+            'bio', 'location', 'avatar', 'skill_level', 'profile',
+        ]
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        viewer = getattr(request, 'user', None)
+        if not instance.is_profile_public and getattr(viewer, 'pk', None) != instance.pk:
+            # A private account shows no more than its unexpanded id would
+            return {'id': instance.pk}
+        return super().to_representation(instance)
+
+
+class AIModelSummarySerializer(ExpandableModelSerializer):
+    expandable_fields = {
+        'user': {'serializer': PublicUserSerializer},
+    }
+
+    class Meta:
+        model = AIModel
+        fields = ['id', 'name', 'model_type', 'status', 'accuracy', 'user']
+
+
+class ProjectSerializer(ExpandableModelSerializer):
+    expandable_fields = {
+        'user': {'serializer': PublicUserSerializer},
+        'ai_models': {'serializer': AIModelSummarySerializer, 'many': True},
+    }
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'user', 'ai_models',
+            'is_active', 'created_at', 'updated_at',
+        ]
+
+
+class ProjectSummarySerializer(ExpandableModelSerializer):
+    expandable_fields = {
+        'user': {'serializer': PublicUserSerializer},
+    }
+
+    class Meta:
+        model = Project
+        fields = ['id', 'name', 'user', 'is_active']
+
+
+class AIModelSerializer(ExpandableModelSerializer):
+    api_calls_count = serializers.IntegerField(source='current_api_calls_count', read_only=True)
+
+    expandable_fields = {
+        'user': {'serializer': PublicUserSerializer},
+        # Other users' projects stay private even when they hold a public model
+        'projects': {'serializer': ProjectSummarySerializer, 'many': True, 'visible': owned_by_requester},
+    }
+
+    class Meta:
+        model = AIModel
+        fields = [
+            'id', 'name', 'description', 'model_type', 'status', 'user',
+            'projects', 'accuracy', 'training_data_size', 'api_calls_count',
+            'is_public', 'created_at', 'updated_at',
+        ]
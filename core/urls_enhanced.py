@@ -1,11 +1,16 @@
 """
 Enhanced URL patterns for NeuralFlow API
 """
-from django.urls import path
-from . import api_views_enhanced
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from . import api_views_enhanced, viewsets
 
 app_name = 'core_enhanced'
 
+router = DefaultRouter()
+router.register('models', viewsets.AIModelViewSet, basename='ai-model')
+router.register('projects', viewsets.ProjectViewSet, basename='project')
+
 urlpatterns = [
     # Project Management
     path('api/projects/', api_views_enhanced.create_project, name='create_project'),
@@ -22,8 +27,14 @@ urlpatterns = [
     
     # User Networking
     path('api/users/directory/', api_views_enhanced.get_user_directory, name='get_user_directory'),
+    path('api/connections/', api_views_enhanced.get_connections, name='get_connections'),
     path('api/connections/send/', api_views_enhanced.send_connection_request, name='send_connection_request'),
+    path('api/connections/<int:connection_id>/respond/', api_views_enhanced.respond_connection_request, name='respond_connection_request'),
+    path('api/connections/status/<int:user_id>/', api_views_enhanced.get_connection_status, name='get_connection_status'),
     
     # AI Automation
     path('api/automations/', api_views_enhanced.create_automation, name='create_automation'),
+
+    # Read-only catalogue with ?expand= / ?fields=
+    path('api/v1/', include(router.urls)),
 ]
\ No newline at end of file
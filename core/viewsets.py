@@ -0,0 +1,69 @@
+"""
+Read-only API viewsets with client-selected expansion
+?expand=user.profile,projects picks nested objects (at most MAX_EXPAND_DEPTH
+levels) and ?fields=id,name,user trims the top-level fields. Expanded
+accounts and projects show only what the requester may see. The queryset is
+given exactly the select_related/prefetch_related the expansion needs, so a
+page costs the same number of queries whatever its size.
+"""
+from django.db.models import Q
+from rest_framework import viewsets
+from .models import AIModel, Project
+from .serializers import AIModelSerializer, ProjectSerializer
+
+MAX_EXPAND_DEPTH = 3
+
+
+def parse_expand(value: str, max_depth: int = MAX_EXPAND_DEPTH) -> dict:
+    """'user.profile,projects' -> {'user': {'profile': {}}, 'projects': {}}"""
+    tree = {}
+    for path in filter(None, (part.strip() for part in (value or '').split(','))):
+        node = tree
+        for name in path.split('.')[:max_depth]:
+            node = node.setdefault(name, {})
+    return tree
+
+
+class ExpandableViewSetMixin:
+    """For viewsets whose serializer_class is an ExpandableModelSerializer"""
+
+    def get_expand_tree(self) -> dict:
+        if not hasattr(self, '_expand_tree'):
+            self._expand_tree = parse_expand(self.request.query_params.get('expand', ''))
+        return self._expand_tree
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand_tree()
+        fields = self.request.query_params.get('fields')
+        if fields:
+            context['fields'] = [name.strip() for name in fields.split(',') if name.strip()]
+        return context
+
+    def get_queryset(self):
+        return self.get_serializer_class().optimize(
+            super().get_queryset(), self.get_expand_tree(), request=self.request,
+        )
+
+
+class AIModelViewSet(ExpandableViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """The requester's own models plus every public model"""
+    serializer_class = AIModelSerializer
+    queryset = AIModel.objects.all()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_authenticated:
+            return queryset.filter(Q(is_public=True) | Q(user=self.request.user))
+        return queryset.filter(is_public=True)
+
+
+class ProjectViewSet(ExpandableViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """The requester's projects"""
+    serializer_class = ProjectSerializer
+    queryset = Project.objects.all()
+
+    def get_queryset(self):
+        if not self.request.user.is_authenticated:
+            return Project.objects.none()
+        return super().get_queryset().filter(user=self.request.user)
@@ -0,0 +1,54 @@
+"""
+Scratch JSON storage for tests
+Creating a user mirrors it into data/users, and the storage layer writes
+under settings.BASE_DIR. Test cases that do either mix in
+TempStorageMixin so nothing lands in (or overwrites) the checked-in
+data/ and secure_data/ trees.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from utils.board_storage import BoardStorage, board_storage
+from utils.data_initializer import DataInitializer, data_initializer
+from utils.json_storage import JSONStorageManager, json_storage
+from utils.secure_json_storage import SecureJSONStorage, secure_storage
+from utils.storage_manifest import storage_manifest
+
+# Global instances and the classes that recompute their paths from BASE_DIR
+GLOBAL_STORAGES = (
+    (json_storage, JSONStorageManager),
+    (secure_storage, SecureJSONStorage),
+    (board_storage, BoardStorage),
+    (data_initializer, DataInitializer),
+)
+
+
+def _paths(instance):
+    return {name: value for name, value in vars(instance).items() if name.endswith('path')}
+
+
+class TempStorageMixin:
+    """Roots BASE_DIR and the global storages in a fresh temporary directory for each test
+
+    Subclasses that define setUp() must call super().setUp() first.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.storage_dir = tempfile.mkdtemp(prefix='test_storage_')
+        self.addCleanup(shutil.rmtree, self.storage_dir, ignore_errors=True)
+        # Storages built during the test (views create their own) must share the global key
+        os.makedirs(os.path.join(self.storage_dir, 'secure_data'))
+        with open(os.path.join(self.storage_dir, 'secure_data', '.encryption_key'), 'wb') as f:
+            f.write(secure_storage.encryption_key)
+        settings_override = override_settings(BASE_DIR=self.storage_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for instance, storage_class in GLOBAL_STORAGES:
+            self.addCleanup(vars(instance).update, _paths(instance))
+            vars(instance).update(_paths(storage_class()))
+        # Entries still buffered name files that are about to be deleted
+        self.addCleanup(storage_manifest.discard)
@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from accounts.models import UserActivity
+from utils.admin import EstimatedCountPaginator, estimated_count
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class EstimatedCountPaginatorTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='adminpager', email='adminpager@example.com', password='testpass123'
+        )
+        for i in range(3):
+            UserActivity.objects.create(user=self.user, activity_type='login', description=f'event {i}')
+
+    def test_sqlite_has_no_estimate(self):
+        self.assertIsNone(estimated_count(UserActivity))
+
+    def test_exact_count_without_estimate(self):
+        paginator = EstimatedCountPaginator(UserActivity.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    @override_settings(ADMIN_ESTIMATE_COUNT_THRESHOLD=1000)
+    def test_large_unfiltered_table_uses_estimate(self):
+        with mock.patch('utils.admin.estimated_count', return_value=5000000):
+            paginator = EstimatedCountPaginator(UserActivity.objects.order_by('pk'), 100)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5000000)
+            filtered = EstimatedCountPaginator(UserActivity.objects.filter(user=self.user).order_by('pk'), 100)
+            self.assertEqual(filtered.count, 3)
+
+    @override_settings(ADMIN_ESTIMATE_COUNT_THRESHOLD=1000)
+    def test_small_estimate_is_ignored(self):
+        with mock.patch('utils.admin.estimated_count', return_value=10):
+            self.assertEqual(EstimatedCountPaginator(UserActivity.objects.order_by('pk'), 100).count, 3)
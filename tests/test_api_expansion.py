@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import AIModel, Project
+from core.viewsets import parse_expand
+from utils.counters import usage_counters
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+# Keep the API-call counter flush out of the measured requests
+@override_settings(USAGE_COUNTER_FLUSH_INTERVAL=3600)
+class ExpansionTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        usage_counters.flush()
+        self.user = User.objects.create_user(
+            username='expander', email='expander@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_models(self, count, owners=3):
+        start = User.objects.count()
+        users = [
+            User.objects.create_user(
+                username=f'owner{start + i}', email=f'owner{start + i}@example.com', password='testpass123'
+            )
+            for i in range(owners)
+        ]
+        for i in range(count):
+            owner = users[i % owners]
+            model = AIModel.objects.create(
+                name=f'model-{AIModel.objects.count()}', model_type='nlp',
+                user=owner, is_public=True,
+            )
+            project, _ = Project.objects.get_or_create(user=owner, name=f'project-{owner.pk}')
+            project.ai_models.add(model)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_parse_expand(self):
+        self.assertEqual(parse_expand('user.profile, projects'), {'user': {'profile': {}}, 'projects': {}})
+        self.assertEqual(parse_expand('a.b.c.d.e'), {'a': {'b': {'c': {}}}})
+        self.assertEqual(parse_expand(''), {})
+
+    def test_default_renders_ids_only(self):
+        self.make_models(2)
+        data, _ = self.get('/api/v1/models/')
+        row = data['results'][0]
+        self.assertIsInstance(row['user'], int)
+        self.assertNotIn('projects', row)
+
+    def test_expansion_and_field_selection(self):
+        self.make_models(2)
+        mine = Project.objects.create(user=self.user, name='mine')
+        mine.ai_models.add(*AIModel.objects.all())
+        data, _ = self.get('/api/v1/models/?expand=user.profile,projects&fields=name,user,projects')
+        row = data['results'][0]
+        self.assertEqual(set(row), {'id', 'name', 'user', 'projects'})
+        self.assertIn('skills', row['user']['profile'])
+        self.assertEqual([p['name'] for p in row['projects']], ['mine'])
+        self.assertIsInstance(row['projects'][0]['user'], int)
+
+    def test_foreign_expansions_respect_privacy(self):
+        owner = User.objects.create_user(
+            username='private_owner', email='private_owner@example.com', password='testpass123',
+            is_profile_public=False,
+        )
+        model = AIModel.objects.create(name='shared', model_type='nlp', user=owner, is_public=True)
+        Project.objects.create(user=owner, name='secret plans').ai_models.add(model)
+
+        data, _ = self.get('/api/v1/models/?expand=user.profile,projects')
+        row = data['results'][0]
+        self.assertEqual(row['user'], {'id': owner.pk})
+        self.assertEqual(row['projects'], [])
+
+        # The owner still sees their own account and projects
+        self.client.force_authenticate(owner)
+        data, _ = self.get('/api/v1/models/?expand=user.profile,projects')
+        row = data['results'][0]
+        self.assertEqual(row['user']['username'], 'private_owner')
+        self.assertEqual([p['name'] for p in row['projects']], ['secret plans'])
+
+    def test_model_list_query_count_is_constant(self):
+        url = '/api/v1/models/?expand=user.profile,projects.user.profile'
+        self.make_models(3)
+        _, small = self.get(url)
+        self.make_models(17, owners=5)
+        data, large = self.get(url)
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(small, large)
+        # COUNT, models + users + profiles, projects + their users + profiles
+        self.assertLessEqual(large, 3)
+
+    def test_project_list_query_count_is_constant(self):
+        url = '/api/v1/projects/?expand=user,ai_models.user'
+        for i in range(2):
+            project = Project.objects.create(user=self.user, name=f'p{i}')
+            project.ai_models.add(AIModel.objects.create(name=f'm{i}', model_type='nlp', user=self.user))
+        _, small = self.get(url)
+        for i in range(2, 12):
+            project = Project.objects.create(user=self.user, name=f'p{i}')
+            for j in range(3):
+                project.ai_models.add(AIModel.objects.create(name=f'm{i}-{j}', model_type='nlp', user=self.user))
+        data, large = self.get(url)
+        self.assertEqual(data['count'], 12)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+
+    def test_projects_are_private(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        Project.objects.create(user=other, name='secret')
+        data, _ = self.get('/api/v1/projects/')
+        self.assertEqual(data['count'], 0)
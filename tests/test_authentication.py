@@ -1,11 +1,13 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from tests.storage import TempStorageMixin
 
 User = get_user_model()
 
-class AuthenticationTestCase(TestCase):
+class AuthenticationTestCase(TempStorageMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.user = User.objects.create_user(
             username='testuser',
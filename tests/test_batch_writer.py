@@ -0,0 +1,39 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from accounts.models import UserActivity
+from utils.batch_writer import BatchWriter
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+@override_settings(BATCH_WRITER_ASYNC=False, BATCH_WRITER_BATCH_SIZE=3)
+class BatchWriterTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='batchuser', email='batch@example.com', password='testpass123'
+        )
+
+    def activity(self, i):
+        return UserActivity(user=self.user, activity_type='login', description=f'Login {i}')
+
+    def test_flush_writes_queued_rows_in_batches(self):
+        writer = BatchWriter('test')
+        for i in range(7):
+            self.assertTrue(writer.submit(self.activity(i)))
+        self.assertEqual(UserActivity.objects.count(), 0)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(writer.flush(), 7)
+        self.assertEqual(UserActivity.objects.count(), 7)
+        self.assertEqual(writer.pending(), 0)
+
+    @override_settings(BATCH_WRITER_MAX_QUEUE=2)
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = BatchWriter('test_full')
+        results = [writer.submit(self.activity(i)) for i in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(writer.flush(), 2)
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from accounts.brute_force import BruteForceDetector, detector, subnet_of
+from tests.test_login import CountingHasher
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+LIMITS = {
+    'WINDOW': 300,
+    'IP_LIMIT': 4,
+    'USERNAME_LIMIT': 3,
+    'SUBNET_LIMIT': 6,
+    'LOCKOUT': 60,
+    'USERNAME_SLOWDOWN': 5,
+    'USERNAME_DELAY': 2,
+    'BACKEND': 'local',
+}
+
+
+@override_settings(BRUTE_FORCE=LIMITS)
+class BruteForceDetectorTestCase(TestCase):
+    def setUp(self):
+        self.detector = BruteForceDetector()
+        emit = mock.patch.object(BruteForceDetector, '_emit')
+        self.emit = emit.start()
+        self.addCleanup(emit.stop)
+
+    def fail(self, ip, username, times=1):
+        for _ in range(times):
+            self.detector.record_failure(ip, username)
+
+    def test_subnet_of(self):
+        self.assertEqual(subnet_of('10.1.2.3'), '10.1.2.0/24')
+        self.assertEqual(subnet_of('2001:db8::1'), '2001:db8::/64')
+        self.assertIsNone(subnet_of('not-an-ip'))
+
+    def test_username_locked_for_the_failing_ip_only(self):
+        self.fail('10.0.0.1', 'victim', 2)
+        self.assertEqual(self.detector.check('10.0.0.1', 'victim'), 0)
+        self.fail('10.0.0.1', 'Victim')
+        self.assertGreater(self.detector.check('10.0.0.1', 'victim'), 0)
+        self.assertEqual(self.detector.check('10.0.0.1', 'someone'), 0)
+        # The owner logging in from elsewhere is not locked out
+        self.assertEqual(self.detector.check('10.9.0.1', 'victim'), 0)
+        self.emit.assert_called_once()
+
+    def test_failures_from_many_ips_only_slow_those_ips_down(self):
+        for i in range(10):
+            self.fail(f'10.{i}.0.1', 'victim')
+        wait = self.detector.check('10.9.0.1', 'victim')
+        self.assertTrue(0 < wait <= LIMITS['USERNAME_DELAY'])
+        with mock.patch('accounts.brute_force.time.time', return_value=10 ** 10):
+            self.assertEqual(self.detector.check('10.9.0.1', 'victim'), 0)
+        # An address that has not failed the username is not held back
+        self.assertEqual(self.detector.check('10.99.0.1', 'victim'), 0)
+        # Reported once, not on every failure that re-arms the delay
+        self.assertEqual(self.emit.call_count, 1)
+
+    def test_ip_locked_across_usernames(self):
+        for name in ('a', 'b', 'c', 'd'):
+            self.fail('10.0.0.1', name)
+        self.assertGreater(self.detector.check('10.0.0.1', 'e'), 0)
+        self.assertEqual(self.detector.check('10.0.0.2', 'e'), 0)
+
+    def test_subnet_locked(self):
+        for i in range(6):
+            self.fail(f'10.0.0.{i}', f'user{i}')
+        self.assertGreater(self.detector.check('10.0.0.200', 'fresh'), 0)
+        self.assertEqual(self.detector.check('10.0.1.200', 'fresh'), 0)
+
+    def test_success_clears_username(self):
+        self.fail('10.0.0.1', 'victim', 2)
+        self.detector.record_success('10.0.0.1', 'victim')
+        # Three in a row would lock the username for this IP
+        self.fail('10.0.0.1', 'victim')
+        self.assertEqual(self.detector.check('10.0.0.1', 'victim'), 0)
+
+    def test_one_event_per_lockout(self):
+        self.fail('10.0.0.1', 'victim', 10)
+        # The username from 10.0.0.1, the IP, the username slowdown and the subnet
+        self.assertEqual(self.emit.call_count, 4)
+
+    def test_lock_expires(self):
+        self.fail('10.0.0.1', 'victim', 3)
+        self.assertGreater(self.detector.check('10.0.0.1', 'victim'), 0)
+        with mock.patch('accounts.brute_force.time.time', return_value=10 ** 10):
+            self.assertEqual(self.detector.check('10.0.0.1', 'victim'), 0)
+
+    @override_settings(BRUTE_FORCE={**LIMITS, 'BACKEND': 'cache'},
+                       CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                           'LOCATION': 'brute-force-tests'}})
+    def test_cache_backend_shared_between_detectors(self):
+        self.fail('10.0.0.1', 'victim', 3)
+        self.assertGreater(BruteForceDetector().check('10.0.0.1', 'victim'), 0)
+
+
+@override_settings(BRUTE_FORCE=LIMITS, PASSWORD_HASHERS=['tests.test_login.CountingHasher'])
+class BruteForceLoginTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='target', email='target@example.com', password='testpass123'
+        )
+        self.request = RequestFactory().post('/login/', REMOTE_ADDR='192.0.2.10')
+        detector.reset()
+        self.addCleanup(detector.reset)
+        emit = mock.patch.object(BruteForceDetector, '_emit')
+        emit.start()
+        self.addCleanup(emit.stop)
+
+    def test_locked_login_is_rejected_without_hashing_or_queries(self):
+        for _ in range(3):
+            self.assertIsNone(authenticate(self.request, username='target', password='wrong'))
+        CountingHasher.verify_calls = 0
+        with self.assertNumQueries(0):
+            user = authenticate(self.request, username='target', password='testpass123')
+        self.assertIsNone(user)
+        self.assertEqual(CountingHasher.verify_calls, 0)
+
+    def test_unknown_usernames_count_against_ip(self):
+        for i in range(4):
+            authenticate(self.request, username=f'ghost{i}', password='wrong')
+        self.assertIsNone(authenticate(self.request, username='target', password='testpass123'))
+        other = RequestFactory().post('/login/', REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(authenticate(other, username='target', password='testpass123'), self.user)
+
+    def test_owner_logs_in_from_a_fresh_ip_while_the_username_is_slowed(self):
+        for i in range(6):
+            attacker = RequestFactory().post('/login/', REMOTE_ADDR=f'203.0.{i}.1')
+            self.assertIsNone(authenticate(attacker, username='target', password='wrong'))
+        self.assertGreater(detector.check('203.0.5.1', 'target'), 0)
+        self.assertEqual(authenticate(self.request, username='target', password='testpass123'), self.user)
+
+    def test_success_resets_username_failures(self):
+        for _ in range(2):
+            authenticate(self.request, username='target', password='wrong')
+        self.assertEqual(authenticate(self.request, username='target', password='testpass123'), self.user)
+        other = RequestFactory().post('/login/', REMOTE_ADDR='198.51.100.7')
+        for _ in range(2):
+            authenticate(other, username='target', password='wrong')
+        self.assertEqual(authenticate(other, username='target', password='testpass123'), self.user)
+
+    def test_forwarded_for_is_not_trusted_without_proxies(self):
+        for i in range(4):
+            spoofed = RequestFactory().post('/login/', REMOTE_ADDR='192.0.2.10', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+            authenticate(spoofed, username=f'ghost{i}', password='wrong')
+        self.assertIsNone(authenticate(self.request, username='target', password='testpass123'))
+        # Nor can a forged header lock out the address it names
+        self.assertGreater(detector.check('192.0.2.10', None), 0)
+        self.assertEqual(detector.check('203.0.113.0', None), 0)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_address_added_by_trusted_proxy_is_used(self):
+        for i in range(4):
+            request = RequestFactory().post(
+                '/login/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}, 198.51.100.7'
+            )
+            authenticate(request, username=f'ghost{i}', password='wrong')
+        self.assertGreater(detector.check('198.51.100.7', None), 0)
+        self.assertEqual(detector.check('10.0.0.2', None), 0)
+        self.assertEqual(authenticate(self.request, username='target', password='testpass123'), self.user)
@@ -0,0 +1,86 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from accounts.models import UserProfile
+from core.models import UserConnection
+from utils.secure_json_storage import SecureJSONStorage
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+@override_settings(RATE_LIMIT_ENABLED=False, REST_FRAMEWORK={
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+})
+class UserConnectionTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ('alice', 'bob', 'carol')
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_request_is_idempotent(self):
+        first = self.client.post('/api/connections/send/', {'to_user_id': self.bob.id})
+        second = self.client.post('/api/connections/send/', {'to_user_id': self.bob.id})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(UserConnection.objects.count(), 1)
+
+    def test_reverse_request_accepts(self):
+        UserConnection.objects.request(self.bob, self.alice)
+        connection, created = UserConnection.objects.request(self.alice, self.bob)
+        self.assertFalse(created)
+        self.assertEqual(connection.status, 'accepted')
+        self.assertTrue(UserConnection.objects.are_connected(self.bob, self.alice))
+        self.assertEqual(UserProfile.objects.get(user=self.alice).connections_count, 1)
+
+    def test_concurrent_accepts_count_once(self):
+        connection, _ = UserConnection.objects.request(self.bob, self.alice)
+        stale = UserConnection.objects.get(pk=connection.pk)
+        connection.accept()
+        stale.accept()
+        self.assertEqual(stale.status, 'accepted')
+        self.assertEqual(UserProfile.objects.get(user=self.alice).connections_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=self.bob).connections_count, 1)
+
+    def test_list_by_status_and_respond(self):
+        connection, _ = UserConnection.objects.request(self.bob, self.alice)
+        response = self.client.get('/api/connections/', {'status': 'pending', 'direction': 'incoming'})
+        self.assertEqual([c['connected_user_id'] for c in response.json()['connections']], [self.bob.id])
+
+        response = self.client.post(f'/api/connections/{connection.id}/respond/', {'action': 'accept'})
+        self.assertEqual(response.json()['connection']['status'], 'accepted')
+        self.assertEqual(self.client.get('/api/connections/', {'status': 'pending'}).json()['connections'], [])
+
+    def test_mutual_count(self):
+        for a, b in ((self.alice, self.carol), (self.bob, self.carol)):
+            UserConnection.objects.request(a, b)[0].accept()
+        response = self.client.get(f'/api/connections/status/{self.bob.id}/')
+        self.assertEqual(response.json(), {'connected': False, 'connection': None, 'mutual_connections': 1})
+
+    def test_migrate_json_connections(self):
+        storage = SecureJSONStorage()
+        record = {'from_user_id': self.alice.id, 'to_user_id': self.bob.id, 'status': 'pending', 'message': 'hi'}
+        stored = {
+            self.alice: [record],
+            self.bob: [record],
+            self.carol: [{'connected_user_id': self.alice.id, 'status': 'accepted'}],
+        }
+        for user, connections in stored.items():
+            path = storage._get_file_path('users', user.id)
+            storage._write_secure_file(path, {'user_id': user.id, 'connections': connections})
+
+        call_command('migrate_json_connections', '--prune', stdout=open('/dev/null', 'w'))
+        call_command('migrate_json_connections', stdout=open('/dev/null', 'w'))
+
+        self.assertEqual(UserConnection.objects.count(), 2)
+        self.assertTrue(UserConnection.objects.are_connected(self.alice, self.carol))
+        self.assertEqual(UserProfile.objects.get(user=self.alice).connections_count, 1)
+        self.assertNotIn('connections', storage._read_secure_file(storage._get_file_path('users', self.bob.id)))
+        self.assertEqual(len(storage.get_user_connections(self.alice.id)), 2)
@@ -1,8 +1,9 @@
 from django.test import TestCase
 from accounts.forms import SignUpForm, ProfileForm
 from accounts.models import CustomUser
+from tests.storage import TempStorageMixin
 
-class FormsTestCase(TestCase):
+class FormsTestCase(TempStorageMixin, TestCase):
     def test_signup_form_valid(self):
         form_data = {
             'username': 'newuser',
@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from accounts.id_allocator import BlockIdAllocator, highest_number
+from accounts.models import IdSequence
+
+
+class BlockIdAllocatorTestCase(TestCase):
+    def test_reserve_returns_consecutive_ids(self):
+        allocator = BlockIdAllocator('test_reserve')
+        self.assertEqual(allocator.reserve(3), ['USR000001', 'USR000002', 'USR000003'])
+        self.assertEqual(allocator.reserve(2), ['USR000004', 'USR000005'])
+
+    def test_reserve_numbers_are_never_reused(self):
+        allocator = BlockIdAllocator('test_numbers', block_size=1, seed=lambda: 3)
+        self.assertEqual(allocator.reserve_numbers(1), range(4, 5))
+        self.assertEqual(allocator.reserve_numbers(2), range(5, 7))
+        # The seed only applies while the sequence does not exist yet
+        self.assertEqual(BlockIdAllocator('test_numbers', seed=lambda: 0).reserve_numbers(1), range(7, 8))
+
+    def test_next_id_uses_one_query_per_block(self):
+        allocator = BlockIdAllocator('test_block', block_size=10)
+        allocator.next_id()
+        with self.assertNumQueries(0):
+            ids = [allocator.next_id() for _ in range(9)]
+        self.assertEqual(ids[-1], 'USR000010')
+
+    def test_allocators_sharing_a_sequence_never_collide(self):
+        first = BlockIdAllocator('test_shared', block_size=5)
+        second = BlockIdAllocator('test_shared', block_size=5)
+        ids = [first.next_id(), second.next_id(), first.next_id(), *second.reserve(3)]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_seed_continues_existing_numbering(self):
+        allocator = BlockIdAllocator('test_seed', seed=lambda: 41)
+        self.assertEqual(allocator.next_id(), 'USR000042')
+        self.assertEqual(IdSequence.objects.get(name='test_seed').next_value, 42 + allocator.block_size)
+
+    def test_highest_number(self):
+        IdSequence.objects.create(name='USR000007')
+        IdSequence.objects.create(name='USR000012')
+        IdSequence.objects.create(name='other')
+        self.assertEqual(highest_number(IdSequence.objects.all(), 'name', 'USR'), 12)
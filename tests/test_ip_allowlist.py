@@ -0,0 +1,68 @@
+import ipaddress
+
+from django.test import SimpleTestCase
+
+from utils.ip_allowlist import AllowlistCache, IpAllowlist
+
+
+class IpAllowlistTestCase(SimpleTestCase):
+    def test_empty_allows_everything(self):
+        allowlist = IpAllowlist([])
+        self.assertIn('203.0.113.9', allowlist)
+        self.assertIn('2001:db8::1', allowlist)
+
+    def test_cidr_range_and_single_address(self):
+        allowlist = IpAllowlist(['10.0.0.0/8', '192.168.1.10-192.168.1.20', '203.0.113.5'])
+        self.assertIn('10.255.255.255', allowlist)
+        self.assertIn('192.168.1.10', allowlist)
+        self.assertIn('192.168.1.20', allowlist)
+        self.assertIn('203.0.113.5', allowlist)
+        self.assertNotIn('192.168.1.21', allowlist)
+        self.assertNotIn('11.0.0.0', allowlist)
+        self.assertNotIn('203.0.113.6', allowlist)
+
+    def test_ipv6_and_mapped_ipv4(self):
+        allowlist = IpAllowlist(['2001:db8::/32', '10.0.0.0/24'])
+        self.assertIn('2001:db8:ffff::1', allowlist)
+        self.assertNotIn('2001:db9::1', allowlist)
+        self.assertIn('::ffff:10.0.0.7', allowlist)
+        # Same integer value in the other family must not match
+        same_int = ipaddress.IPv6Address(int(ipaddress.IPv4Address('10.0.0.7')))
+        self.assertNotIn(str(same_int), allowlist)
+
+    def test_overlapping_ranges_are_merged(self):
+        allowlist = IpAllowlist(['10.0.0.0/24', '10.0.0.128-10.0.1.10', '10.0.1.11'])
+        self.assertEqual(len(allowlist), 1)
+        self.assertIn('10.0.1.11', allowlist)
+
+    def test_invalid_entries_and_addresses(self):
+        allowlist = IpAllowlist(['not-an-ip'])
+        self.assertEqual(allowlist.invalid, ['not-an-ip'])
+        self.assertNotIn('10.0.0.1', allowlist)
+        self.assertNotIn('garbage', IpAllowlist(['10.0.0.0/8']))
+        self.assertNotIn(None, IpAllowlist(['10.0.0.0/8']))
+
+    def test_contains_many(self):
+        allowlist = IpAllowlist(['10.0.0.0/8'])
+        self.assertEqual(allowlist.contains_many(['10.1.1.1', '8.8.8.8']), [True, False])
+
+
+class AllowlistCacheTestCase(SimpleTestCase):
+    def test_recompiles_on_new_version(self):
+        cache = AllowlistCache()
+        calls = []
+
+        def entries(value):
+            def build():
+                calls.append(value)
+                return [value]
+            return build
+
+        first = cache.get('acct', 1, entries('10.0.0.0/8'))
+        self.assertIs(cache.get('acct', 1, entries('unused')), first)
+        second = cache.get('acct', 2, entries('192.168.0.0/16'))
+        self.assertIn('192.168.1.1', second)
+        self.assertNotIn('10.1.1.1', second)
+        cache.invalidate('acct')
+        cache.get('acct', 2, entries('172.16.0.0/12'))
+        self.assertEqual(calls, ['10.0.0.0/8', '192.168.0.0/16', '172.16.0.0/12'])
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+import utils.middleware  # noqa: F401 - registers the post_save sync receivers
+from utils.json_storage import json_storage, user_sync
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class UserJSONSyncTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='syncuser',
+            email='sync@example.com',
+            password='testpass123'
+        )
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def test_unmirrored_update_fields_skip_write(self):
+        with mock.patch.object(json_storage, 'save_user_data') as save:
+            self.user.set_password('anotherpass123')
+            self.user.save(update_fields=['password'])
+        save.assert_not_called()
+
+    def test_unchanged_full_save_skips_write(self):
+        with mock.patch.object(json_storage, 'save_user_data') as save:
+            self.user.save()
+        save.assert_not_called()
+
+    def test_mirrored_change_writes(self):
+        with mock.patch.object(json_storage, 'save_user_data') as save:
+            self.user.bio = 'Changed bio'
+            self.user.save()
+            self.user.save()
+        self.assertEqual(save.call_count, 1)
+
+    def test_saves_within_scope_are_coalesced(self):
+        with mock.patch.object(json_storage, 'save_user_data') as save:
+            user_sync.begin()
+            for i in range(5):
+                self.user.api_calls_used += 1
+                self.user.save(update_fields=['api_calls_used'])
+            save.assert_not_called()
+            user_sync.end()
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(save.call_args[0][0].api_calls_used, 5)
+
+    @override_settings(USER_JSON_SYNC_DEBOUNCE_SECONDS=60)
+    def test_debounce_window_holds_back_repeated_writes(self):
+        with mock.patch.object(json_storage, 'save_user_data') as save:
+            self.user.bio = 'First'
+            self.user.save()
+            self.user.bio = 'Second'
+            self.user.save()
+            self.assertEqual(save.call_count, 1)
+            user_sync.flush_delayed()
+        self.assertEqual(save.call_count, 2)
+        self.assertEqual(save.call_args[0][0].bio, 'Second')
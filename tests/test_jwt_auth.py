@@ -0,0 +1,75 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import CachedJWTAuthentication, user_cache
+from accounts.jwt_auth import CustomTokenObtainPairSerializer
+from accounts.models import TokenUser, UserActivity
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user(
+            username='jwtuser', email='jwt@example.com', password='testpass123', bio='Hello'
+        )
+        self.auth = CachedJWTAuthentication()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/api/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.auth.authenticate(request)[0]
+
+    def claims_token(self):
+        return CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def test_claims_principal_needs_no_query(self):
+        with self.assertNumQueries(0):
+            principal = self.authenticate(self.claims_token())
+        self.assertIsInstance(principal, TokenUser)
+        self.assertEqual((principal.id, principal.email), (self.user.id, 'jwt@example.com'))
+
+        # Other columns load together, once
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.username, 'jwtuser')
+            self.assertEqual(principal.bio, 'Hello')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(self.claims_token()).bio, 'Hello')
+
+    def test_principal_works_as_foreign_key(self):
+        principal = self.authenticate(self.claims_token())
+        UserActivity.objects.create(user=principal, activity_type='login', description='x')
+        self.assertEqual(self.user.activities.count(), 1)
+
+    def test_token_without_claims_is_cached(self):
+        token = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(token), self.user)
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+    def test_save_invalidates_cached_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.authenticate(token)
+        self.user.bio = 'Changed'
+        self.user.save()
+        self.assertEqual(self.authenticate(token).bio, 'Changed')
+
+    def test_deactivated_user_rejected(self):
+        token = self.claims_token()
+        self.authenticate(token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.authenticate(token).pk, self.user.pk)
@@ -0,0 +1,126 @@
+import json
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from core.management.commands.load_test import Command
+from core.models import StorageManifestEntry
+from utils.load_test import (
+    Histogram, Response, SimulatedUser, Stats, WSGISession, parse_mix, parse_stages, run, start_offsets,
+)
+from utils.json_storage import json_storage
+from utils.storage_manifest import storage_manifest
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class ScheduleTestCase(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('read_tasks=3, dashboard'), {'read_tasks': 3, 'dashboard': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('drop_tables=1')
+        with self.assertRaises(ValueError):
+            parse_mix('read_tasks=0')
+
+    def test_stages_ramp_users_evenly(self):
+        self.assertEqual(start_offsets(parse_stages('4:8,6:2')), [0.0, 2.0, 4.0, 6.0, 8.0, 9.0])
+        # A stage that lowers the target starts nobody
+        self.assertEqual(start_offsets([(2, 0), (1, 5)]), [0.0, 0.0])
+
+    def test_histogram_and_report(self):
+        histogram = Histogram()
+        for ms in (0.5, 3, 3, 7000):
+            histogram.add(ms)
+        self.assertEqual(histogram.as_dict(), {'<=1ms': 1, '<=5ms': 2, '>5000ms': 1})
+
+        stats = Stats()
+        stats.record('read_tasks', 4.0, 200, False)
+        stats.record('read_tasks', 6.0, 500, True)
+        report = stats.report(2.0)
+        self.assertEqual(report['requests'], 2)
+        self.assertEqual(report['rps'], 1.0)
+        self.assertEqual(report['operations']['read_tasks']['error_rate'], 0.5)
+        self.assertEqual(report['operations']['read_tasks']['statuses'], {'200': 1, '500': 1})
+
+
+class SimulatedUserTestCase(TempStorageMixin, TestCase):
+    def test_mix_against_wsgi_app(self):
+        user = User.objects.create_user(
+            username='loaduser', email='load@example.com', password='testpass123',
+            subscription_plan='enterprise',
+        )
+        stats = Stats()
+        simulated = SimulatedUser(WSGISession(user), stats, parse_mix('create_task=1'), random.Random(0))
+        self.assertTrue(simulated.setup())
+        for _ in range(3):
+            simulated.create_task()
+        simulated.read_tasks()
+        self.assertEqual(len(simulated.task_ids), 3)
+        simulated.update_task()
+        simulated.delete_task()
+        simulated.dashboard()
+
+        report = stats.report(1.0)
+        self.assertEqual(report['errors'], 0, report)
+        self.assertEqual(set(report['operations']), {
+            'create_board', 'create_task', 'read_tasks', 'update_task', 'delete_task', 'dashboard',
+        })
+
+
+class FakeSession:
+    """Creates a board, then fails every task read"""
+
+    def __init__(self):
+        self.closed = False
+
+    def request(self, method, path, data=None):
+        if method == 'POST':
+            return Response(200, b'{"board_id": "b1"}')
+        raise ConnectionResetError('peer went away')
+
+    def close(self):
+        self.closed = True
+
+
+class RunTestCase(SimpleTestCase):
+    def test_errors_are_charged_to_their_operation(self):
+        sessions = []
+
+        def session_factory(index):
+            if index == 1:
+                raise RuntimeError('bad password')
+            sessions.append(FakeSession())
+            return sessions[-1]
+
+        report = run(session_factory, 2, [(2, 0)], 0.05, {'read_tasks': 1})
+        operations = report['operations']
+        self.assertEqual(operations['login']['exceptions'], {'RuntimeError: bad password': 1})
+        self.assertEqual(operations['create_board']['errors'], 0)
+        self.assertEqual(operations['read_tasks']['errors'], operations['read_tasks']['requests'])
+        self.assertEqual(set(operations['read_tasks']['exceptions']), {'ConnectionResetError: peer went away'})
+        self.assertTrue(sessions[0].closed)
+
+
+# No buffered counter or manifest flush from a worker thread: SQLite would lock
+@override_settings(USAGE_COUNTER_FLUSH_INTERVAL=3600, STORAGE_MANIFEST_FLUSH_INTERVAL=3600)
+class LoadTestCommandTestCase(TempStorageMixin, TransactionTestCase):
+    def test_run_and_cleanup(self):
+        out = StringIO()
+        call_command('load_test', users=2, ramp_up=0.2, duration=0.5, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['users'], 2)
+        self.assertEqual(report['target'], 'wsgi')
+        self.assertGreater(report['requests'], 0)
+        self.assertEqual(report['errors'], 0, report)
+        self.assertFalse(User.objects.filter(username__startswith='loadtest_').exists())
+
+    def test_cleanup_drops_manifest_rows(self):
+        user = User.objects.create(username='loadtest_0', email='loadtest_0@example.com')
+        json_storage.save_task_data(user.id, {'title': 'One'})
+        storage_manifest.flush()
+        Command()._delete_users([user])
+        self.assertFalse(StorageManifestEntry.objects.filter(storage='data', owner_key=str(user.id)).exists())
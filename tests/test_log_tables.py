@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.db import connection, models
+from django.test import TransactionTestCase
+from django.test.utils import isolate_apps
+from django.utils import timezone
+
+from utils.log_tables import archive_rows, prune_rows
+
+
+class LogTablesTestCase(TransactionTestCase):
+    """Runs against stand-in hot/archive tables shaped like the security log ones"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.isolation = isolate_apps('tests')
+        cls.isolation.enable()
+
+        class Event(models.Model):
+            event_type = models.CharField(max_length=50)
+            severity = models.IntegerField()
+            event_datetime = models.DateTimeField()
+
+            class Meta:
+                app_label = 'tests'
+
+        class EventArchive(models.Model):
+            id = models.IntegerField(primary_key=True)
+            event_type = models.CharField(max_length=50)
+            severity = models.IntegerField()
+            event_datetime = models.DateTimeField()
+
+            class Meta:
+                app_label = 'tests'
+
+        cls.Event, cls.EventArchive = Event, EventArchive
+        with connection.schema_editor() as editor:
+            editor.create_model(Event)
+            editor.create_model(EventArchive)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(cls.Event)
+            editor.delete_model(cls.EventArchive)
+        cls.isolation.disable()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.Event.objects.all().delete()
+        self.EventArchive.objects.all().delete()
+
+    def event(self, days_old, event_type='LOGIN_FAILED', severity=1):
+        return self.Event.objects.create(
+            event_type=event_type, severity=severity, event_datetime=timezone.now() - timedelta(days=days_old)
+        )
+
+    def test_archive_moves_old_rows_in_batches(self):
+        old = [self.event(40 + i) for i in range(5)]
+        recent = self.event(1)
+        # Left in the archive by a run that stopped between its insert and delete
+        self.EventArchive.objects.create(
+            id=old[0].id, event_type=old[0].event_type, severity=old[0].severity, event_datetime=old[0].event_datetime
+        )
+        self.assertEqual(archive_rows(self.Event, self.EventArchive, 'event_datetime', 30, batch_size=2), 5)
+        self.assertEqual(list(self.Event.objects.values_list('id', flat=True)), [recent.id])
+        archived = self.EventArchive.objects.order_by('id')
+        self.assertEqual([row.id for row in archived], [row.id for row in old])
+        self.assertEqual(archived.get(id=old[3].id).event_datetime, old[3].event_datetime)
+
+    def test_prune_applies_overrides_to_both_tables(self):
+        rules = {'default': 100, 'severity': {3: 300}, 'event_type': {'LOGIN_SUCCESS': 10}}
+        kept = [
+            self.event(50),
+            self.event(200, severity=3),
+            self.event(5, 'LOGIN_SUCCESS', severity=3),
+        ]
+        for days_old, event_type, severity in ((150, 'LOGIN_FAILED', 1), (400, 'LOGIN_FAILED', 3),
+                                               (20, 'LOGIN_SUCCESS', 3)):
+            self.event(days_old, event_type, severity)
+        archived = self.event(150)
+        archive_rows(self.Event, self.EventArchive, 'event_datetime', 120)
+
+        removed = prune_rows((self.Event, self.EventArchive), 'event_datetime', rules, batch_size=1)
+        self.assertEqual(removed, 4)
+        survivors = set(self.Event.objects.values_list('id', flat=True))
+        survivors |= set(self.EventArchive.objects.values_list('id', flat=True))
+        self.assertEqual(survivors, {row.id for row in kept})
+        self.assertNotIn(archived.id, survivors)
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.brute_force import detector
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class CountingHasher(MD5PasswordHasher):
+    verify_calls = 0
+
+    def verify(self, password, encoded):
+        CountingHasher.verify_calls += 1
+        return super().verify(password, encoded)
+
+
+@override_settings(PASSWORD_HASHERS=['tests.test_login.CountingHasher'])
+class LoginResolutionTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='loginuser',
+            email='login@example.com',
+            password='testpass123'
+        )
+        CountingHasher.verify_calls = 0
+        detector.reset()
+
+    def assertAttempt(self, identifier, password, expected):
+        with self.assertNumQueries(1):
+            user = authenticate(username=identifier, password=password)
+        self.assertEqual(user, expected)
+        self.assertEqual(CountingHasher.verify_calls, 1)
+
+    def test_email_login(self):
+        self.assertAttempt('login@example.com', 'testpass123', self.user)
+
+    def test_username_login(self):
+        self.assertAttempt('loginuser', 'testpass123', self.user)
+
+    def test_wrong_password_hashes_once(self):
+        self.assertAttempt('loginuser', 'wrongpass', None)
+
+    def test_unknown_user_still_hashes(self):
+        self.assertAttempt('nobody@example.com', 'testpass123', None)
+
+    def test_email_match_wins_over_username(self):
+        other = User.objects.create_user(
+            username='login@example.com', email='other@example.com', password='otherpass123'
+        )
+        self.assertEqual(authenticate(username='login@example.com', password='testpass123'), self.user)
+        self.assertIsNone(authenticate(username='login@example.com', password='otherpass123'))
+        self.assertEqual(authenticate(username='other@example.com', password='otherpass123'), other)
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate(username='loginuser', password='testpass123'))
+
+    def test_bench_login_command(self):
+        out = StringIO()
+        call_command('bench_login', iterations=1, stdout=out)
+        self.assertIn('1.0 queries/login', out.getvalue())
+        self.assertFalse(User.objects.filter(username='bench_login_user').exists())
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from utils.board_storage import board_storage
+from utils.maintenance import Checkpoint, UserJob, UserJobRunner
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class CountingJob(UserJob):
+    name = 'counting'
+    user_fields = ('id', 'username')
+
+    def process(self, user):
+        if user.username == 'broken':
+            raise ValueError('bad data')
+        self.log(f'saw {user.username}')
+        return {'seen': 1}
+
+
+class PlainUser:
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class PlainJob(UserJob):
+    """Needs no database in the worker: spawned workers use the real database, not the test one"""
+
+    name = 'plain'
+
+    def load(self, ids):
+        return [PlainUser(pk) for pk in ids]
+
+    def process(self, user):
+        return {'seen': 1, 'sum': user.pk}
+
+
+class UserJobRunnerTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create(username=f'maint_{i}', email=f'maint_{i}@example.com') for i in range(5)]
+        self.tmp = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmp, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_inline_run_counts_and_messages(self):
+        User.objects.create(username='broken', email='broken@example.com')
+        messages, progress = [], []
+        counters = UserJobRunner(CountingJob(), chunk_size=2, on_message=messages.append,
+                                 on_progress=progress.append).run()
+        self.assertEqual(counters['seen'], 5)
+        self.assertEqual(counters['users'], 5)
+        self.assertEqual(counters['errors'], 1)
+        self.assertIn('saw maint_0', messages)
+        self.assertTrue(any('bad data' in m for m in messages))
+        self.assertIn('counting: 6/6 users', progress[-1])
+
+    def test_resumes_after_checkpoint(self):
+        job = CountingJob()
+        checkpoint = Checkpoint(self.checkpoint, job)
+        checkpoint.last_id = self.users[2].pk
+        checkpoint.counters.update({'seen': 3, 'users': 3})
+        checkpoint.save()
+
+        messages = []
+        counters = UserJobRunner(job, checkpoint=self.checkpoint, on_message=messages.append,
+                                 on_progress=lambda line: None).run()
+        self.assertEqual(counters['seen'], 5)
+        self.assertEqual(messages, ['saw maint_3', 'saw maint_4'])
+        # A finished run leaves nothing to resume
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_of_another_job_is_rejected(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'job': 'counting', 'dry_run': True, 'last_id': 1}, f)
+        runner = UserJobRunner(CountingJob(), checkpoint=self.checkpoint)
+        with self.assertRaises(ValueError):
+            runner.run()
+
+    def test_process_pool(self):
+        counters = UserJobRunner(PlainJob(), workers=2, chunk_size=2, on_progress=lambda line: None).run()
+        self.assertEqual(counters['seen'], User.objects.count())
+        self.assertEqual(counters['sum'], sum(User.objects.values_list('pk', flat=True)))
+
+
+class MaintenanceCommandTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='maint_owner', email='maint_owner@example.com')
+        self.path = board_storage._get_file_path('boards', self.user.id)
+        board_storage._write_secure_file(self.path, {'boards': [
+            {'id': 'b1', 'name': 'Mine', 'owner_id': self.user.id},
+            {'id': 'b2', 'name': 'Foreign', 'owner_id': self.user.id + 1000},
+        ]})
+
+    def test_fix_board_isolation_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command('fix_board_isolation', '--dry-run', stdout=out)
+        self.assertIn('1 boards', out.getvalue())
+        self.assertEqual(len(board_storage._read_secure_file(self.path)['boards']), 2)
+
+    def test_fix_board_isolation(self):
+        call_command('fix_board_isolation', stdout=StringIO())
+        boards = board_storage._read_secure_file(self.path)['boards']
+        self.assertEqual([b['id'] for b in boards], ['b1'])
+
+    def test_init_boards_skips_users_with_boards(self):
+        other = User.objects.create(username='maint_empty', email='maint_empty@example.com')
+        out = StringIO()
+        call_command('init_boards', stdout=out)
+        self.assertIn('Created 1 default boards; 1 users already have boards', out.getvalue())
+        self.assertEqual(len(board_storage.get_user_boards(other.id)), 1)
+
+    def test_setup_data_sync_users_runs_as_job(self):
+        out = StringIO()
+        call_command('setup_data', '--sync-users', '--dry-run', '--chunk-size', '1', stdout=out)
+        self.assertIn('Would sync 1 users (0 failed)', out.getvalue())
+        self.assertIn('sync_users: 1/1 users', out.getvalue())
+
+    def test_setup_data_warns_about_runner_options_without_job(self):
+        out = StringIO()
+        call_command('setup_data', '--stats', '--dry-run', '--workers', '4', stdout=out)
+        self.assertIn('only apply to --sync-users', out.getvalue())
+
+    def test_setup_data_full_backfills_the_manifest(self):
+        out = StringIO()
+        call_command('setup_data', '--full', '--stats', stdout=out)
+        self.assertIn('Storage manifest holds 2 files', out.getvalue())
@@ -2,11 +2,13 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from accounts.models import CustomUser
+from tests.storage import TempStorageMixin
 
 User = get_user_model()
 
-class CustomUserModelTest(TestCase):
+class CustomUserModelTest(TempStorageMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
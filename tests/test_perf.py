@@ -0,0 +1,69 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from utils.perf import PerformanceMiddleware, RequestMetrics, server_timing, span
+from utils.secure_json_storage import secure_storage
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+def view(request):
+    list(User.objects.all())
+    secure_storage.save_user_data(request.user)
+    secure_storage.get_user_data(request.user.id)
+    return HttpResponse('ok')
+
+
+class PerformanceMiddlewareTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='perfuser', email='perf@example.com', password='testpass123'
+        )
+        self.request = RequestFactory().get('/dashboard/')
+        self.request.user = self.user
+
+    def test_span_is_noop_outside_requests(self):
+        with span('storage.read') as timing:
+            timing.nbytes = 10
+        self.assertIsNone(getattr(timing, 'metrics', None))
+
+    @override_settings(PERF_INSTRUMENTATION=False)
+    def test_disabled_adds_nothing(self):
+        response = PerformanceMiddleware(view)(self.request)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        response = PerformanceMiddleware(view)(self.request)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=1.0)
+    def test_header_and_log_line(self):
+        with self.assertLogs('perf', 'INFO') as logs:
+            response = PerformanceMiddleware(view)(self.request)
+        header = response['Server-Timing']
+        for metric in ('db;', 'storage-write;', 'storage-read;', 'encrypt;', 'decrypt;',
+                       'json-serialize;', 'json-parse;', 'total;'):
+            self.assertIn(metric, header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/dashboard/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreaterEqual(record['spans']['db']['count'], 1)
+        self.assertEqual(record['spans']['storage.read']['count'], 1)
+        self.assertGreater(record['spans']['storage.read']['bytes'], 0)
+
+    def test_server_timing_format(self):
+        metrics = RequestMetrics()
+        metrics.add('db', 0.002)
+        metrics.add('db', 0.001)
+        metrics.add('storage.read', 0.0005, 2048)
+        self.assertEqual(
+            server_timing(metrics, 0.01),
+            'db;dur=3.00;desc="2 queries", '
+            'storage-read;dur=0.50;desc="1 files read, 2048 bytes", total;dur=10.00',
+        )
@@ -0,0 +1,206 @@
+import cProfile
+import pstats
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import AIModel, Project
+from utils.board_storage import board_storage
+from utils.json_storage import json_storage
+from utils.counters import usage_counters
+from utils.storage_manifest import storage_manifest
+from utils.perf import measure
+from utils.secure_json_storage import secure_storage
+from utils.storage_bench import seed_user
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+# Operations run at SMALL and LARGE data sizes: queries and storage I/O must
+# not change, Python function calls (cProfile counts are deterministic) may
+# grow at most linearly, with some slack
+SMALL, LARGE = 20, 80
+LINEAR = LARGE / SMALL * 1.5
+
+
+def function_calls(fn):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        fn()
+    finally:
+        profiler.disable()
+    return pstats.Stats(profiler).total_calls
+
+
+@override_settings(USAGE_COUNTER_FLUSH_INTERVAL=3600, STORAGE_MANIFEST_FLUSH_INTERVAL=3600,
+                   RATE_LIMIT_ENABLED=False,
+                   PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], REST_FRAMEWORK={
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+})
+class BudgetTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        usage_counters.flush()
+        storage_manifest.flush()
+
+    def make_user(self, tasks, depth=3):
+        name = f'budget{User.objects.count()}'
+        user = User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='testpass123',
+            subscription_plan='enterprise',
+        )
+        board_id = seed_user(board_storage, secure_storage, json_storage, user, boards=1, tasks=tasks,
+                             depth=depth, fanout=2, rng=random.Random(0))[0]
+        client = APIClient()
+        client.force_login(user)
+        return user, board_id, client
+
+    def cost(self, fn):
+        """(queries, storage reads, storage writes, function calls) of one call"""
+        with measure() as metrics:
+            calls = function_calls(fn)
+        return metrics.count('db'), metrics.count('storage.read'), metrics.count('storage.write'), calls
+
+
+class StorageBudgetTestCase(BudgetTestCase):
+    """Board and dashboard endpoints at SMALL and LARGE tasks per board"""
+
+    def setUp(self):
+        super().setUp()
+        # Three root tasks: one warm-up call and one measured call of every operation
+        self.tiny = self.make_user(3, depth=1)
+        self.small = self.make_user(SMALL)
+        self.large = self.make_user(LARGE)
+
+    def assertScales(self, operation, reads, writes):
+        """operation(user, board_id, client) returns the call to measure.
+
+        The tiny board's cost stands in for the fixed part (session, routing,
+        rendering), so only the data-dependent part is compared.
+        """
+        operation(*self.tiny)()  # per-process caches: URL resolver, templates
+        tiny, small, large = (self.cost(operation(*f)) for f in (self.tiny, self.small, self.large))
+        self.assertEqual(large[0], self.QUERIES, f'{large[0]} queries, budget {self.QUERIES}')
+        self.assertEqual(small[0], large[0], f'queries grow with data size: {small[0]} -> {large[0]}')
+        self.assertEqual(small[1], large[1], f'storage reads grow with data size: {small[1]} -> {large[1]}')
+        self.assertEqual(small[2], large[2], f'storage writes grow with data size: {small[2]} -> {large[2]}')
+        self.assertLessEqual(large[1], reads, f'{large[1]} storage reads, budget {reads}')
+        self.assertLessEqual(large[2], writes, f'{large[2]} storage writes, budget {writes}')
+        growth = (large[3] - tiny[3]) / max(small[3] - tiny[3], 1)
+        self.assertLessEqual(growth, LINEAR, f'function calls grow faster than linearly: '
+                                             f'{tiny[3]} / {small[3]} / {large[3]}')
+
+    # Every endpoint below: session lookup + user, nothing per task
+    QUERIES = 2
+
+    def test_dashboard_view(self):
+        # user file, boards, board tasks (no board projects file yet)
+        self.assertScales(lambda user, board_id, client: lambda: client.get('/dashboard/'), reads=3, writes=0)
+
+    def test_dashboard_api(self):
+        # tasks file in, analytics snapshot out
+        self.assertScales(lambda user, board_id, client: lambda: client.get('/api/dashboard/'), reads=1, writes=1)
+
+    def test_json_dashboard_api(self):
+        def dashboard(user, board_id, client):
+            client.get('/accounts/api/dashboard/')  # creates the empty project and model files
+            return lambda: client.get('/accounts/api/dashboard/')
+        # user, tasks, projects and models files, then the api_call activity entry
+        # (JSONStorageMiddleware re-reads and rewrites the user file)
+        self.assertScales(dashboard, reads=5, writes=1)
+
+    def test_board_list(self):
+        self.assertScales(lambda user, board_id, client: lambda: client.get('/api/boards/list/'), reads=1, writes=0)
+
+    def test_board_tasks(self):
+        # At most one tasks-file read per get_board_tasks (plus the boards file for the ownership check)
+        self.assertScales(
+            lambda user, board_id, client: lambda: client.get(f'/api/boards/{board_id}/tasks/'),
+            reads=2, writes=0,
+        )
+
+    def test_create_task(self):
+        self.assertScales(
+            lambda user, board_id, client: lambda: client.post(
+                '/api/boards/tasks/', {'board_id': board_id, 'title': 'Budget'}, format='json'),
+            reads=2, writes=1,
+        )
+
+    def test_update_task(self):
+        def update(user, board_id, client):
+            task_id = board_storage.get_board_tasks(user.id, board_id)[-1]['id']
+            return lambda: client.put(f'/api/boards/{board_id}/tasks/{task_id}/', {'progress': 50}, format='json')
+        self.assertScales(update, reads=2, writes=1)
+
+    def test_delete_task_with_renumber(self):
+        # Deleting the first root renumbers every remaining task
+        def delete(user, board_id, client):
+            root = next(t['id'] for t in board_storage.get_board_tasks(user.id, board_id) if not t['parent_id'])
+            return lambda: client.delete(f'/api/boards/{board_id}/tasks/{root}/delete/')
+        self.assertScales(delete, reads=2, writes=1)
+
+
+class DatabaseBudgetTestCase(BudgetTestCase):
+    """Database-backed endpoints: fixed query budgets however many rows exist"""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='testpass123',
+            subscription_plan='enterprise',
+        )
+        self.client = APIClient()
+        self.client.force_login(self.viewer)
+
+    def make_users(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            User.objects.create_user(
+                username=f'member{i}', email=f'member{i}@example.com', password='testpass123',
+                company_name='Acme', job_title='Engineer',
+            )
+
+    def make_models(self, count):
+        owner = User.objects.create_user(
+            username=f'owner{User.objects.count()}', email=f'owner{User.objects.count()}@example.com',
+            password='testpass123',
+        )
+        project = Project.objects.create(user=self.viewer, name=f'project-{owner.pk}')
+        for i in range(count):
+            model = AIModel.objects.create(name=f'model-{owner.pk}-{i}', model_type='nlp', user=owner, is_public=True)
+            project.ai_models.add(model)
+
+    def assertQueryBudget(self, url, grow, budget):
+        """Same number of queries before and after grow() adds rows, and within budget"""
+        counts = []
+        for _ in range(2):
+            with measure() as metrics:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(metrics.count('db'))
+            grow()
+        self.assertEqual(counts[0], counts[1], f'queries grow with row count: {counts[0]} -> {counts[1]}')
+        self.assertLessEqual(counts[1], budget, f'{counts[1]} queries, budget {budget}')
+
+    def test_directory(self):
+        self.make_users(SMALL // 4)
+        # session, user, one page of directory entries
+        self.assertQueryBudget('/api/users/directory/', lambda: self.make_users(SMALL), 3)
+
+    def test_directory_search(self):
+        self.make_users(SMALL // 4)
+        self.assertQueryBudget('/api/users/directory/?q=acme', lambda: self.make_users(SMALL), 3)
+
+    def test_model_list(self):
+        self.make_models(SMALL // 4)
+        # session, user, COUNT, models joined with owners and profiles
+        self.assertQueryBudget('/api/v1/models/?expand=user.profile', lambda: self.make_models(SMALL), 4)
+
+    def test_project_list(self):
+        self.make_models(SMALL // 4)
+        # session, user, COUNT, projects, prefetched models
+        self.assertQueryBudget('/api/v1/projects/?expand=ai_models', lambda: self.make_models(SMALL), 5)
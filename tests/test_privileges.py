@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from accounts import privileges
+from accounts.privileges import HasPrivilege, has_privilege, privilege_required
+from utils.bitset import BitRegistry, decode, encode, has_bit, mask_of
+
+
+class BitsetTestCase(SimpleTestCase):
+    def test_mask_round_trip(self):
+        mask = mask_of([0, 3, 200, None])
+        self.assertEqual(decode(encode(mask)), mask)
+        self.assertEqual(decode(b''), 0)
+        self.assertTrue(has_bit(mask, 200))
+        self.assertFalse(has_bit(mask, 4))
+        self.assertFalse(has_bit(mask, None))
+
+    def test_registry_reloads_on_miss_only(self):
+        loads = []
+        mapping = {('app', 'READ'): 0}
+
+        def loader():
+            loads.append(1)
+            return mapping
+
+        registry = BitRegistry(loader, min_reload_interval=0)
+        self.assertEqual(registry.bit(('app', 'READ')), 0)
+        self.assertEqual(registry.bit(('app', 'READ')), 0)
+        self.assertEqual(len(loads), 1)
+        mapping[('app', 'WRITE')] = 1
+        self.assertEqual(registry.bit(('app', 'WRITE')), 1)
+        self.assertEqual(len(loads), 2)
+
+    def test_registry_reloads_on_miss_at_most_once_per_interval(self):
+        loads = []
+        mapping = {('app', 'READ'): 0}
+
+        def loader():
+            loads.append(1)
+            return mapping
+
+        registry = BitRegistry(loader, min_reload_interval=60)
+        with mock.patch('utils.bitset.time.monotonic', return_value=1000.0):
+            for _ in range(5):
+                self.assertIsNone(registry.bit(('app', 'UNKNOWN')))
+            self.assertEqual(len(loads), 1)
+            mapping[('app', 'WRITE')] = 1
+            self.assertIsNone(registry.bit(('app', 'WRITE')))
+        with mock.patch('utils.bitset.time.monotonic', return_value=1060.0):
+            self.assertEqual(registry.bit(('app', 'WRITE')), 1)
+        self.assertEqual(len(loads), 2)
+        registry.reset()
+        self.assertEqual(registry.bit(('app', 'READ')), 0)
+        self.assertEqual(len(loads), 3)
+
+
+def security_user(bits, pk=1, **extra):
+    return SimpleNamespace(pk=pk, is_authenticated=True, is_superuser=False,
+                           privilege_bits=encode(mask_of(bits)), **extra)
+
+
+class HasPrivilegeTestCase(SimpleTestCase):
+    def setUp(self):
+        registry = BitRegistry(lambda: {('admin', 'MANAGE_USERS'): 2, ('admin', 'VIEW_LOGS'): 5})
+        patcher = mock.patch.object(privileges, 'privilege_bits', registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_has_privilege_reads_the_bitset(self):
+        user = security_user([2])
+        self.assertTrue(has_privilege(user, 'admin', 'MANAGE_USERS'))
+        self.assertFalse(has_privilege(user, 'admin', 'VIEW_LOGS'))
+        self.assertFalse(has_privilege(user, 'admin', 'UNKNOWN'))
+
+    def test_superuser_and_plain_users(self):
+        self.assertTrue(has_privilege(SimpleNamespace(is_authenticated=True, is_superuser=True), 'admin', 'VIEW_LOGS'))
+        self.assertFalse(has_privilege(SimpleNamespace(is_authenticated=True, is_superuser=False), 'admin', 'VIEW_LOGS'))
+        self.assertFalse(has_privilege(None, 'admin', 'VIEW_LOGS'))
+
+    def test_permission_classes(self):
+        request = SimpleNamespace(user=security_user([2, 5]))
+        view = SimpleNamespace(required_privileges=[('admin', 'MANAGE_USERS'), ('admin', 'VIEW_LOGS')])
+        self.assertTrue(HasPrivilege().has_permission(request, view))
+        limited = SimpleNamespace(user=security_user([5], pk=2))
+        self.assertFalse(HasPrivilege().has_permission(limited, view))
+        permission = privilege_required('admin', 'VIEW_LOGS')
+        self.assertTrue(permission().has_permission(limited, SimpleNamespace()))
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+
+from utils.profiling import ProfilingMiddleware, make_token, read_stacks
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def slow_view(request):
+    request.resolver_match = resolve('/')
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return HttpResponse('ok')
+
+
+class ProfilingTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        # Frames are named relative to BASE_DIR, which must be the project again
+        settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0.0,
+            PROFILING_DIR=self.dir, PROFILING_INTERVAL=0.001, BASE_DIR=PROJECT_DIR,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = User.objects.create_user(
+            username='staffuser', email='staff@example.com', password='testpass123', is_staff=True
+        )
+        self.factory = RequestFactory()
+
+    def files(self, pattern='*/*'):
+        return list(self.dir.glob(pattern))
+
+    def test_unsampled_requests_are_not_profiled(self):
+        ProfilingMiddleware(slow_view)(self.factory.get('/'))
+        self.assertEqual(self.files(), [])
+
+    def test_token_for_staff_only(self):
+        user = User.objects.create_user(username='plain', email='plain@example.com', password='testpass123')
+        with self.assertRaises(PermissionDenied):
+            make_token(user)
+
+    def test_signed_header_profiles_one_request(self):
+        request = self.factory.get('/', HTTP_X_PROFILE=make_token(self.staff))
+        ProfilingMiddleware(slow_view)(request)
+        stacks = self.files('*/*.stacks')
+        self.assertEqual(len(stacks), 1)
+        self.assertEqual(stacks[0].parent.name, resolve('/').view_name.replace(':', '.'))
+        merged = read_stacks(stacks)
+        self.assertTrue(any('slow_view@tests/test_profiling.py' in stack for stack in merged))
+
+    def test_token_stops_working_when_its_user_loses_staff(self):
+        token = make_token(self.staff)
+        User.objects.filter(pk=self.staff.pk).update(is_staff=False)
+        ProfilingMiddleware(slow_view)(self.factory.get('/', HTTP_X_PROFILE=token))
+        self.assertEqual(self.files(), [])
+
+    def test_query_token_is_removed_from_the_request(self):
+        seen = []
+        request = self.factory.get('/', {'page': '2', 'profile': make_token(self.staff)})
+        ProfilingMiddleware(lambda r: seen.append(r.GET.dict()) or slow_view(r))(request)
+        self.assertEqual(len(self.files('*/*.stacks')), 1)
+        self.assertEqual(seen, [{'page': '2'}])
+        self.assertEqual(request.META['QUERY_STRING'], 'page=2')
+
+    def test_bad_token_is_ignored(self):
+        ProfilingMiddleware(slow_view)(self.factory.get('/', {'profile': 'forged:token'}))
+        self.assertEqual(self.files(), [])
+
+    @override_settings(PROFILING_MODE='cprofile', PROFILING_SAMPLE_RATE=1.0)
+    def test_cprofile_mode(self):
+        ProfilingMiddleware(slow_view)(self.factory.get('/'))
+        self.assertEqual(len(self.files('*/*.prof')), 1)
+        out = StringIO()
+        call_command('aggregate_profiles', pstats=5, stdout=out)
+        self.assertIn('slow_view', out.getvalue())
+
+    def test_aggregate_merges_collapsed_stacks(self):
+        for name, lines in (('a', 'root;x 2\nroot;y 1\n'), ('b', 'root;x 3\n')):
+            (self.dir / name).mkdir()
+            (self.dir / name / 'p.stacks').write_text(lines)
+        output = self.dir / 'merged.folded'
+        call_command('aggregate_profiles', output=str(output), stdout=StringIO())
+        self.assertEqual(output.read_text(), 'root;x 5\nroot;y 1\n')
@@ -0,0 +1,99 @@
+import io
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from accounts.provisioning import ProvisioningError, _check_limit, hash_passwords, read_csv, validate_rows
+from tests.storage import TempStorageMixin
+
+try:
+    import accounts.models_security  # noqa: F401
+    SECURITY_MODELS = True
+except ImportError:
+    SECURITY_MODELS = False
+
+User = get_user_model()
+
+CSV = 'Email,UserName, Department\n Ann@Example.com ,ann,Sales\nbob@example.com,,\n'
+
+
+class ReadCsvTestCase(SimpleTestCase):
+    def test_headers_are_lowercased_and_values_stripped(self):
+        rows = read_csv(io.BytesIO(('\ufeff' + CSV).encode('utf-8')))
+        self.assertEqual(rows, [
+            {'email': 'Ann@Example.com', 'username': 'ann', 'department': 'Sales'},
+            {'email': 'bob@example.com', 'username': '', 'department': ''},
+        ])
+
+    def test_reads_paths_and_text(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(CSV)
+        self.assertEqual(read_csv(path), read_csv(io.StringIO(CSV)))
+
+
+class ValidateRowsTestCase(SimpleTestCase):
+    def existing(self, field, values):
+        taken = {'email': {'taken@example.com'}, 'username': {'taken_name'}}
+        return taken[field] & set(values)
+
+    def test_rows_are_split_into_importable_and_errors(self):
+        rows = [
+            {'email': 'Ann@Example.com', 'username': 'ann'},
+            {'email': 'not-an-email'},
+            {'email': 'ann@example.com', 'username': 'ann2'},
+            {'email': 'taken@example.com'},
+            {'email': 'carl@example.com', 'username': 'taken_name'},
+            {'email': 'dora@example.com'},
+        ]
+        with mock.patch('accounts.provisioning._existing', side_effect=self.existing):
+            importable, errors = validate_rows(rows)
+        self.assertEqual([(r['email'], r['username'], r['_line']) for r in importable], [
+            ('ann@example.com', 'ann', 2),
+            ('dora@example.com', 'dora@example.com', 7),
+        ])
+        self.assertEqual([(e['line'], e['error']) for e in errors], [
+            (3, 'Invalid email'),
+            (4, 'Duplicate in file'),
+            (5, 'User already exists'),
+            (6, 'User already exists'),
+        ])
+
+    def test_account_limit(self):
+        account = SimpleNamespace(max_users=3, users=mock.Mock(count=mock.Mock(return_value=2)))
+        _check_limit(account, 1)
+        with self.assertRaisesMessage(ProvisioningError, 'would exceed the limit of 3 (2 already exist)'):
+            _check_limit(account, 2)
+
+    def test_rows_without_password_get_an_unusable_one(self):
+        hashes = hash_passwords([None, ''], workers=1)
+        self.assertEqual([(salt, secure) for _, salt, secure in hashes], [('', ''), ('', '')])
+        self.assertTrue(all(password.startswith('!') for password, _, _ in hashes))
+
+
+@skipIf(SECURITY_MODELS, 'security models are installed')
+class SecurityModelsUnavailableTestCase(TempStorageMixin, TestCase):
+    def test_import_endpoint_reports_not_implemented(self):
+        admin = User.objects.create_user(
+            username='secadmin', email='secadmin@example.com', password='testpass123', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.post(
+            '/accounts/api/security/accounts/00000000-0000-0000-0000-000000000000/users/import/',
+            {'file': SimpleUploadedFile('users.csv', CSV.encode('utf-8'))}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 501)
+
+    def test_command_fails_cleanly(self):
+        with self.assertRaisesMessage(CommandError, 'not available'):
+            call_command('provision_users', 'acme', 'users.csv', stdout=io.StringIO())
@@ -0,0 +1,138 @@
+from unittest import mock
+
+from django.test import TestCase, RequestFactory, override_settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from utils.counters import usage_counters
+from utils.rate_limit import (
+    SlidingWindowLimiter, RateLimitMiddleware, PlanRateThrottle, api_quota_window, limiter, plan_cache
+)
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class SlidingWindowLimiterTestCase(TestCase):
+    def test_rejects_over_limit_with_retry_after(self):
+        window_limiter = SlidingWindowLimiter(backend='local')
+        for i in range(3):
+            self.assertEqual(window_limiter.hit('k', 3, 60, now=600 + i), (True, 0))
+        allowed, retry_after = window_limiter.hit('k', 3, 60, now=610)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 50)
+
+    def test_previous_bucket_decays(self):
+        window_limiter = SlidingWindowLimiter(backend='local')
+        for i in range(4):
+            window_limiter.hit('k', 4, 60, now=659)
+        # Just after the rollover the previous bucket still counts almost fully
+        self.assertFalse(window_limiter.hit('k', 4, 60, now=661)[0])
+        # Half way through only half of it is left
+        self.assertTrue(window_limiter.hit('k', 4, 60, now=690)[0])
+
+    def test_rejected_hits_are_not_counted(self):
+        window_limiter = SlidingWindowLimiter(backend='local')
+        window_limiter.hit('k', 1, 60, now=0)
+        for _ in range(10):
+            window_limiter.hit('k', 1, 60, now=30)
+        self.assertTrue(window_limiter.hit('k', 1, 60, now=121)[0])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_shared_cache_backend(self):
+        first = SlidingWindowLimiter(backend='cache')
+        second = SlidingWindowLimiter(backend='cache')
+        self.assertTrue(first.hit('shared', 2, 60, now=5)[0])
+        self.assertTrue(second.hit('shared', 2, 60, now=6)[0])
+        self.assertFalse(first.hit('shared', 2, 60, now=7)[0])
+
+
+@override_settings(RATE_LIMIT_ANONYMOUS=2, RATE_LIMIT_PER_IP=100, RATE_LIMIT_PLANS={'free': 3, 'pro': 5})
+class RateLimitMiddlewareTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        limiter.reset()
+        self.factory = RequestFactory()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+
+    def test_anonymous_clients_limited_by_ip(self):
+        for _ in range(2):
+            self.assertEqual(self.middleware(self.factory.get('/api/boards/list/')).status_code, 200)
+        response = self.middleware(self.factory.get('/api/boards/list/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_rotating_forwarded_for_does_not_reset_the_ip_limit(self):
+        statuses = [
+            self.middleware(self.factory.get('/api/boards/list/', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_clients_behind_a_trusted_proxy_are_told_apart(self):
+        def get(client_ip):
+            return self.middleware(self.factory.get(
+                '/api/boards/list/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR=f'192.0.2.1, {client_ip}'
+            )).status_code
+        self.assertEqual([get('198.51.100.1') for _ in range(3)], [200, 200, 429])
+        self.assertEqual(get('198.51.100.2'), 200)
+
+    def test_non_api_paths_untouched(self):
+        for _ in range(5):
+            self.assertEqual(self.middleware(self.factory.get('/dashboard/')).status_code, 200)
+
+    def test_jwt_users_limited_by_plan_without_queries(self):
+        user = User.objects.create_user(username='jwtuser', email='jwt@example.com', password='testpass123')
+        plan_cache.remember(user.pk, 'pro')
+        token = str(AccessToken.for_user(user))
+        with self.assertNumQueries(0):
+            statuses = [
+                self.middleware(self.factory.get('/api/auth/user/', HTTP_AUTHORIZATION=f'Bearer {token}')).status_code
+                for _ in range(6)
+            ]
+        self.assertEqual(statuses, [200] * 5 + [429])
+
+
+@override_settings(RATE_LIMIT_ENABLED=False, RATE_LIMIT_PLANS={'free': 1000})
+class PlanRateThrottleTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        limiter.reset()
+        usage_counters.flush()
+        self.user = User.objects.create_user(
+            username='quotauser', email='quota@example.com', password='testpass123', api_calls_limit=2
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_quota_enforced_and_charged(self):
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 429)
+        usage_counters.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.api_calls_used, 2)
+
+    @override_settings(API_QUOTA_PERIOD=100)
+    def test_quota_resets_each_period(self):
+        with mock.patch('utils.rate_limit.time.time', return_value=1050.0):
+            self.assertEqual(api_quota_window(), (10, 50))
+            self.client.get('/api/auth/user/')
+            self.client.get('/api/auth/user/')
+            response = self.client.get('/api/auth/user/')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '50')
+        usage_counters.flush()
+        with mock.patch('utils.rate_limit.time.time', return_value=1100.0):
+            self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        usage_counters.flush()
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.api_calls_used, self.user.api_calls_period), (1, 11))
+
+    def test_throttle_remembers_plan(self):
+        self.client.get('/api/auth/user/')
+        self.assertEqual(plan_cache.get(self.user.pk), 'free')
+        self.assertIsNone(PlanRateThrottle().wait())
@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from utils.board_storage import BoardStorage
+from utils.storage_bench import compare, generate_task_tree, percentile, summarize
+
+
+class TaskTreeTestCase(SimpleTestCase):
+    def test_depth_and_fanout(self):
+        tasks = generate_task_tree('b1', 1, 40, depth=3, fanout=3)
+        self.assertEqual(len(tasks), 40)
+        depths = {t['task_number'].count('.') + 1 for t in tasks}
+        self.assertEqual(depths, {1, 2, 3})
+        children = {}
+        for task in tasks:
+            children.setdefault(task['parent_id'], []).append(task)
+        self.assertTrue(all(len(c) <= 3 for parent, c in children.items() if parent))
+        # 1 + 3 + 9 tasks per tree, so the fourth tree starts at task 40
+        self.assertEqual([t['task_number'] for t in tasks if not t['parent_id']], ['1', '2', '3', '4'])
+
+    def test_numbering_survives_renumber(self):
+        tasks = generate_task_tree('b1', 1, 30, depth=3, fanout=4)
+        expected = {t['id']: t['task_number'] for t in tasks}
+        storage = BoardStorage.__new__(BoardStorage)
+        storage._renumber_tasks(tasks)
+        self.assertEqual({t['id']: t['task_number'] for t in tasks}, expected)
+
+
+class StatsTestCase(SimpleTestCase):
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        stats = summarize(values)
+        self.assertEqual(stats['p95_ms'], 95.0)
+        self.assertEqual(stats['iterations'], 100)
+
+    def test_compare_flags_p95_growth(self):
+        baseline = {'operations': {'a': {'p95_ms': 10.0}, 'b': {'p95_ms': 10.0}}}
+        report = {'operations': {'a': {'p95_ms': 11.0}, 'b': {'p95_ms': 15.0}, 'c': {'p95_ms': 1.0}}}
+        regressions = compare(report, baseline, 0.2)
+        self.assertEqual([r['operation'] for r in regressions], ['b'])
+
+
+class BenchStorageCommandTestCase(TestCase):
+    def test_report_and_scratch_directory(self):
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir, True)
+        out = StringIO()
+        call_command('bench_storage', tasks=40, users=2, boards=2, iterations=3,
+                     data_dir=data_dir, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['config']['tasks'], 40)
+        for name in ('board.delete_board_task', 'secure.dashboard', 'json.get_user_tasks'):
+            self.assertEqual(report['operations'][name]['iterations'], 3)
+        self.assertTrue(os.listdir(os.path.join(data_dir, 'secure_data', 'board_tasks')))
+
+    def test_regression_fails_the_run(self):
+        baseline = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        self.addCleanup(os.remove, baseline.name)
+        json.dump({'operations': {'json.get_user_data': {'p95_ms': 1e-6}}}, baseline)
+        baseline.close()
+        with self.assertRaises(CommandError):
+            call_command('bench_storage', tasks=4, users=1, boards=1, iterations=2,
+                         baseline=baseline.name, stdout=StringIO())
@@ -0,0 +1,159 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.models import StorageManifestEntry
+from utils.data_initializer import data_initializer
+from utils.json_storage import json_storage
+from utils.perf import measure
+from utils.secure_json_storage import secure_storage
+from utils.storage_manifest import count_records, file_key, storage_manifest
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+@override_settings(STORAGE_MANIFEST_FLUSH_INTERVAL=3600, STORAGE_MANIFEST_MAX_PENDING=1000)
+class StorageManifestTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='manifest', email='manifest@example.com')
+        # Includes the user file mirrored on create
+        storage_manifest.flush()
+        self.paths = [
+            json_storage._get_user_file_path(self.user.id),
+            json_storage._get_task_file_path(self.user.id),
+            secure_storage._get_file_path('tasks', self.user.id),
+        ]
+
+    def entry(self, path):
+        storage, data_type, owner_key = file_key(path)
+        return StorageManifestEntry.objects.get(storage=storage, data_type=data_type, owner_key=owner_key)
+
+    def test_file_key(self):
+        self.assertEqual(file_key(json_storage._get_task_file_path(7)), ('data', 'tasks', '7'))
+        secure_path = secure_storage._get_file_path('board_tasks', 7)
+        self.assertEqual(file_key(secure_path), ('secure_data', 'board_tasks', secure_storage._get_user_hash(7)))
+        self.assertIsNone(file_key(os.path.join(json_storage.tasks_path, '_index.json')))
+
+    def test_count_records(self):
+        self.assertEqual(count_records('tasks', {'tasks': [{}, {}]}), 2)
+        self.assertEqual(count_records('board_tasks', {'b1': {'tasks': [{}]}, 'b2': {'tasks': [{}, {}]}}), 3)
+        self.assertEqual(count_records('users', {'user_id': 1, 'email': 'a@example.com'}), 1)
+        self.assertEqual(count_records('users', {'user_id': 1}), 0)
+        self.assertEqual(count_records('tasks', None), -1)
+
+    def test_writes_are_buffered_and_recorded(self):
+        with self.assertNumQueries(0):
+            secure_storage.save_tasks_data(self.user.id, [{'title': 'One'}, {'title': 'Two'}])
+            json_storage.save_task_data(self.user.id, {'title': 'Three'})
+        self.assertEqual(storage_manifest.flush(), 2)
+
+        path = secure_storage._get_file_path('tasks', self.user.id)
+        entry = self.entry(path)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self.assertEqual(entry.records, 2)
+        self.assertEqual(entry.size, len(raw))
+        self.assertEqual(entry.checksum, hashlib.sha256(raw).hexdigest())
+        self.assertEqual(self.entry(json_storage._get_task_file_path(self.user.id)).records, 1)
+
+        usage = storage_manifest.usage(self.user.id)
+        self.assertEqual(usage['records'], {'secure_data/tasks': 2, 'data/tasks': 1, 'data/users': 1})
+        self.assertEqual(usage['bytes'], sum(os.path.getsize(path) for path in self.paths))
+        self.assertTrue(storage_manifest.within_quota(self.user.id, usage['bytes']))
+        self.assertFalse(storage_manifest.within_quota(self.user.id, usage['bytes'] - 1))
+
+    def test_stats_do_not_open_files(self):
+        json_storage.save_task_data(self.user.id, {'title': 'One'})
+        json_storage.save_task_data(self.user.id, {'title': 'Two'})
+        before = data_initializer.get_storage_stats()['total_tasks']
+        json_storage.save_task_data(self.user.id, {'title': 'Three'})
+        storage_manifest.flush()
+        with measure() as metrics:
+            stats = data_initializer.get_storage_stats()
+        self.assertEqual(stats['total_tasks'], before + 1)
+        self.assertEqual(metrics.count('storage.read'), 0)
+        self.assertEqual(metrics.count('db'), 1)
+
+    def test_full_rescan_and_validation(self):
+        removed = User.objects.create(username='manifest_removed', email='manifest_removed@example.com')
+        # bulk_create skips the signal that mirrors users into data/users
+        User.objects.bulk_create([User(username='manifest_new', email='manifest_new@example.com')])
+        storage_manifest.flush()
+        # Changed behind the storage layer's back; only a rescan sees it
+        with open(json_storage._get_user_file_path(self.user.id), 'w') as f:
+            f.write('{broken')
+        os.remove(json_storage._get_user_file_path(removed.id))
+
+        issues = data_initializer.validate_data_integrity()
+        self.assertIn('Missing user data file for user manifest_new', issues)
+        self.assertFalse(any(issue.endswith((' manifest', ' manifest_removed')) for issue in issues))
+
+        issues = data_initializer.validate_data_integrity(full=True)
+        self.assertIn('Corrupted JSON file for user manifest', issues)
+        self.assertIn('Missing user data file for user manifest_removed', issues)
+        self.assertIn('Missing user data file for user manifest_new', issues)
+        self.assertEqual(self.entry(json_storage._get_user_file_path(self.user.id)).records, -1)
+
+    def test_stale_entry_never_overwrites_a_newer_write(self):
+        path = secure_storage._get_file_path('tasks', self.user.id)
+        secure_storage.save_tasks_data(self.user.id, [{'title': 'One'}])
+        # Buffered in another process that flushes late
+        stale = storage_manifest._take()
+        secure_storage.save_tasks_data(self.user.id, [{'title': 'Two'}])
+        storage_manifest.flush()
+        storage_manifest._restore(stale)
+        storage_manifest.flush()
+        self.assertEqual(self.entry(path).records, 2)
+
+    def test_upsert_keeps_the_newer_row(self):
+        path = secure_storage._get_file_path('tasks', self.user.id)
+        secure_storage.save_tasks_data(self.user.id, [{'title': 'One'}, {'title': 'Two'}])
+        storage_manifest.flush()
+        entry = self.entry(path)
+        older = {
+            'records': 1, 'size': 1, 'checksum': 'old',
+            'modified_at': entry.modified_at.replace(year=entry.modified_at.year - 1),
+        }
+        storage_manifest._save({file_key(path): older})
+        self.assertEqual(self.entry(path).records, 2)
+        storage_manifest._save({file_key(path): {**older, 'modified_at': entry.modified_at.replace(
+            year=entry.modified_at.year + 1)}})
+        self.assertEqual(self.entry(path).records, 1)
+
+    def test_forget_removed_files(self):
+        path = json_storage._get_task_file_path(self.user.id)
+        json_storage.save_task_data(self.user.id, {'title': 'One'})
+        storage_manifest.flush()
+        json_storage.save_task_data(self.user.id, {'title': 'Two'})
+        os.remove(path)
+        self.assertEqual(storage_manifest.forget([path, '/elsewhere/notes.txt']), 1)
+        self.assertEqual(storage_manifest.flush(), 0)
+        self.assertFalse(StorageManifestEntry.objects.filter(data_type='tasks').exists())
+
+    def test_rebuild_backfills_files_and_drops_vanished_ones(self):
+        json_storage.save_task_data(self.user.id, {'title': 'One'})
+        # Written before the manifest existed
+        storage_manifest.discard()
+        StorageManifestEntry.objects.all().delete()
+        StorageManifestEntry.objects.create(
+            storage='data', data_type='tasks', owner_key='999999', records=1, size=1, checksum='gone',
+            modified_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(storage_manifest.rebuild(), StorageManifestEntry.objects.count())
+        self.assertEqual(self.entry(json_storage._get_task_file_path(self.user.id)).records, 1)
+        self.assertEqual(self.entry(json_storage._get_user_file_path(self.user.id)).records, 1)
+        self.assertFalse(StorageManifestEntry.objects.filter(owner_key='999999').exists())
+
+    def test_rebuild_keeps_rows_written_during_the_scan(self):
+        later = datetime.now(tz=dt_timezone.utc) + timedelta(hours=1)
+        StorageManifestEntry.objects.create(
+            storage='data', data_type='tasks', owner_key='999999', records=1, size=1, checksum='new',
+            modified_at=later,
+        )
+        storage_manifest.rebuild()
+        self.assertTrue(StorageManifestEntry.objects.filter(owner_key='999999').exists())
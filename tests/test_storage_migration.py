@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from utils.json_storage import json_storage
+from utils.perf import measure
+from utils.secure_json_storage import secure_storage
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class LegacyMigrationTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='migrate_me', email='migrate_me@example.com')
+        self._write(json_storage._get_user_file_path(self.user.id), {'user_id': self.user.id})
+        self._write(json_storage._get_task_file_path(self.user.id), {
+            'tasks': [{'title': f'Task {i}'} for i in range(30)],
+        })
+        self._write(json_storage._get_project_file_path(self.user.id), {
+            'projects': [{'title': 'Project'}],
+        })
+
+    def _write(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def test_bulk_save_writes_once(self):
+        with measure(sql=False) as metrics:
+            secure_storage.save_tasks_data(self.user.id, [{'title': f'Task {i}'} for i in range(30)])
+        self.assertEqual(metrics.count('storage.write'), 1)
+        tasks = secure_storage.get_user_tasks(self.user.id)
+        self.assertEqual([t['id'] for t in tasks], list(range(1, 31)))
+        self.assertEqual(tasks[-1]['task_number'], '30')
+        self.assertTrue(all(t['owner_id'] == self.user.id for t in tasks))
+
+    def test_migrate_all(self):
+        out = StringIO()
+        call_command('fix_user_data', '--migrate-all', stdout=out)
+        self.assertIn('Migrated 1 user files, 30 tasks and 1 projects', out.getvalue())
+        self.assertIn('0 count mismatches', out.getvalue())
+        self.assertEqual(len(secure_storage.get_user_tasks(self.user.id)), 30)
+        self.assertEqual(secure_storage.get_user_projects(self.user.id)[0]['owner_id'], self.user.id)
+        self.assertEqual(secure_storage.get_user_data(self.user.id)['username'], 'migrate_me')
+
+    def test_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command('fix_user_data', '--migrate-all', '--dry-run', stdout=out)
+        self.assertIn('Would migrate 1 user files, 30 tasks and 1 projects', out.getvalue())
+        self.assertEqual(secure_storage.get_user_tasks(self.user.id), [])
+        self.assertEqual(secure_storage.get_user_data(self.user.id), {})
+
+    def test_invalid_source_is_skipped(self):
+        with open(json_storage._get_task_file_path(self.user.id), 'w') as f:
+            f.write('{not json')
+        out = StringIO()
+        call_command('fix_user_data', '--migrate-all', stdout=out)
+        self.assertIn('Skipped invalid tasks source', out.getvalue())
+        self.assertIn('1 invalid sources', out.getvalue())
+        self.assertEqual(secure_storage.get_user_tasks(self.user.id), [])
+        self.assertEqual(len(secure_storage.get_user_projects(self.user.id)), 1)
+
+    def test_rerun_adds_nothing(self):
+        call_command('fix_user_data', '--migrate-all', stdout=StringIO())
+        # Created in secure storage after the migration; a rerun must keep it
+        secure_storage.save_task_data(self.user.id, {'title': 'New'})
+        out = StringIO()
+        call_command('fix_user_data', '--migrate-all', stdout=out)
+        self.assertIn('Migrated 1 user files, 0 tasks and 0 projects (31 already migrated', out.getvalue())
+        tasks = secure_storage.get_user_tasks(self.user.id)
+        self.assertEqual(len(tasks), 31)
+        self.assertEqual(len(secure_storage.get_user_projects(self.user.id)), 1)
+
+    def test_new_legacy_records_are_migrated_once(self):
+        call_command('fix_user_data', '--migrate-all', stdout=StringIO())
+        with open(json_storage._get_task_file_path(self.user.id), 'w') as f:
+            json.dump({'tasks': [{'title': f'Task {i}'} for i in range(31)]}, f)
+        call_command('fix_user_data', '--migrate-all', stdout=StringIO())
+        tasks = secure_storage.get_user_tasks(self.user.id)
+        self.assertEqual(len(tasks), 31)
+        self.assertEqual(tasks[-1]['legacy_id'], 31)
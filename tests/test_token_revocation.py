@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.jwt_auth import CustomTokenObtainPairSerializer
+from accounts.models import RevokedToken
+from accounts.revocation import revoked_tokens
+from utils.bloom import BloomFilter
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+class BloomFilterTestCase(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter.from_items((f'item-{i}' for i in range(1000)), capacity=1000, error_rate=0.01)
+        self.assertTrue(all(f'item-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class TokenRevocationTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        revoked_tokens.reset()
+        self.addCleanup(revoked_tokens.reset)
+        self.user = User.objects.create_user(
+            username='revokeuser', email='revoke@example.com', password='testpass123'
+        )
+        self.client = APIClient()
+        self.refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.client.post('/accounts/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], self.refresh)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+        response = self.client.post('/accounts/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_unrevoked_lookup_skips_database(self):
+        revoked_tokens.rebuild()
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked('never-revoked'))
+
+    @override_settings(JWT_REVOCATION_SYNC_SECONDS=0)
+    def test_revocations_by_other_workers_are_synced(self):
+        revoked_tokens.rebuild()
+        RevokedToken.objects.create(jti='elsewhere', expires_at=timezone.now() + timedelta(days=1))
+        self.assertTrue(revoked_tokens.is_revoked('elsewhere'))
+
+    def test_logout_revokes(self):
+        response = self.client.post('/accounts/api/auth/logout/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/accounts/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_prune_deletes_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f'old-{i}', expires_at=now - timedelta(minutes=1)) for i in range(5)]
+            + [RevokedToken(jti='live', expires_at=now + timedelta(days=1))]
+        )
+        out = StringIO()
+        call_command('prune_revoked_tokens', batch_size=2, stdout=out)
+        self.assertIn('Removed 5', out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
@@ -0,0 +1,197 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from accounts.models import UserProfile
+from core.models import AIModel
+from utils import counters
+from utils.counters import CachedCount, UsageCounterBuffer, usage_counters
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+
+@override_settings(USAGE_COUNTER_FLUSH_INTERVAL=3600, USAGE_COUNTER_MAX_PENDING=1000)
+class UsageCounterTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        usage_counters.flush()
+        self.user = User.objects.create_user(
+            username='counteruser',
+            email='counter@example.com',
+            password='testpass123',
+            api_calls_limit=10
+        )
+
+    def test_increments_are_buffered_until_flush(self):
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                self.user.increment_api_usage()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.api_calls_used, 0)
+        self.assertEqual(self.user.current_api_calls_used, 50)
+
+        usage_counters.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.api_calls_used, 50)
+        self.assertEqual(self.user.current_api_calls_used, 50)
+
+    def test_quota_check_includes_pending_delta(self):
+        self.user.increment_api_usage(9)
+        self.assertTrue(self.user.can_make_api_call())
+        self.user.increment_api_usage()
+        self.assertFalse(self.user.can_make_api_call())
+        self.assertEqual(self.user.api_calls_remaining, 0)
+
+    def test_flush_batches_rows_with_equal_deltas(self):
+        other = User.objects.create_user(
+            username='counteruser2',
+            email='counter2@example.com',
+            password='testpass123'
+        )
+        model = AIModel.objects.create(name='m', model_type='nlp', user=self.user)
+        self.user.increment_api_usage(3)
+        other.increment_api_usage(3)
+        model.increment_api_calls(2)
+
+        # One UPDATE for both users, one for the model, inside a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(usage_counters.flush(), 3)
+        model.refresh_from_db()
+        self.assertEqual(model.api_calls_count, 2)
+        self.assertEqual(User.objects.get(pk=other.pk).api_calls_used, 3)
+
+    def test_profile_views(self):
+        profile, _ = UserProfile.objects.get_or_create(user=self.user)
+        profile.increment_profile_views()
+        profile.increment_profile_views()
+        self.assertEqual(profile.current_profile_views, 2)
+        usage_counters.flush()
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_views, 2)
+
+    @override_settings(USAGE_COUNTER_MAX_PENDING=2)
+    def test_flushes_when_too_many_keys_pending(self):
+        buffer = UsageCounterBuffer()
+        other = User.objects.create_user(
+            username='counteruser3',
+            email='counter3@example.com',
+            password='testpass123'
+        )
+        buffer.increment(User, self.user.pk, 'api_calls_used')
+        buffer.increment(User, other.pk, 'api_calls_used')
+        self.assertEqual(buffer.pending(User, self.user.pk, 'api_calls_used'), 0)
+        self.assertEqual(User.objects.get(pk=other.pk).api_calls_used, 1)
+
+    def test_background_flush_writes_idle_counts(self):
+        buffer = UsageCounterBuffer()
+        timers = []
+
+        def timer(delay, function):
+            timers.append(function)
+            return mock.Mock()
+
+        with override_settings(USAGE_COUNTER_BACKGROUND_FLUSH=True), \
+                mock.patch.object(counters.threading, 'Timer', timer), \
+                mock.patch.object(counters, 'connection'):
+            buffer.increment(User, self.user.pk, 'api_calls_used', 4)
+            buffer.increment(User, self.user.pk, 'api_calls_used')
+            # One timer, however many increments it covers
+            self.assertEqual(len(timers), 1)
+            timers[0]()
+        self.assertEqual(User.objects.get(pk=self.user.pk).api_calls_used, 5)
+
+
+SHARED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                            'LOCATION': 'usage-counter-tests'}}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def getset(self, key, value):
+        old, self.values[key] = self.values.get(key), value
+        return old
+
+
+@override_settings(CACHES=SHARED_CACHE, USAGE_COUNTER_BACKEND='cache',
+                   USAGE_COUNTER_FLUSH_INTERVAL=3600, USAGE_COUNTER_MAX_PENDING=1000)
+class SharedUsageCounterTestCase(TempStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='shareduser', email='shared@example.com', password='testpass123'
+        )
+        # Two workers that both recorded calls for the same user
+        self.first, self.second = UsageCounterBuffer(), UsageCounterBuffer()
+        self.first.increment(User, self.user.pk, 'api_calls_used', 2)
+        self.second.increment(User, self.user.pk, 'api_calls_used', 3)
+
+    def used(self):
+        return User.objects.get(pk=self.user.pk).api_calls_used
+
+    def test_each_delta_is_written_once(self):
+        self.assertEqual(self.first.pending(User, self.user.pk, 'api_calls_used'), 5)
+        self.first.flush()
+        self.second.flush()
+        self.assertEqual(self.used(), 5)
+
+    def test_claimed_key_is_left_to_its_taker(self):
+        cache_key = self.first._cache_key((User, 'api_calls_used', self.user.pk))
+        cache.add(f'{cache_key}:claim', 1)
+        self.assertEqual(self.first.flush(), 0)
+        self.assertEqual(self.used(), 0)
+        cache.delete(f'{cache_key}:claim')
+        # Still tracked, so the next flush picks it up
+        self.first.flush()
+        self.second.flush()
+        self.assertEqual(self.used(), 5)
+
+    def test_redis_takes_with_getset(self):
+        redis = FakeRedis()
+        cache_key = self.first._cache_key((User, 'api_calls_used', self.user.pk))
+        redis.values[cache.make_key(cache_key)] = b'5'
+        with mock.patch.object(counters, '_redis_client', return_value=redis):
+            self.first.flush()
+            self.second.flush()
+        self.assertEqual(self.used(), 5)
+        self.assertEqual(redis.values[cache.make_key(cache_key)], 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'cached-count-tests'}})
+class CachedCountTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.counter = CachedCount('test:count')
+        self.calls = 0
+
+    def count(self):
+        self.calls += 1
+        return 2
+
+    def test_counts_once_then_adjusts_in_place(self):
+        self.assertEqual(self.counter.get('u1', self.count), 2)
+        self.counter.incr('u1')
+        self.counter.incr('u1')
+        self.counter.decr('u1')
+        self.assertEqual(self.counter.get('u1', self.count), 3)
+        self.assertEqual(self.calls, 1)
+
+    def test_refresh_replaces_the_cached_count(self):
+        self.counter.get('u3', self.count)
+        self.counter.incr('u3', 5)
+        self.assertEqual(self.counter.refresh('u3', self.count), 2)
+        self.assertEqual(self.counter.get('u3', self.count), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_uncached_key_is_recounted_not_guessed(self):
+        self.counter.incr('u2')
+        self.assertEqual(self.counter.get('u2', self.count), 2)
+        self.counter.invalidate('u2')
+        self.assertEqual(self.counter.get('u2', self.count), 2)
+        self.assertEqual(self.calls, 2)
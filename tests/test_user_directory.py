@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from accounts import directory
+from accounts.models import UserProfile, UserSearchToken
+from tests.storage import TempStorageMixin
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RATE_LIMIT_ENABLED=False, REST_FRAMEWORK={
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+})
+class UserDirectoryTestCase(TempStorageMixin, TestCase):
+    url = '/api/users/directory/'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='testpass123'
+        )
+        self.alice = User.objects.create_user(
+            username='alice', email='alice@example.com', password='testpass123',
+            first_name='Alice', company_name='Acme Robotics', job_title='Data Engineer',
+            location='Berlin', skill_level='advanced'
+        )
+        self.bob = User.objects.create_user(
+            username='bob', email='bob@example.com', password='testpass123',
+            first_name='Bob', company_name='Globex', job_title='Designer', location='Paris'
+        )
+        profile = UserProfile.objects.get(user=self.bob)
+        profile.skills = ['Python', 'Django']
+        profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def usernames(self, response):
+        return [u['username'] for u in response.json()['users']]
+
+    def test_lists_public_users_without_requester(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.usernames(response), ['bob', 'alice'])
+
+    def test_search_uses_index(self):
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'acme'})), ['alice'])
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'djan'})), ['bob'])
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'berlin engineer'})), ['alice'])
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'berlin designer'})), [])
+
+    def test_cursor_pagination(self):
+        response = self.client.get(self.url, {'page_size': 1})
+        self.assertEqual(self.usernames(response), ['bob'])
+        next_url = response.json()['next']
+        self.assertIsNotNone(next_url)
+        self.assertEqual(self.usernames(self.client.get(next_url)), ['alice'])
+
+    def test_first_page_cached_until_profile_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.usernames(self.client.get(self.url)), ['bob', 'alice'])
+
+        self.alice.is_profile_public = False
+        self.alice.save()
+        self.assertEqual(self.usernames(self.client.get(self.url)), ['bob'])
+
+    def test_index_follows_edits(self):
+        self.alice.company_name = 'Initech'
+        self.alice.save()
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'acme'})), [])
+        self.assertEqual(self.usernames(self.client.get(self.url, {'q': 'initech'})), ['alice'])
+
+    def test_rebuild_command(self):
+        UserSearchToken.objects.all().delete()
+        call_command('rebuild_directory_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(
+            set(UserSearchToken.objects.filter(user=self.bob).values_list('token', flat=True)),
+            directory.user_tokens(self.bob, ['Python', 'Django'])
+        )
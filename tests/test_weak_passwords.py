@@ -0,0 +1,73 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from accounts.weak_passwords import weak_passwords
+from utils.bloom import BloomFilter
+
+
+class BloomFileTestCase(SimpleTestCase):
+    def test_save_and_mmap_load(self):
+        bloom = BloomFilter.from_items(['alpha', 'beta'], capacity=100)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'filter.bloom')
+            bloom.save(path)
+            loaded = BloomFilter.load(path)
+            self.assertIn('alpha', loaded)
+            self.assertNotIn('gamma', loaded)
+            self.assertEqual(len(loaded), 2)
+            self.assertEqual(bytes(loaded.bits), bytes(bloom.bits))
+            del loaded
+
+    def test_rejects_other_files(self):
+        with tempfile.NamedTemporaryFile(suffix='.bloom') as f:
+            f.write(b'not a filter at all, definitely not')
+            f.flush()
+            with self.assertRaises(ValueError):
+                BloomFilter.load(f.name)
+
+
+class WeakPasswordTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.breach = os.path.join(self.tmp.name, 'breach.txt')
+        with open(self.breach, 'w') as f:
+            f.write('Correct-Horse-Leaked\n\nanother-leak\n')
+        settings = override_settings(
+            WEAK_PASSWORD_FILTER_PATH=os.path.join(self.tmp.name, 'weak.bloom'),
+            WEAK_PASSWORD_LISTS=[self.breach],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        weak_passwords.reset()
+        self.addCleanup(weak_passwords.reset)
+
+    def test_in_memory_filter_without_file(self):
+        self.assertTrue(weak_passwords.is_weak('password'))
+        self.assertTrue(weak_passwords.is_weak('correct-horse-leaked'))
+        self.assertFalse(weak_passwords.is_weak('vX9!mq2-unlisted-Lp'))
+
+    def test_rebuild_command_writes_loadable_filter(self):
+        extra = os.path.join(self.tmp.name, 'extra.txt')
+        with open(extra, 'w') as f:
+            f.write('only-in-extra\n')
+        out = StringIO()
+        call_command('rebuild_weak_password_filter', extra, '--skip-table', stdout=out)
+        self.assertTrue(os.path.exists(weak_passwords.path))
+        self.assertIn('Wrote', out.getvalue())
+        self.assertTrue(weak_passwords.is_weak('ONLY-IN-EXTRA'))
+        self.assertTrue(weak_passwords.is_weak('another-leak'))
+        self.assertFalse(weak_passwords.is_weak('vX9!mq2-unlisted-Lp'))
+        weak_passwords.reset()
+
+    def test_password_validator(self):
+        with self.assertRaises(ValidationError) as ctx:
+            validate_password('another-leak')
+        self.assertEqual(ctx.exception.error_list[0].code, 'password_too_common')
+        validate_password('vX9!mq2-unlisted-Lp')
@@ -0,0 +1,65 @@
+"""
+Admin helpers for large tables
+Unfiltered changelists on big tables use the database's row estimate instead
+of an exact COUNT(*), which on PostgreSQL means a sequential scan of the table
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def estimated_count(model, using: str = 'default'):
+    """Planner's row estimate for model's table, or None if the backend has none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s', [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except Exception as e:
+        logger.warning(f"Row estimate for {table} failed: {str(e)}")
+        return None
+    # reltuples is -1 for a table that was never analyzed
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the row estimate for unfiltered querysets.
+
+    Filtered querysets (search, list_filter, date drill-down) are usually
+    small and still counted exactly; so are tables whose estimate is below
+    ADMIN_ESTIMATE_COUNT_THRESHOLD, where the estimate saves nothing.
+    """
+
+    @property
+    def threshold(self) -> int:
+        return int(getattr(settings, 'ADMIN_ESTIMATE_COUNT_THRESHOLD', 100000))
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """For ModelAdmins over append-only tables (activity, usage, logs)"""
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N total"
+    show_full_result_count = False
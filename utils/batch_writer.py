@@ -0,0 +1,150 @@
+"""
+Asynchronous batched INSERTs for append-only log tables
+Request threads enqueue unsaved model instances; a background thread writes
+them with bulk_create, so a burst of events costs a few INSERTs instead of
+one per event
+"""
+import atexit
+import queue
+import threading
+from collections import defaultdict
+from typing import List
+from django.conf import settings
+from django.db import close_old_connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Bounded queue of model instances flushed with bulk_create.
+
+    The queue holds at most BATCH_WRITER_MAX_QUEUE instances; when it is full
+    new instances are dropped and counted rather than blocking the request
+    (under a flood of events losing some log rows is better than losing the
+    database). Flushes happen every BATCH_WRITER_FLUSH_INTERVAL seconds or as
+    soon as BATCH_WRITER_BATCH_SIZE instances are waiting.
+    """
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        self._queue = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    @property
+    def max_queue(self) -> int:
+        return int(getattr(settings, 'BATCH_WRITER_MAX_QUEUE', 10000))
+
+    @property
+    def batch_size(self) -> int:
+        return int(getattr(settings, 'BATCH_WRITER_BATCH_SIZE', 500))
+
+    @property
+    def flush_interval(self) -> float:
+        return float(getattr(settings, 'BATCH_WRITER_FLUSH_INTERVAL', 2))
+
+    @property
+    def use_thread(self) -> bool:
+        # Off in tests so flushes happen on the test's own connection
+        return getattr(settings, 'BATCH_WRITER_ASYNC', True)
+
+    def _get_queue(self) -> queue.Queue:
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    self._queue = queue.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    def submit(self, instance) -> bool:
+        """Queue an unsaved instance; returns False if it had to be dropped"""
+        q = self._get_queue()
+        try:
+            q.put_nowait(instance)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Batch writer {self.name} queue full, {dropped} rows dropped")
+            return False
+
+        if self.use_thread:
+            self._ensure_thread()
+            if q.qsize() >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        return self._get_queue().qsize()
+
+    def _drain(self, limit: int) -> List:
+        q = self._get_queue()
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(q.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows inserted"""
+        written = 0
+        while True:
+            items = self._drain(self.batch_size)
+            if not items:
+                return written
+            by_model = defaultdict(list)
+            for item in items:
+                by_model[type(item)].append(item)
+            for model, instances in by_model.items():
+                try:
+                    model._default_manager.bulk_create(instances, batch_size=self.batch_size)
+                    written += len(instances)
+                except Exception as e:
+                    logger.error(f"Batch writer {self.name} failed to write {len(instances)} {model.__name__} rows: {str(e)}")
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'batch-writer-{self.name}', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+_writers: List[BatchWriter] = []
+
+
+def get_writer(name: str) -> BatchWriter:
+    for writer in _writers:
+        if writer.name == name:
+            return writer
+    writer = BatchWriter(name)
+    _writers.append(writer)
+    return writer
+
+
+def _flush_at_exit():
+    for writer in _writers:
+        try:
+            writer.flush()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_at_exit)
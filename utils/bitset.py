@@ -0,0 +1,62 @@
+"""
+Integer bitsets for precomputed permission checks
+A set of small integers is stored as one Python int (and as bytes in the
+database); membership is a shift and a mask
+"""
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+
+def mask_of(bits: Iterable[Optional[int]]) -> int:
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def has_bit(mask: int, bit: Optional[int]) -> bool:
+    return bit is not None and (mask >> bit) & 1 == 1
+
+
+def encode(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def decode(data) -> int:
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+class BitRegistry:
+    """name -> bit position, loaded in one call and reloaded on a miss.
+
+    Positions must never be reused once handed out, so a stale registry can
+    only be missing names, never map a name to the wrong bit. Misses reload
+    at most once per min_reload_interval seconds, so lookups of unknown
+    names cannot turn every check into a full reload; a name added in
+    between is found at the next reload (or right away after reset()).
+    """
+
+    def __init__(self, loader: Callable[[], Dict[Hashable, int]], min_reload_interval: float = 5.0):
+        self.loader = loader
+        self.min_reload_interval = min_reload_interval
+        self._lock = threading.Lock()
+        self._bits: Optional[Dict[Hashable, int]] = None
+        self._loaded_at = 0.0
+
+    def bit(self, name: Hashable) -> Optional[int]:
+        bits = self._bits
+        if bits is not None and name in bits:
+            return bits[name]
+        with self._lock:
+            bits = self._bits
+            if bits is None or (name not in bits
+                                and time.monotonic() - self._loaded_at >= self.min_reload_interval):
+                self._bits = bits = dict(self.loader())
+                self._loaded_at = time.monotonic()
+        return bits.get(name)
+
+    def reset(self):
+        with self._lock:
+            self._bits = None
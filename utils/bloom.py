@@ -0,0 +1,88 @@
+"""
+Compact Bloom filter for fast negative membership checks
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import Iterable
+
+# magic, size, hash_count, count, capacity, error_rate
+_HEADER = struct.Struct('<4sQIQQd')
+_MAGIC = b'BLM1'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    ``item in bloom`` is never False for an added item; it is True for an item
+    that was never added with probability close to error_rate while no more
+    than capacity items are stored. Items cannot be removed, so rebuild the
+    filter from the source of truth to drop them.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int, error_rate: float = 0.001) -> 'BloomFilter':
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def save(self, path: str):
+        """Write the filter to path atomically (header followed by the bit array)"""
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.size, self.hash_count, self.count, self.capacity, self.error_rate))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True) -> 'BloomFilter':
+        """Read a saved filter; with use_mmap the bits stay in the page cache, shared between processes"""
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f'Truncated Bloom filter file: {path}')
+            magic, size, hash_count, count, capacity, error_rate = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise ValueError(f'Not a Bloom filter file: {path}')
+            bloom = cls.__new__(cls)
+            bloom.size, bloom.hash_count, bloom.count = size, hash_count, count
+            bloom.capacity, bloom.error_rate = capacity, error_rate
+            if use_mmap:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                bloom.bits = memoryview(mapped)[_HEADER.size:]
+            else:
+                bloom.bits = bytearray(f.read())
+        if len(bloom.bits) != (size + 7) // 8:
+            raise ValueError(f'Bloom filter file has the wrong size: {path}')
+        return bloom
@@ -288,31 +288,41 @@ class BoardStorage(SecureJSONStorage):
         
         return False
     
-    def _find_child_tasks(self, tasks: List[Dict[str, Any]], parent_id: str, tasks_to_delete: set):
-        """Recursively find all child tasks"""
+    def _children_index(self, tasks: List[Dict[str, Any]]) -> Dict[Any, List[Dict[str, Any]]]:
+        """Map parent_id -> child tasks, so walking the tree is linear in the task count"""
+        children = {}
         for task in tasks:
-            if task.get('parent_id') == parent_id:
-                tasks_to_delete.add(task['id'])
-                self._find_child_tasks(tasks, task['id'], tasks_to_delete)
+            children.setdefault(task.get('parent_id'), []).append(task)
+        return children
+    
+    def _find_child_tasks(self, tasks: List[Dict[str, Any]], parent_id: str, tasks_to_delete: set):
+        """Find all descendant tasks"""
+        children = self._children_index(tasks)
+        pending = [parent_id]
+        while pending:
+            for task in children.get(pending.pop(), []):
+                if task['id'] not in tasks_to_delete:
+                    tasks_to_delete.add(task['id'])
+                    pending.append(task['id'])
     
     def _renumber_tasks(self, tasks: List[Dict[str, Any]]):
         """Renumber tasks to maintain proper hierarchy"""
+        children = self._children_index(tasks)
         # Find root tasks and renumber them
         root_tasks = [t for t in tasks if not t.get('parent_id')]
         root_tasks.sort(key=lambda x: x.get('created_at', ''))
         
         for i, task in enumerate(root_tasks, 1):
             task['task_number'] = str(i)
-            self._renumber_children(tasks, task['id'], task['task_number'])
+            self._renumber_children(children, task['id'], task['task_number'])
     
-    def _renumber_children(self, tasks: List[Dict[str, Any]], parent_id: str, parent_number: str):
+    def _renumber_children(self, children: Dict[Any, List[Dict[str, Any]]], parent_id: str, parent_number: str):
         """Recursively renumber child tasks"""
-        child_tasks = [t for t in tasks if t.get('parent_id') == parent_id]
-        child_tasks.sort(key=lambda x: x.get('created_at', ''))
+        child_tasks = sorted(children.get(parent_id, []), key=lambda x: x.get('created_at', ''))
         
         for i, task in enumerate(child_tasks, 1):
             task['task_number'] = f"{parent_number}.{i}"
-            self._renumber_children(tasks, task['id'], task['task_number'])
+            self._renumber_children(children, task['id'], task['task_number'])
 
 # Global instance
 board_storage = BoardStorage()
\ No newline at end of file
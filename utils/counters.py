@@ -0,0 +1,257 @@
+"""
+Buffered usage counters for hot integer columns
+Accumulates increments in memory (or in the shared cache) and flushes them
+to the database in bulk F() UPDATEs instead of one save() per increment,
+at the latest flush_interval seconds after the first pending increment
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+import logging
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[type, str, object]
+
+
+def _redis_client():
+    """Raw client of a Redis default cache (Django's backend or django-redis), else None"""
+    backend = getattr(cache, '_cache', None)
+    if not hasattr(backend, 'get_client'):
+        backend = getattr(cache, 'client', None)
+    if not hasattr(backend, 'get_client'):
+        return None
+    return backend.get_client(write=True)
+
+
+class UsageCounterBuffer:
+    """Lossless, batched counter increments.
+
+    Increments are keyed by (model, field, pk). flush() groups pending deltas by
+    (model, field, delta) so a burst of calls turns into a handful of
+    ``UPDATE ... SET field = field + delta WHERE pk IN (...)`` statements.
+    Deltas that fail to flush are merged back and retried on the next flush.
+
+    With USAGE_COUNTER_BACKEND = 'cache' pending deltas live in the shared cache
+    (cache.incr is atomic on Redis), so quota checks in one worker see the calls
+    made through every other worker. Any worker that saw a key may flush it,
+    so taking a shared delta is an atomic read-and-reset: GETSET on Redis,
+    otherwise a short claim taken with cache.add.
+
+    A daemon timer flushes whatever is pending flush_interval seconds after it
+    was recorded, so an idle worker does not sit on its counts until the next
+    increment or exit (USAGE_COUNTER_BACKGROUND_FLUSH = False turns it off).
+    """
+
+    # Seconds a cache-backend claim on a key outlives a worker that died holding it
+    CLAIM_TIMEOUT = 30
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._cache_keys: Dict[str, CounterKey] = {}
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def flush_interval(self) -> float:
+        return float(getattr(settings, 'USAGE_COUNTER_FLUSH_INTERVAL', 5))
+
+    @property
+    def max_pending(self) -> int:
+        return int(getattr(settings, 'USAGE_COUNTER_MAX_PENDING', 1000))
+
+    @property
+    def use_cache(self) -> bool:
+        return getattr(settings, 'USAGE_COUNTER_BACKEND', 'local') == 'cache'
+
+    @property
+    def background_flush(self) -> bool:
+        return getattr(settings, 'USAGE_COUNTER_BACKGROUND_FLUSH', True)
+
+    def _cache_key(self, key: CounterKey) -> str:
+        model, field, pk = key
+        return f"usage:{model._meta.label_lower}:{field}:{pk}"
+
+    def increment(self, model, pk, field: str, count: int = 1):
+        """Record count more uses of model(pk).field"""
+        size = self._add((model, field, pk), count)
+        if size >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _add(self, key: CounterKey, count: int) -> int:
+        if self.use_cache:
+            cache_key = self._cache_key(key)
+            try:
+                cache.incr(cache_key, count)
+            except ValueError:
+                # Key does not exist yet
+                if not cache.add(cache_key, count, timeout=None):
+                    cache.incr(cache_key, count)
+            with self._lock:
+                self._cache_keys[cache_key] = key
+                return len(self._cache_keys)
+        with self._lock:
+            self._pending[key] += count
+            return len(self._pending)
+
+    def pending(self, model, pk, field: str) -> int:
+        """Increments recorded but not yet written to the database"""
+        key = (model, field, pk)
+        if self.use_cache:
+            return int(cache.get(self._cache_key(key)) or 0)
+        with self._lock:
+            return self._pending.get(key, 0)
+
+    def _take(self) -> Dict[CounterKey, int]:
+        """Atomically detach every pending delta"""
+        if self.use_cache:
+            with self._lock:
+                cache_keys, self._cache_keys = self._cache_keys, {}
+            taken, busy = {}, {}
+            client = _redis_client()
+            for cache_key, key in cache_keys.items():
+                value = self._take_shared(cache_key, client)
+                if value is None:
+                    busy[cache_key] = key
+                elif value:
+                    taken[key] = value
+            if busy:
+                # Being taken by another worker; look again on the next flush
+                with self._lock:
+                    self._cache_keys.update(busy)
+            return taken
+        with self._lock:
+            taken, self._pending = self._pending, defaultdict(int)
+        return taken
+
+    def _take_shared(self, cache_key: str, client=None) -> Optional[int]:
+        """Read and reset one shared delta; None if another worker holds its claim"""
+        if client is not None:
+            return int(client.getset(cache.make_key(cache_key), 0) or 0)
+        claim = f'{cache_key}:claim'
+        if not cache.add(claim, 1, timeout=self.CLAIM_TIMEOUT):
+            return None
+        try:
+            value = int(cache.get(cache_key) or 0)
+            if value:
+                # decr keeps increments that raced in after the read
+                cache.decr(cache_key, value)
+            return value
+        finally:
+            cache.delete(claim)
+
+    def _restore(self, deltas: Dict[CounterKey, int]):
+        for key, delta in deltas.items():
+            self._add(key, delta)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Arm the background flush unless one is already due"""
+        if not self.background_flush:
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # The timer thread's own connection
+            connection.close()
+
+    def flush(self) -> int:
+        """Write pending deltas; returns the number of rows updated"""
+        self._last_flush = time.monotonic()
+        deltas = self._take()
+        if not deltas:
+            return 0
+
+        batches = defaultdict(list)
+        for (model, field, pk), delta in deltas.items():
+            if delta:
+                batches[(model, field, delta)].append(pk)
+
+        updated = 0
+        try:
+            with transaction.atomic():
+                for (model, field, delta), pks in batches.items():
+                    updated += model._default_manager.filter(pk__in=pks).update(
+                        **{field: F(field) + delta}
+                    )
+        except Exception as e:
+            logger.error(f"Usage counter flush failed, will retry: {str(e)}")
+            self._restore(deltas)
+            return 0
+        return updated
+
+
+class CachedCount:
+    """A COUNT(*) kept in the shared cache and adjusted in place.
+
+    get() runs the real count once per key and caches it; incr()/decr() then
+    keep it current without queries. A key that is missing from the cache is
+    left alone by incr()/decr() and simply recounted on the next get(), so
+    an evicted or invalidated counter can never drift.
+    """
+
+    def __init__(self, prefix: str, timeout: int = 3600):
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _key(self, key) -> str:
+        return f'{self.prefix}:{key}'
+
+    def get(self, key, count_fn) -> int:
+        value = cache.get(self._key(key))
+        if value is None:
+            value = count_fn()
+            cache.add(self._key(key), value, self.timeout)
+        return value
+
+    def refresh(self, key, count_fn) -> int:
+        """Run the real count now and replace the cached value with it"""
+        value = count_fn()
+        cache.set(self._key(key), value, self.timeout)
+        return value
+
+    def incr(self, key, delta: int = 1):
+        try:
+            cache.incr(self._key(key), delta)
+        except ValueError:
+            # Not cached; the next get() counts
+            pass
+
+    def decr(self, key, delta: int = 1):
+        self.incr(key, -delta)
+
+    def invalidate(self, *keys):
+        cache.delete_many([self._key(key) for key in keys])
+
+
+# Global instance
+usage_counters = UsageCounterBuffer()
+
+
+def _flush_at_exit():
+    try:
+        usage_counters.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -7,9 +7,28 @@ import json
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from .json_storage import json_storage
+from .maintenance import UserJob, UserJobRunner
+from .storage_manifest import storage_manifest
 
 User = get_user_model()
 
+
+class SyncUsersJob(UserJob):
+    """Write each user's JSON record and empty task/project/model files"""
+
+    name = 'sync_users'
+
+    def process(self, user):
+        if self.dry_run:
+            return {'synced': 1}
+        # Save user data to JSON
+        if not json_storage.save_user_data(user):
+            return {'failed': 1}
+        # Initialize empty data files for user
+        data_initializer._initialize_user_data_files(user.id)
+        return {'synced': 1}
+
+
 class DataInitializer:
     """Initialize and validate data storage system"""
     
@@ -54,23 +73,16 @@ class DataInitializer:
                 with open(index_file, 'w', encoding='utf-8') as f:
                     json.dump(index_data, f, indent=2)
     
-    def sync_existing_users(self):
-        """Sync existing database users to JSON storage"""
-        users = User.objects.all()
-        synced_count = 0
-        
-        for user in users:
-            try:
-                # Save user data to JSON
-                success = json_storage.save_user_data(user)
-                if success:
-                    synced_count += 1
-                    
-                    # Initialize empty data files for user
-                    self._initialize_user_data_files(user.id)
-                    
-            except Exception as e:
-                print(f"Error syncing user {user.username}: {str(e)}")
+    def sync_existing_users(self, dry_run=False, **runner_options):
+        """Sync existing database users to JSON storage
+
+        runner_options (workers, chunk_size, checkpoint, on_progress) go to
+        UserJobRunner.
+        """
+        runner_options.setdefault('on_message', print)
+        runner_options.setdefault('on_progress', print)
+        counters = UserJobRunner(SyncUsersJob(dry_run=dry_run), **runner_options).run()
+        synced_count = counters['synced']
         
         print(f"Synced {synced_count} users to JSON storage")
         return synced_count
@@ -86,11 +98,14 @@ class DataInitializer:
         for data_type, structure in empty_data_structures.items():
             file_path = os.path.join(self.base_path, data_type, f'{data_type}_{user_id}.json')
             if not os.path.exists(file_path):
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(structure, f, indent=2)
+                json_storage._write_json_file(file_path, structure)
     
-    def validate_data_integrity(self):
-        """Validate data integrity across all JSON files"""
+    def validate_data_integrity(self, full=False):
+        """Validate data integrity across all JSON files
+
+        User files are checked against the storage manifest; full rescans
+        the data directory into the manifest first.
+        """
         issues = []
         
         # Check directory structure
@@ -101,20 +116,9 @@ class DataInitializer:
                 issues.append(f"Missing directory: {dir_name}")
         
         # Check user data files
-        users = User.objects.all()
-        for user in users:
-            user_file = os.path.join(self.base_path, 'users', f'user_{user.id}.json')
-            if not os.path.exists(user_file):
-                issues.append(f"Missing user data file for user {user.username}")
-            else:
-                # Validate JSON structure
-                try:
-                    with open(user_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if 'user_id' not in data or 'email' not in data:
-                            issues.append(f"Invalid user data structure for user {user.username}")
-                except json.JSONDecodeError:
-                    issues.append(f"Corrupted JSON file for user {user.username}")
+        if full:
+            storage_manifest.rebuild(['data'])
+        issues.extend(storage_manifest.user_file_issues(User.objects.all()))
         
         if issues:
             print("Data integrity issues found:")
@@ -141,52 +145,26 @@ class DataInitializer:
             print(f"Backup failed: {str(e)}")
             return None
     
-    def get_storage_stats(self):
-        """Get statistics about JSON storage usage"""
-        stats = {
-            'total_users': 0,
-            'total_tasks': 0,
-            'total_projects': 0,
-            'total_models': 0,
-            'storage_size_mb': 0
+    def get_storage_stats(self, full=False):
+        """Get statistics about JSON storage usage from the storage manifest
+
+        full rescans the data directory into the manifest first.
+        """
+        if full:
+            storage_manifest.rebuild(['data'])
+        totals = storage_manifest.totals()
+        
+        def total(data_type, field):
+            return totals.get(('data', data_type), {}).get(field, 0)
+        
+        size = sum(entry['size'] for (storage, _), entry in totals.items() if storage == 'data')
+        return {
+            'total_users': total('users', 'files'),
+            'total_tasks': total('tasks', 'records'),
+            'total_projects': total('projects', 'records'),
+            'total_models': total('models', 'records'),
+            'storage_size_mb': round(size / (1024 * 1024), 2)
         }
-        
-        # Count files and calculate sizes
-        for root, dirs, files in os.walk(self.base_path):
-            for file in files:
-                if file.endswith('.json') and not file.startswith('_'):
-                    file_path = os.path.join(root, file)
-                    file_size = os.path.getsize(file_path)
-                    stats['storage_size_mb'] += file_size
-                    
-                    # Count by type
-                    if 'user_' in file:
-                        stats['total_users'] += 1
-                    elif 'tasks_' in file:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                                stats['total_tasks'] += len(data.get('tasks', []))
-                        except:
-                            pass
-                    elif 'projects_' in file:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                                stats['total_projects'] += len(data.get('projects', []))
-                        except:
-                            pass
-                    elif 'models_' in file:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                                stats['total_models'] += len(data.get('models', []))
-                        except:
-                            pass
-        
-        stats['storage_size_mb'] = round(stats['storage_size_mb'] / (1024 * 1024), 2)
-        
-        return stats
 
 # Global instance
 data_initializer = DataInitializer()
\ No newline at end of file
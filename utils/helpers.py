@@ -54,13 +54,19 @@ def format_file_size(size_bytes):
 
 
 def get_client_ip(request):
-    """Get client IP address from request"""
+    """Get client IP address from request
+
+    X-Forwarded-For is written by the client except for the entries our own
+    proxies append, so only the address TRUSTED_PROXY_COUNT entries from the
+    right is believed; with no trusted proxies REMOTE_ADDR is used.
+    """
+    proxies = int(getattr(settings, 'TRUSTED_PROXY_COUNT', 0))
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    if proxies > 0 and x_forwarded_for:
+        addresses = [address.strip() for address in x_forwarded_for.split(',') if address.strip()]
+        if addresses:
+            return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR')
 
 
 def time_since(dt):
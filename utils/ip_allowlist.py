@@ -0,0 +1,121 @@
+"""
+Compiled IP allowlists
+Ranges, CIDR blocks and single addresses are parsed once into sorted, merged
+integer intervals per address family; a membership check is then one int()
+conversion and a bisect
+"""
+import ipaddress
+import threading
+from bisect import bisect_right
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+def _as_int(address: str) -> Tuple[int, int]:
+    """(version, integer value) of an address; IPv4-mapped IPv6 counts as IPv4"""
+    ip = ipaddress.ip_address(address.strip())
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.version, int(ip)
+
+
+def parse_entry(entry: str) -> Tuple[int, int, int]:
+    """(version, first, last) for '10.0.0.0/8', '10.0.0.1-10.0.0.9' or '10.0.0.1'"""
+    entry = entry.strip()
+    if '/' in entry:
+        network = ipaddress.ip_network(entry, strict=False)
+        return network.version, int(network.network_address), int(network.broadcast_address)
+    if '-' in entry:
+        start, end = entry.split('-', 1)
+        start_version, first = _as_int(start)
+        end_version, last = _as_int(end)
+        if start_version != end_version:
+            raise ValueError(f'Range mixes IPv4 and IPv6: {entry}')
+        return start_version, min(first, last), max(first, last)
+    version, value = _as_int(entry)
+    return version, value, value
+
+
+def _merge(intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+    starts, ends = [], []
+    for first, last in sorted(intervals):
+        if ends and first <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], last)
+        else:
+            starts.append(first)
+            ends.append(last)
+    return starts, ends
+
+
+class IpAllowlist:
+    """Sorted, non-overlapping intervals per address family.
+
+    An allowlist compiled from no entries allows every address, which is what
+    an account without IP restrictions means. Malformed entries are skipped
+    and kept in ``invalid`` so callers can report them.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        intervals = {4: [], 6: []}
+        self.invalid: List[str] = []
+        for entry in entries:
+            if not entry:
+                continue
+            try:
+                version, first, last = parse_entry(entry)
+            except ValueError:
+                self.invalid.append(entry)
+                continue
+            intervals[version].append((first, last))
+        self.allow_all = not (intervals[4] or intervals[6] or self.invalid)
+        self._starts, self._ends = {}, {}
+        for version, ranges in intervals.items():
+            self._starts[version], self._ends[version] = _merge(ranges)
+
+    def __contains__(self, address: str) -> bool:
+        if self.allow_all:
+            return True
+        try:
+            version, value = _as_int(address)
+        except (ValueError, AttributeError):
+            return False
+        i = bisect_right(self._starts[version], value) - 1
+        return i >= 0 and value <= self._ends[version][i]
+
+    def contains_many(self, addresses: Iterable[str]) -> List[bool]:
+        return [address in self for address in addresses]
+
+    def __len__(self) -> int:
+        return len(self._starts[4]) + len(self._starts[6])
+
+
+class AllowlistCache:
+    """Compiled allowlists keyed by owner and version.
+
+    The version (e.g. the owner's updated_at) is part of the lookup, so a
+    changed owner is recompiled on its next check in every process without any
+    cross-process invalidation.
+    """
+
+    MAX_ENTRIES = 50000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Hashable, IpAllowlist]] = {}
+
+    def get(self, key: Hashable, version: Hashable, entries_fn) -> IpAllowlist:
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        allowlist = IpAllowlist(entries_fn())
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.clear()
+            self._entries[key] = (version, allowlist)
+        return allowlist
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
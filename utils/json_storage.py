@@ -4,13 +4,54 @@ Handles user data, tasks, and model information in JSON format
 """
 import json
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from .perf import span
+from .storage_manifest import storage_manifest
 
 User = get_user_model()
 
+# Model fields mirrored into the user JSON document. Saves that touch none of
+# these (e.g. password or session bookkeeping) never need a JSON rewrite.
+USER_SYNC_FIELDS = frozenset([
+    'username', 'email', 'first_name', 'last_name', 'user_type',
+    'company_name', 'job_title', 'bio', 'location', 'website',
+    'linkedin_url', 'github_url', 'skill_level', 'subscription_plan',
+    'api_calls_limit', 'api_calls_used', 'is_profile_public',
+    'receive_notifications', 'date_joined', 'last_login',
+])
+
+PROFILE_SYNC_FIELDS = frozenset([
+    'skills', 'interests', 'experience_years', 'education', 'certifications',
+    'profile_views', 'projects_count', 'connections_count',
+])
+
+
+def has_mirrored_changes(instance, fields: Iterable[str], created: bool = False,
+                         update_fields: Optional[Iterable[str]] = None) -> bool:
+    """Check whether a save changed any of fields (e.g. those mirrored into JSON)"""
+    if created:
+        return True
+    if update_fields is not None and not set(fields).intersection(update_fields):
+        return False
+
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        # Instance was not loaded from the database, nothing to compare against
+        return True
+
+    for name in fields:
+        if name not in loaded:
+            continue
+        if loaded[name] != getattr(instance, name):
+            return True
+    return False
+
+
 class JSONStorageManager:
     """Professional JSON storage manager for user data and tasks"""
     
@@ -45,8 +86,10 @@ class JSONStorageManager:
         """Safely read JSON file"""
         try:
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Read and parse are one step here; both count as storage.read
+                with span('storage.read'):
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        return json.load(f)
             return {}
         except (json.JSONDecodeError, IOError):
             return {}
@@ -54,9 +97,12 @@ class JSONStorageManager:
     def _write_json_file(self, file_path: str, data: Dict[str, Any]) -> bool:
         """Safely write JSON file"""
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            raw = json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+            with span('storage.write'):
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(raw)
+            storage_manifest.record(file_path, data, raw)
             return True
         except (IOError, TypeError):
             return False
@@ -65,7 +111,7 @@ class JSONStorageManager:
         """Save user registration and profile data to JSON"""
         user_data = {
             'user_id': int(user.id),
-            'group_id': user.groups.first().id if user.groups.exists() else None,
+            'group_id': user.groups.values_list('id', flat=True).first(),
             'username': user.username,
             'email': user.email,
             'first_name': user.first_name,
@@ -104,6 +150,10 @@ class JSONStorageManager:
             }
         
         file_path = self._get_user_file_path(user.id)
+        # Keep the activity log written by update_user_activity
+        existing_data = self._read_json_file(file_path)
+        if 'activities' in existing_data:
+            user_data['activities'] = existing_data['activities']
         return self._write_json_file(file_path, user_data)
     
     def save_task_data(self, user_id: int, task_data: Dict[str, Any]) -> bool:
@@ -216,5 +266,109 @@ class JSONStorageManager:
         
         return self._write_json_file(file_path, user_data)
 
+
+
+class UserSyncQueue:
+    """Coalesces user -> JSON writes.
+
+    Inside a request (see JSONStorageMiddleware) every scheduled user is written
+    once when the response goes out, no matter how many times it was saved.
+    Outside a request writes go through immediately unless
+    USER_JSON_SYNC_DEBOUNCE_SECONDS is set, in which case repeated saves within
+    that window are folded into a single delayed write.
+    """
+
+    def __init__(self, storage: JSONStorageManager):
+        self.storage = storage
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._delayed = {}
+        self._last_write = {}
+        self._timer = None
+
+    @property
+    def window(self) -> float:
+        return float(getattr(settings, 'USER_JSON_SYNC_DEBOUNCE_SECONDS', 0))
+
+    def _request_pending(self) -> Optional[Dict[int, Any]]:
+        if getattr(self._local, 'depth', 0) > 0:
+            return self._local.pending
+        return None
+
+    def begin(self):
+        """Open a coalescing scope for the current thread"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.pending = {}
+        self._local.depth = depth + 1
+
+    def end(self) -> int:
+        """Close the scope, writing every pending user once"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth <= 0:
+            return 0
+        self._local.depth = depth - 1
+        if self._local.depth > 0:
+            return 0
+        pending, self._local.pending = self._local.pending, {}
+        return self._write_all(pending.values())
+
+    def schedule(self, user) -> bool:
+        """Queue a JSON write for user; returns True if written immediately"""
+        pending = self._request_pending()
+        if pending is not None:
+            pending[user.pk] = user
+            return False
+
+        window = self.window
+        if window <= 0:
+            self._write(user)
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_write.get(user.pk)
+            if last is None or now - last >= window:
+                self._last_write[user.pk] = now
+                write_now = True
+            else:
+                self._delayed[user.pk] = user
+                if self._timer is None:
+                    self._timer = threading.Timer(window - (now - last), self.flush_delayed)
+                    self._timer.daemon = True
+                    self._timer.start()
+                write_now = False
+        if write_now:
+            self._write(user)
+        return write_now
+
+    def flush_delayed(self) -> int:
+        """Write users held back by the debounce window"""
+        with self._lock:
+            delayed, self._delayed = self._delayed, {}
+            timer, self._timer = self._timer, None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            now = time.monotonic()
+            for user_id in delayed:
+                self._last_write[user_id] = now
+        return self._write_all(delayed.values())
+
+    def _write_all(self, users) -> int:
+        written = 0
+        for user in users:
+            if self._write(user):
+                written += 1
+        return written
+
+    def _write(self, user) -> bool:
+        try:
+            return self.storage.save_user_data(user)
+        except Exception as e:
+            print(f"Error syncing user {user.pk} to JSON: {str(e)}")
+            return False
+
+
 # Global instance
-json_storage = JSONStorageManager()
\ No newline at end of file
+json_storage = JSONStorageManager()
+user_sync = UserSyncQueue(json_storage)
\ No newline at end of file
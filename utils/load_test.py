@@ -0,0 +1,346 @@
+"""
+HTTP load generator for the board and dashboard endpoints
+Simulated users run in threads, each with its own session, and pick requests
+from a weighted mix (board reads, task creates/updates/deletes, dashboard
+loads). Users start along a ramp-up schedule; latencies go into fixed-bucket
+histograms per operation. Requests go either through the WSGI app in-process
+(django.test.Client) or over HTTP to a running server.
+"""
+import bisect
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+from utils.storage_bench import percentile
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+DEFAULT_MIX = {
+    'list_boards': 10,
+    'read_tasks': 40,
+    'create_task': 15,
+    'update_task': 15,
+    'delete_task': 5,
+    'dashboard': 15,
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'read_tasks=50,create_task=20' -> weights; unknown operations are rejected"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation {name!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('The mix needs at least one operation with a positive weight')
+    return mix
+
+
+def parse_stages(value: str) -> List[Tuple[int, float]]:
+    """'10:30,50:60' -> ramp to 10 users over 30 s, then to 50 over the next 60 s"""
+    stages = []
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        users, _, seconds = part.partition(':')
+        stages.append((int(users), float(seconds or 0)))
+    if not stages or any(users < 0 or seconds < 0 for users, seconds in stages):
+        raise ValueError('Stages are users:seconds pairs with non-negative values')
+    return stages
+
+
+def start_offsets(stages: List[Tuple[int, float]]) -> List[float]:
+    """Start time (s) of every simulated user; users within a stage start evenly spread"""
+    offsets, started, elapsed = [], 0, 0.0
+    for users, seconds in stages:
+        added = max(users - started, 0)
+        for i in range(added):
+            offsets.append(elapsed + seconds * i / added)
+        started += added
+        elapsed += seconds
+    return offsets
+
+
+class Histogram:
+    __slots__ = ('counts', 'samples')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.samples: List[float] = []
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.samples.append(ms)
+
+    def as_dict(self) -> Dict[str, int]:
+        labels = [f'<={b}ms' for b in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}ms']
+        return {label: count for label, count in zip(labels, self.counts) if count}
+
+
+class Stats:
+    """Thread-safe per-operation latencies, status codes and errors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations: Dict[str, Dict] = {}
+
+    def record(self, operation: str, ms: float, status: Optional[int], error: bool,
+               exception: Optional[BaseException] = None):
+        with self._lock:
+            entry = self.operations.get(operation)
+            if entry is None:
+                entry = self.operations[operation] = {
+                    'histogram': Histogram(), 'statuses': {}, 'errors': 0, 'exceptions': {},
+                }
+            entry['histogram'].add(ms)
+            key = str(status) if status is not None else 'exception'
+            entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+            if error:
+                entry['errors'] += 1
+            if exception is not None:
+                name = f'{type(exception).__name__}: {exception}'[:200]
+                entry['exceptions'][name] = entry['exceptions'].get(name, 0) + 1
+
+    def report(self, elapsed: float) -> Dict:
+        operations, total, errors = {}, 0, 0
+        for name, entry in sorted(self.operations.items()):
+            samples = sorted(entry['histogram'].samples)
+            total += len(samples)
+            errors += entry['errors']
+            operations[name] = {
+                'requests': len(samples),
+                'errors': entry['errors'],
+                'error_rate': round(entry['errors'] / len(samples), 4),
+                'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(samples, 50), 2),
+                'p95_ms': round(percentile(samples, 95), 2),
+                'p99_ms': round(percentile(samples, 99), 2),
+                'max_ms': round(samples[-1], 2),
+                'statuses': entry['statuses'],
+                'histogram': entry['histogram'].as_dict(),
+            }
+            if entry['exceptions']:
+                operations[name]['exceptions'] = entry['exceptions']
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'operations': operations,
+        }
+
+
+class Response:
+    __slots__ = ('status', 'body')
+
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'{}')
+        except ValueError:
+            return {}
+
+
+class WSGISession:
+    """In-process requests through the WSGI handler, logged in with force_login.
+
+    Each simulated user gets its own REMOTE_ADDR so the per-IP rate limit
+    treats them as separate clients.
+    """
+
+    def __init__(self, user, remote_addr: str = '127.0.0.1'):
+        from django.conf import settings
+        from django.test import Client
+        hosts = [h for h in settings.ALLOWED_HOSTS if h and not h.startswith(('.', '*'))]
+        self.client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost', REMOTE_ADDR=remote_addr)
+        self.client.force_login(user)
+
+    def request(self, method: str, path: str, data: Optional[Dict] = None) -> Response:
+        body = json.dumps(data) if data is not None else None
+        kwargs = {'data': body, 'content_type': 'application/json'} if body is not None else {}
+        response = getattr(self.client, method.lower())(path, **kwargs)
+        return Response(response.status_code, response.content)
+
+    def close(self):
+        from django.db import connections
+        # Each simulated user thread opened its own database connection
+        connections.close_all()
+
+
+class HTTPSession:
+    """Requests over HTTP with a cookie jar, logged in through the login form"""
+
+    def __init__(self, base_url: str, username: str, password: str, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self._login(username, password)
+
+    def _csrf_token(self) -> str:
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def _login(self, username: str, password: str):
+        page = self.opener.open(f'{self.base_url}/accounts/login/', timeout=self.timeout).read().decode()
+        match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+        form = urllib.parse.urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': match.group(1) if match else self._csrf_token(),
+        }).encode()
+        request = urllib.request.Request(f'{self.base_url}/accounts/login/', data=form, headers={
+            'Referer': f'{self.base_url}/accounts/login/',
+        })
+        self.opener.open(request, timeout=self.timeout)
+        if not any(c.name == 'sessionid' for c in self.cookies):
+            raise RuntimeError(f'Login failed for {username}')
+
+    def request(self, method: str, path: str, data: Optional[Dict] = None) -> Response:
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(f'{self.base_url}{path}', data=body, method=method, headers={
+            'Content-Type': 'application/json',
+            'X-CSRFToken': self._csrf_token(),
+            'Referer': f'{self.base_url}/',
+        })
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return Response(response.status, response.read())
+        except urllib.error.HTTPError as e:
+            return Response(e.code, e.read())
+
+    def close(self):
+        pass
+
+
+class SimulatedUser:
+    """One user's session: a board of its own and the task ids it has seen"""
+
+    def __init__(self, session, stats: Stats, mix: Dict[str, int], rng: random.Random):
+        self.session = session
+        self.stats = stats
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.rng = rng
+        self.board_id = None
+        self.task_ids: List[str] = []
+        self.counter = 0
+
+    def _call(self, operation: str, method: str, path: str, data: Optional[Dict] = None) -> Optional[Response]:
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, path, data)
+        except Exception as e:
+            self.stats.record(operation, (time.perf_counter() - start) * 1000, None, True, e)
+            return None
+        self.stats.record(operation, (time.perf_counter() - start) * 1000, response.status, response.status >= 400)
+        return response
+
+    def setup(self) -> bool:
+        response = self._call('create_board', 'POST', '/api/boards/', {'name': 'Load test board'})
+        self.board_id = response.json().get('board_id') if response and response.status == 200 else None
+        return self.board_id is not None
+
+    def step(self):
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        if operation in ('update_task', 'delete_task') and not self.task_ids:
+            # Nothing known yet; read the board first like a real client would
+            operation = 'read_tasks'
+        start = time.perf_counter()
+        try:
+            getattr(self, operation)()
+        except Exception as e:
+            # A failure in the step's own logic, not the request; charge it to the step
+            self.stats.record(operation, (time.perf_counter() - start) * 1000, None, True, e)
+
+    def list_boards(self):
+        self._call('list_boards', 'GET', '/api/boards/list/')
+
+    def read_tasks(self):
+        response = self._call('read_tasks', 'GET', f'/api/boards/{self.board_id}/tasks/')
+        if response is not None and response.status == 200:
+            self.task_ids = [t['id'] for t in response.json().get('tasks', [])]
+
+    def create_task(self):
+        self.counter += 1
+        parent = self.rng.choice(self.task_ids) if self.task_ids and self.rng.random() < 0.5 else None
+        self._call('create_task', 'POST', '/api/boards/tasks/', {
+            'board_id': self.board_id,
+            'title': f'Load test task {self.counter}',
+            'parent_id': parent,
+        })
+
+    def update_task(self):
+        task_id = self.rng.choice(self.task_ids)
+        self._call('update_task', 'PUT', f'/api/boards/{self.board_id}/tasks/{task_id}/', {
+            'progress': self.rng.randint(0, 100),
+        })
+
+    def delete_task(self):
+        task_id = self.task_ids.pop(self.rng.randrange(len(self.task_ids)))
+        self._call('delete_task', 'DELETE', f'/api/boards/{self.board_id}/tasks/{task_id}/delete/')
+        # Children went with it; the next read refreshes the list
+        self.task_ids = []
+
+    def dashboard(self):
+        self._call('dashboard', 'GET', '/api/dashboard/')
+
+
+def run(session_factory, user_count: int, stages: List[Tuple[int, float]], duration: float,
+        mix: Dict[str, int], think_time: float = 0.0, seed: int = 0) -> Dict:
+    """Run the load test; session_factory(index) returns a logged-in session for user index
+
+    Sessions are created up front on the calling thread, so logins never
+    compete with the simulated traffic (or with each other, on SQLite).
+    """
+    offsets = start_offsets(stages)[:user_count]
+    stats = Stats()
+    sessions = []
+    for index in range(len(offsets)):
+        login_start = time.perf_counter()
+        try:
+            sessions.append(session_factory(index))
+        except Exception as e:
+            sessions.append(None)
+            stats.record('login', (time.perf_counter() - login_start) * 1000, None, True, e)
+
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def worker(index: int, offset: float):
+        session = sessions[index]
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            user = SimulatedUser(session, stats, mix, random.Random(seed + index))
+            if not user.setup():
+                return
+            while time.perf_counter() < deadline:
+                user.step()
+                if think_time:
+                    time.sleep(think_time * user.rng.uniform(0.5, 1.5))
+        finally:
+            session.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(i, offset), name=f'load-user-{i}', daemon=True)
+        for i, offset in enumerate(offsets) if sessions[i] is not None
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = stats.report(time.perf_counter() - start)
+    report['users'] = len(offsets)
+    return report
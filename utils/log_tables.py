@@ -0,0 +1,75 @@
+"""
+Hot/archive split and retention pruning for append-only log tables
+Work on any (hot model, archive model, timestamp field) pair whose archive
+has the hot table's columns; accounts.security_log applies them to the
+security log tables.
+"""
+from datetime import timedelta
+from typing import Dict
+from django.db import transaction
+from django.utils import timezone
+
+
+def delete_in_batches(queryset, order_field: str, batch_size: int) -> int:
+    """Delete matching rows oldest first, batch_size primary keys at a time"""
+    model = queryset.model
+    removed = 0
+    while True:
+        pks = list(queryset.order_by(order_field).values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return removed
+        removed += model.objects.filter(pk__in=pks).delete()[0]
+
+
+def archive_rows(model, archive_model, timestamp: str, hot_days: int, batch_size: int = 1000) -> int:
+    """Move rows older than hot_days from model to archive_model, one transaction per batch"""
+    cutoff = timezone.now() - timedelta(days=hot_days)
+    columns = [f.attname for f in archive_model._meta.concrete_fields]
+    pk_name = model._meta.pk.attname
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                model.objects.filter(**{f'{timestamp}__lt': cutoff})
+                .order_by(timestamp)
+                .values(*columns)[:batch_size]
+            )
+            if not rows:
+                return moved
+            archive_model.objects.bulk_create(
+                [archive_model(**row) for row in rows], batch_size=batch_size, ignore_conflicts=True
+            )
+            model.objects.filter(pk__in=[row[pk_name] for row in rows]).delete()
+        moved += len(rows)
+
+
+def prune_rows(tables, timestamp: str, rules: Dict, batch_size: int = 1000) -> int:
+    """Delete rows past their retention from each of tables
+
+    rules holds days to keep: 'default', plus optional 'severity' and
+    'event_type' overrides; an event_type override wins over a severity one.
+    """
+    now = timezone.now()
+
+    def older_than(days):
+        return {f'{timestamp}__lt': now - timedelta(days=int(days))}
+
+    by_type = rules.get('event_type', {})
+    by_severity = rules.get('severity', {})
+    removed = 0
+    for table in tables:
+        rows = table.objects.all()
+        for event_type, days in by_type.items():
+            removed += delete_in_batches(
+                rows.filter(event_type=event_type, **older_than(days)), timestamp, batch_size
+            )
+        rest = rows.exclude(event_type__in=list(by_type)) if by_type else rows
+        for severity, days in by_severity.items():
+            removed += delete_in_batches(
+                rest.filter(severity=severity, **older_than(days)), timestamp, batch_size
+            )
+        if 'default' in rules:
+            if by_severity:
+                rest = rest.exclude(severity__in=list(by_severity))
+            removed += delete_in_batches(rest.filter(**older_than(rules['default'])), timestamp, batch_size)
+    return removed
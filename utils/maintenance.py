@@ -0,0 +1,262 @@
+"""
+Parallel per-user maintenance jobs
+A UserJob does one user's storage work; UserJobRunner streams user ids in
+primary-key order, hands batches to a process pool, checkpoints the highest
+id below which every batch has finished (so an interrupted run resumes where
+it stopped) and reports throughput and ETA. UserJobCommand gives management
+commands the shared --workers/--chunk-size/--checkpoint/--dry-run options.
+"""
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from .storage_manifest import storage_manifest
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UserJob:
+    """One user's worth of maintenance work.
+
+    Subclasses set name (the checkpoint key) and implement process(user),
+    returning counters such as {'fixed': 1}. Jobs are pickled into worker
+    processes, so keep attributes to plain data and honour self.dry_run.
+    """
+
+    name = 'user_job'
+    # Columns loaded per user; None loads the whole row
+    user_fields: Optional[Tuple[str, ...]] = None
+
+    def __init__(self, dry_run: bool = False, **options):
+        self.dry_run = dry_run
+        self.options = options
+        self._messages: List[str] = []
+
+    def queryset(self):
+        return get_user_model().objects.all()
+
+    def load(self, ids: List[int]):
+        users = self.queryset().filter(pk__in=ids).order_by('pk')
+        return users.only(*self.user_fields) if self.user_fields else users
+
+    def log(self, message: str):
+        """Report a message from process(); printed by the parent process"""
+        self._messages.append(message)
+
+    def process(self, user) -> Optional[Dict[str, int]]:
+        raise NotImplementedError
+
+
+def run_batch(job: UserJob, ids: List[int]):
+    """Process one batch; runs in a worker process (or inline with one worker)"""
+    counters = Counter()
+    job._messages = []
+    for user in job.load(ids):
+        try:
+            counters.update(job.process(user) or {})
+            counters['users'] += 1
+        except Exception as e:
+            counters['errors'] += 1
+            job.log(f'User {user.pk}: {str(e)}')
+    # Pool workers exit without running atexit hooks
+    storage_manifest.flush()
+    return counters, job._messages
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+class Checkpoint:
+    """JSON resume file: last fully processed user id and counters so far"""
+
+    def __init__(self, path: Optional[str], job: UserJob):
+        self.path = path
+        self.key = {'job': job.name, 'dry_run': job.dry_run}
+        self.last_id = None
+        self.counters = Counter()
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if {k: data.get(k) for k in self.key} != self.key:
+            raise ValueError(f"Checkpoint {self.path} belongs to {data.get('job')} "
+                             f"(dry_run={data.get('dry_run')}), not {self.key['job']}")
+        self.last_id = data.get('last_id')
+        self.counters = Counter(data.get('counters', {}))
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({**self.key, 'last_id': self.last_id, 'counters': dict(self.counters),
+                       'updated_at': time.time()}, f)
+        # Atomic: a crash never leaves a half-written checkpoint
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UserJobRunner:
+    def __init__(self, job: UserJob, workers: int = 1, chunk_size: int = 500,
+                 checkpoint: Optional[str] = None, progress_interval: float = 10.0,
+                 on_message: Optional[Callable[[str], None]] = None,
+                 on_progress: Optional[Callable[[str], None]] = None):
+        self.job = job
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.checkpoint = Checkpoint(checkpoint, job)
+        self.progress_interval = progress_interval
+        self.on_message = on_message or logger.info
+        self.on_progress = on_progress or logger.info
+
+    def _batches(self):
+        ids = self.job.queryset().order_by('pk')
+        if self.checkpoint.last_id is not None:
+            ids = ids.filter(pk__gt=self.checkpoint.last_id)
+        ids = ids.values_list('pk', flat=True)
+        batch = []
+        for pk in ids.iterator(chunk_size=self.chunk_size):
+            batch.append(pk)
+            if len(batch) >= self.chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self) -> Counter:
+        resumed = self.checkpoint.load()
+        if resumed:
+            self.on_progress(f'Resuming {self.job.name} after user {self.checkpoint.last_id}')
+        users = self.job.queryset()
+        if self.checkpoint.last_id is not None:
+            users = users.filter(pk__gt=self.checkpoint.last_id)
+        self._remaining = users.count()
+        self._start = self._last_report = time.monotonic()
+        self._done = 0
+
+        if self.workers == 1:
+            for batch in self._batches():
+                self._finished(batch, run_batch(self.job, batch))
+                self._advance([batch[-1]])
+        else:
+            self._run_pool()
+
+        self._report(force=True)
+        self.checkpoint.clear()
+        return self.checkpoint.counters
+
+    def _run_pool(self):
+        # Batches in submission order; the checkpoint only moves past a batch
+        # once it and every batch before it have finished
+        pending: deque = deque()
+        finished = {}
+        # Spawned, not forked: a forked worker would share the parent's open
+        # database connection (the id stream is read while workers start)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                 initializer=_init_worker) as pool:
+            batches = self._batches()
+            futures = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(futures) < self.workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    futures[pool.submit(run_batch, self.job, batch)] = batch
+                    pending.append(batch[-1])
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = futures.pop(future)
+                    self._finished(batch, future.result())
+                    finished[batch[-1]] = True
+                completed = []
+                while pending and finished.pop(pending[0], False):
+                    completed.append(pending.popleft())
+                self._advance(completed)
+
+    def _finished(self, batch, result):
+        counters, messages = result
+        self.checkpoint.counters.update(counters)
+        for message in messages:
+            self.on_message(message)
+        self._done += len(batch)
+
+    def _advance(self, last_ids):
+        if last_ids:
+            self.checkpoint.last_id = last_ids[-1]
+            self.checkpoint.save()
+        self._report()
+
+    def _report(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        elapsed = now - self._start
+        rate = self._done / elapsed if elapsed else 0.0
+        left = max(self._remaining - self._done, 0)
+        if not left:
+            eta = '0s'
+        else:
+            eta = f'{left / rate:.0f}s' if rate else '?'
+        self.on_progress(f'{self.job.name}: {self._done}/{self._remaining} users, '
+                         f'{rate:.1f} users/s, ETA {eta}')
+
+
+class UserJobCommand(BaseCommand):
+    """Base for commands that run a UserJob over every user"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would change without writing anything',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes (1 runs in this process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users fetched and handed to a worker at a time',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='Resume file: progress is saved there and an interrupted run continues from it',
+        )
+
+    def run_job(self, job: UserJob, options) -> Counter:
+        runner = UserJobRunner(
+            job,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            checkpoint=options['checkpoint'],
+            on_message=self.stdout.write,
+            on_progress=lambda line: self.stdout.write(self.style.NOTICE(line)),
+        )
+        return runner.run()
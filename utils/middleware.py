@@ -7,7 +7,10 @@ from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .json_storage import json_storage
+from .json_storage import (
+    json_storage, user_sync, has_mirrored_changes,
+    USER_SYNC_FIELDS, PROFILE_SYNC_FIELDS,
+)
 from accounts.models import UserProfile, UserActivity
 
 User = get_user_model()
@@ -19,10 +22,14 @@ class JSONStorageMiddleware(MiddlewareMixin):
         """Process incoming requests"""
         # Add JSON storage manager to request
         request.json_storage = json_storage
+        # Coalesce user -> JSON syncs triggered while handling this request
+        user_sync.begin()
         return None
     
     def process_response(self, request, response):
         """Process outgoing responses"""
+        user_sync.end()
+        
         # Log API usage if it's an API endpoint
         if hasattr(request, 'user') and request.user.is_authenticated:
             if request.path.startswith('/accounts/api/'):
@@ -41,10 +48,13 @@ class JSONStorageMiddleware(MiddlewareMixin):
 
 # Signal handlers for automatic JSON storage sync
 @receiver(post_save, sender=User)
-def sync_user_to_json(sender, instance, created, **kwargs):
-    """Automatically sync user data to JSON when user is saved"""
+def sync_user_to_json(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Sync user data to JSON when a mirrored field changed"""
+    if raw:
+        return
     try:
-        json_storage.save_user_data(instance)
+        if has_mirrored_changes(instance, USER_SYNC_FIELDS, created, update_fields):
+            user_sync.schedule(instance)
         
         if created:
             # Create user profile if it doesn't exist
@@ -61,10 +71,13 @@ def sync_user_to_json(sender, instance, created, **kwargs):
         print(f"Error syncing user {instance.username} to JSON: {str(e)}")
 
 @receiver(post_save, sender=UserProfile)
-def sync_profile_to_json(sender, instance, **kwargs):
-    """Automatically sync user profile data to JSON when profile is saved"""
+def sync_profile_to_json(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Sync user profile data to JSON when a mirrored field changed"""
+    if raw:
+        return
     try:
-        json_storage.save_user_data(instance.user)
+        if has_mirrored_changes(instance, PROFILE_SYNC_FIELDS, created, update_fields):
+            user_sync.schedule(instance.user)
     except Exception as e:
         print(f"Error syncing profile for {instance.user.username} to JSON: {str(e)}")
 
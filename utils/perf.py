@@ -0,0 +1,174 @@
+"""
+Per-request performance instrumentation
+PerformanceMiddleware collects SQL, storage I/O, crypto and JSON timings for
+sampled requests and reports them in a Server-Timing header and one
+structured log line. Outside a sampled request span() returns a shared no-op
+object, so instrumented code costs one context-variable lookup.
+"""
+import contextvars
+import json
+import random
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+from django.conf import settings
+from django.db import connections
+import logging
+
+logger = logging.getLogger('perf')
+
+_current = contextvars.ContextVar('perf_metrics', default=None)
+
+# Span name -> (Server-Timing metric, what the count means)
+SERVER_TIMING_NAMES = {
+    'db': ('db', 'queries'),
+    'storage.read': ('storage-read', 'files read'),
+    'storage.write': ('storage-write', 'files written'),
+    'crypto.decrypt': ('decrypt', 'decryptions'),
+    'crypto.encrypt': ('encrypt', 'encryptions'),
+    'json.parse': ('json-parse', 'documents'),
+    'json.serialize': ('json-serialize', 'documents'),
+}
+
+
+class RequestMetrics:
+    """name -> [count, seconds, bytes] for one request"""
+
+    __slots__ = ('spans',)
+
+    def __init__(self):
+        self.spans = {}
+
+    def add(self, name: str, seconds: float, nbytes: int = 0):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [1, seconds, nbytes]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nbytes
+
+    def count(self, name: str) -> int:
+        entry = self.spans.get(name)
+        return entry[0] if entry else 0
+
+    def nbytes(self, name: str) -> int:
+        entry = self.spans.get(name)
+        return entry[2] if entry else 0
+
+    def as_dict(self) -> dict:
+        return {
+            name: {'count': count, 'ms': round(seconds * 1000, 3), 'bytes': nbytes}
+            for name, (count, seconds, nbytes) in self.spans.items()
+        }
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'nbytes', 'start')
+
+    def __init__(self, metrics: RequestMetrics, name: str):
+        self.metrics = metrics
+        self.name = name
+        self.nbytes = 0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add(self.name, perf_counter() - self.start, self.nbytes)
+        return False
+
+
+class _NoSpan:
+    # nbytes may be assigned by callers; the value is ignored
+    __slots__ = ('nbytes',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """``with span('storage.read') as s: ...; s.nbytes = len(data)``"""
+    metrics = _current.get()
+    if metrics is None:
+        return _NO_SPAN
+    return _Span(metrics, name)
+
+
+def current():
+    """Metrics of the request being measured, or None"""
+    return _current.get()
+
+
+@contextmanager
+def measure(sql: bool = True):
+    """Collect spans outside the middleware (tests, benchmarks): ``with measure() as m: ...``"""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            if sql:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_sql_wrapper))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add('db', perf_counter() - start)
+
+
+def server_timing(metrics: RequestMetrics, total: float) -> str:
+    parts = []
+    for name, (count, seconds, nbytes) in metrics.spans.items():
+        metric, unit = SERVER_TIMING_NAMES.get(name, (name.replace('.', '-'), 'calls'))
+        desc = f'{count} {unit}' + (f', {nbytes} bytes' if nbytes else '')
+        parts.append(f'{metric};dur={seconds * 1000:.2f};desc="{desc}"')
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+class PerformanceMiddleware:
+    """Measure a PERF_SAMPLE_RATE share of requests while PERF_INSTRUMENTATION is on.
+
+    Put it first in MIDDLEWARE so the total covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            return self.get_response(request)
+        if random.random() >= float(getattr(settings, 'PERF_SAMPLE_RATE', 1.0)):
+            return self.get_response(request)
+
+        start = perf_counter()
+        with measure() as metrics:
+            response = self.get_response(request)
+        total = perf_counter() - start
+
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(metrics, total)
+        if getattr(settings, 'PERF_LOG', True):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 3),
+                'spans': metrics.as_dict(),
+            }))
+        return response
@@ -0,0 +1,190 @@
+"""
+Opt-in request profiling
+ProfilingMiddleware profiles a PROFILING_SAMPLE_RATE share of requests, plus
+any request carrying a signed profiling token (X-Profile header or ?profile=)
+of a user who is still active staff. A ?profile= token is taken out of the
+query string before anything else sees the request, so it is not logged.
+Results are stored per URL name under PROFILING_DIR: collapsed stacks from the
+sampling profiler (.stacks) or cProfile dumps (.prof).
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import PermissionDenied
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'utils.profiling'
+
+
+def make_token(user) -> str:
+    """Signed token that turns profiling on for the requests that carry it (staff only)"""
+    if not (user.is_active and user.is_staff):
+        raise PermissionDenied('Profiling tokens are issued to staff only')
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def check_token(token: str) -> bool:
+    """Valid for PROFILING_TOKEN_MAX_AGE seconds after it was issued, while its user is active staff"""
+    max_age = int(getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600))
+    try:
+        user_id = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    from django.contrib.auth import get_user_model
+    return get_user_model().objects.filter(pk=user_id, is_active=True, is_staff=True).exists()
+
+
+def pop_query_token(request) -> Optional[str]:
+    """Remove ?profile= from the request's query string and return it"""
+    if 'profile=' not in request.META.get('QUERY_STRING', ''):
+        return None
+    query = request.GET.copy()
+    tokens = query.pop('profile', None)
+    query._mutable = False
+    request.GET = query
+    request.META['QUERY_STRING'] = query.urlencode()
+    return tokens[-1] if tokens else None
+
+
+def profiles_dir() -> Path:
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'logs' / 'profiles'))
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    base = str(settings.BASE_DIR)
+    if filename.startswith(base):
+        filename = os.path.relpath(filename, base)
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames and ' ' separates the count in collapsed stacks
+    return f'{code.co_name}@{filename}:{code.co_firstlineno}'.replace(';', ',').replace(' ', '_')
+
+
+class StackSampler:
+    """Samples one thread's stack every interval seconds into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[self.collapse(frame)] += 1
+
+    @staticmethod
+    def collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+def write_stacks(path: Path, counts: Dict[str, int]):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in counts.items():
+            f.write(f'{stack} {count}\n')
+
+
+def read_stacks(paths: Iterable[Path]) -> Counter:
+    """Merge collapsed-stack files into one Counter"""
+    merged = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    merged[stack] += int(count)
+    return merged
+
+
+class ProfilingMiddleware:
+    """Profile sampled or token-carrying requests; does nothing while PROFILING_ENABLED is off.
+
+    PROFILING_MODE 'sample' (default) records real stacks with little overhead;
+    'cprofile' records exact call counts but slows the request down noticeably.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _wanted(self, request, token: Optional[str]) -> bool:
+        token = token or request.headers.get('X-Profile')
+        if token:
+            return check_token(token)
+        rate = float(getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0))
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        # Stripped even while profiling is off: the token must not reach views or logs
+        token = pop_query_token(request)
+        if not getattr(settings, 'PROFILING_ENABLED', False) or not self._wanted(request, token):
+            return self.get_response(request)
+
+        mode = getattr(settings, 'PROFILING_MODE', 'sample')
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        else:
+            sampler = StackSampler(threading.get_ident(), float(getattr(settings, 'PROFILING_INTERVAL', 0.005)))
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            path = self._output_path(request, 'prof' if mode == 'cprofile' else 'stacks')
+            if mode == 'cprofile':
+                profiler.dump_stats(str(path))
+            else:
+                write_stacks(path, sampler.counts)
+            logger.info(f"Profiled {request.method} {request.path} in {elapsed_ms:.1f} ms -> {path}")
+        except OSError as e:
+            logger.error(f"Could not store profile for {request.path}: {str(e)}")
+        return response
+
+    def _output_path(self, request, extension: str) -> Path:
+        match = getattr(request, 'resolver_match', None)
+        name = (match.view_name if match and match.view_name else 'unresolved').replace(':', '.')
+        directory = profiles_dir() / name
+        os.makedirs(directory, exist_ok=True)
+        return directory / f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}.{extension}'
+
+
+def profile_files(url_name: Optional[str] = None, extension: str = 'stacks', since: Optional[float] = None):
+    root = profiles_dir()
+    pattern = f'{url_name}/*.{extension}' if url_name else f'*/*.{extension}'
+    for path in sorted(root.glob(pattern)):
+        if since is None or path.stat().st_mtime >= since:
+            yield path
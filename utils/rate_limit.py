@@ -0,0 +1,316 @@
+"""
+Sliding-window rate limiting and API quota enforcement
+Counters live in process memory by default; set RATE_LIMIT_BACKEND = 'cache'
+to share them across workers through the configured cache
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+from .helpers import get_client_ip
+
+DEFAULT_PLAN_LIMITS = {
+    'free': 60,
+    'basic': 300,
+    'pro': 1200,
+    'enterprise': 6000,
+}
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter (two fixed buckets, weighted by overlap).
+
+    Memory is O(1) per key, and a rejected hit is not counted so a throttled
+    client cannot keep pushing its own window forward.
+    """
+
+    # Drop idle local keys once the table grows past this size
+    MAX_LOCAL_KEYS = 100000
+
+    def __init__(self, backend: Optional[str] = None):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, list] = {}
+
+    @property
+    def backend(self) -> str:
+        return self._backend or getattr(settings, 'RATE_LIMIT_BACKEND', 'local')
+
+    def hit(self, key: str, limit: int, window: int, now: float = None) -> Tuple[bool, int]:
+        """Count one request for key; returns (allowed, retry_after_seconds)"""
+        now = time.time() if now is None else now
+        bucket, elapsed, previous, current = self._counts(key, window, now)
+
+        estimate = previous * (1 - elapsed / window) + current
+        if estimate + 1 > limit:
+            return False, self._retry_after(previous, current, limit, window, elapsed)
+
+        self._incr(key, bucket, window)
+        return True, 0
+
+    def record(self, key: str, window: int, now: float = None) -> float:
+        """Count one event for key unconditionally; returns the window estimate including it"""
+        now = time.time() if now is None else now
+        bucket, elapsed, previous, current = self._counts(key, window, now)
+        self._incr(key, bucket, window)
+        return previous * (1 - elapsed / window) + current + 1
+
+    def forget(self, key: str, window: int, now: float = None):
+        """Drop the counters of one key"""
+        if self.backend == 'cache':
+            now = time.time() if now is None else now
+            bucket = int(now // window)
+            cache.delete_many([self._cache_key(key, bucket - 1), self._cache_key(key, bucket)])
+        else:
+            with self._lock:
+                self._buckets.pop(key, None)
+
+    def _counts(self, key: str, window: int, now: float) -> Tuple[int, float, int, int]:
+        bucket = int(now // window)
+        elapsed = now - bucket * window
+        if self.backend == 'cache':
+            previous, current = self._cache_counts(key, bucket)
+        else:
+            previous, current = self._local_counts(key, bucket)
+        return bucket, elapsed, previous, current
+
+    def _incr(self, key: str, bucket: int, window: int):
+        if self.backend == 'cache':
+            self._cache_incr(key, bucket, window)
+        else:
+            with self._lock:
+                entry = self._buckets.get(key)
+                if entry is None or entry[0] != bucket:
+                    # Forgotten or pruned since it was read
+                    entry = self._buckets[key] = [bucket, 0, 0]
+                entry[2] += 1
+
+    def _retry_after(self, previous, current, limit, window, elapsed) -> int:
+        if current + 1 > limit or not previous:
+            # Nothing frees up before the current bucket becomes the previous one
+            wait = window - elapsed
+        else:
+            # Time at which the decaying previous bucket leaves room for one more hit
+            free_at = window * (1 - (limit - 1 - current) / previous)
+            wait = free_at - elapsed
+        return max(1, int(math.ceil(wait)))
+
+    def _local_counts(self, key: str, bucket: int) -> Tuple[int, int]:
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                if len(self._buckets) >= self.MAX_LOCAL_KEYS:
+                    self._prune(bucket)
+                entry = self._buckets[key] = [bucket, 0, 0]
+            elif entry[0] != bucket:
+                # Roll the window forward
+                previous = entry[2] if entry[0] == bucket - 1 else 0
+                entry[:] = [bucket, previous, 0]
+            return entry[1], entry[2]
+
+    def _prune(self, bucket: int):
+        stale = [k for k, entry in self._buckets.items() if entry[0] < bucket - 1]
+        for k in stale:
+            del self._buckets[k]
+
+    def _cache_key(self, key: str, bucket: int) -> str:
+        return f"rl:{key}:{bucket}"
+
+    def _cache_counts(self, key: str, bucket: int) -> Tuple[int, int]:
+        counts = cache.get_many([self._cache_key(key, bucket - 1), self._cache_key(key, bucket)])
+        return (
+            int(counts.get(self._cache_key(key, bucket - 1), 0)),
+            int(counts.get(self._cache_key(key, bucket), 0)),
+        )
+
+    def _cache_incr(self, key: str, bucket: int, window: int):
+        cache_key = self._cache_key(key, bucket)
+        if not cache.add(cache_key, 1, timeout=window * 2):
+            try:
+                cache.incr(cache_key)
+            except ValueError:
+                cache.set(cache_key, 1, timeout=window * 2)
+
+    def reset(self):
+        """Forget all local counters"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class PlanCache:
+    """user_id -> subscription_plan, filled from already-loaded user objects"""
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._plans: Dict[object, Tuple[str, float]] = {}
+
+    def get(self, user_id) -> Optional[str]:
+        entry = self._plans.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def remember(self, user_id, plan: str):
+        self._plans[user_id] = (plan, time.monotonic() + self.ttl)
+
+    def forget(self, user_id):
+        self._plans.pop(user_id, None)
+
+
+def rate_limit_window() -> int:
+    return int(getattr(settings, 'RATE_LIMIT_WINDOW', 60))
+
+
+def api_quota_period() -> int:
+    return int(getattr(settings, 'API_QUOTA_PERIOD', 30 * 24 * 3600))
+
+
+def api_quota_window(now: float = None) -> Tuple[int, int]:
+    """(index of the current api_calls_limit period, seconds until it ends)"""
+    now = time.time() if now is None else now
+    period = api_quota_period()
+    index = int(now // period)
+    return index, max(1, math.ceil((index + 1) * period - now))
+
+
+def current_api_quota_period() -> int:
+    """Default of CustomUser.api_calls_period: new accounts start in the current period"""
+    return api_quota_window()[0]
+
+
+def plan_limit(plan: Optional[str]) -> int:
+    """Requests per window allowed for a subscription plan"""
+    limits = getattr(settings, 'RATE_LIMIT_PLANS', DEFAULT_PLAN_LIMITS)
+    if plan is None:
+        # Plan not known without a DB hit; the throttle applies the exact limit later
+        return max(limits.values())
+    return limits.get(plan, limits.get('free', min(limits.values())))
+
+
+def _token_user_id(request) -> Optional[object]:
+    """user_id claim of a valid Bearer token, verified without touching the DB"""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    parts = header.split()
+    if len(parts) != 2 or parts[0] not in settings.SIMPLE_JWT.get('AUTH_HEADER_TYPES', ('Bearer',)):
+        return None
+    try:
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken(parts[1])
+    except Exception:
+        return None
+    return token.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
+
+
+def request_identity(request) -> Tuple[str, Optional[object]]:
+    """Cheap client key for a request and the user id if it is known"""
+    user_id = _token_user_id(request)
+    if user_id is not None:
+        return f"user:{user_id}", user_id
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        return f"session:{hashlib.sha1(session_key.encode()).hexdigest()[:16]}", None
+    return f"ip:{get_client_ip(request)}", None
+
+
+def rate_limited_response(retry_after: int) -> JsonResponse:
+    response = JsonResponse(
+        {'error': 'Rate limit exceeded', 'retry_after': retry_after},
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    """Reject abusive API clients before sessions, auth or storage run.
+
+    Every request under RATE_LIMIT_PATH_PREFIXES is counted against its client
+    IP (REMOTE_ADDR, or the X-Forwarded-For entry added by one of the
+    TRUSTED_PROXY_COUNT proxies; never one the client wrote) and against its
+    credential: the JWT user at its plan rate, a session
+    cookie at the highest plan rate (the plan is not known before the session
+    is loaded), or an anonymous IP at RATE_LIMIT_ANONYMOUS. Place it near the
+    top of MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if getattr(settings, 'RATE_LIMIT_ENABLED', True) and self._is_limited_path(request.path):
+            window = rate_limit_window()
+
+            allowed, retry_after = limiter.hit(
+                f"addr:{get_client_ip(request)}",
+                int(getattr(settings, 'RATE_LIMIT_PER_IP', 600)),
+                window
+            )
+            if not allowed:
+                return rate_limited_response(retry_after)
+
+            key, user_id = request_identity(request)
+            if user_id is not None:
+                limit = plan_limit(plan_cache.get(user_id))
+            elif key.startswith('session:'):
+                limit = plan_limit(None)
+            else:
+                limit = int(getattr(settings, 'RATE_LIMIT_ANONYMOUS', 60))
+            allowed, retry_after = limiter.hit(key, limit, window)
+            if not allowed:
+                return rate_limited_response(retry_after)
+            request.rate_limit_key = key
+
+        return self.get_response(request)
+
+    def _is_limited_path(self, path: str) -> bool:
+        prefixes = getattr(settings, 'RATE_LIMIT_PATH_PREFIXES', ('/api/', '/accounts/api/'))
+        return path.startswith(tuple(prefixes))
+
+
+class PlanRateThrottle(BaseThrottle):
+    """DRF throttle applying per-plan rates and the api_calls_limit quota.
+
+    Requests already counted by RateLimitMiddleware under the same user key
+    are not counted twice. Allowed calls are charged to api_calls_used when
+    API_QUOTA_COUNT_REQUESTS is on; the quota resets every API_QUOTA_PERIOD,
+    and a refused call is told to retry when the current period ends.
+    """
+
+    def __init__(self):
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return True
+
+        plan = getattr(user, 'subscription_plan', None)
+        plan_cache.remember(user.pk, plan)
+
+        key = f"user:{user.pk}"
+        if getattr(request._request, 'rate_limit_key', None) != key:
+            allowed, retry_after = limiter.hit(key, plan_limit(plan), rate_limit_window())
+            if not allowed:
+                self.retry_after = retry_after
+                return False
+
+        if hasattr(user, 'can_make_api_call'):
+            if not user.can_make_api_call():
+                self.retry_after = api_quota_window()[1]
+                return False
+            if getattr(settings, 'API_QUOTA_COUNT_REQUESTS', True):
+                user.increment_api_usage()
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+# Global instances
+limiter = SlidingWindowLimiter()
+plan_cache = PlanCache()
@@ -9,6 +9,8 @@ from typing import Dict, List, Any, Optional
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from cryptography.fernet import Fernet
+from .perf import span
+from .storage_manifest import storage_manifest
 import base64
 
 User = get_user_model()
@@ -51,14 +53,18 @@ class SecureJSONStorage:
     
     def _encrypt_data(self, data: Dict[str, Any]) -> bytes:
         """Encrypt data"""
-        json_data = json.dumps(data, default=str, ensure_ascii=False)
-        return self.cipher.encrypt(json_data.encode())
+        with span('json.serialize'):
+            json_data = json.dumps(data, default=str, ensure_ascii=False)
+        with span('crypto.encrypt'):
+            return self.cipher.encrypt(json_data.encode())
     
     def _decrypt_data(self, encrypted_data: bytes) -> Dict[str, Any]:
         """Decrypt data"""
         try:
-            decrypted = self.cipher.decrypt(encrypted_data)
-            return json.loads(decrypted.decode())
+            with span('crypto.decrypt'):
+                decrypted = self.cipher.decrypt(encrypted_data)
+            with span('json.parse'):
+                return json.loads(decrypted.decode())
         except Exception:
             return {}
     
@@ -66,8 +72,10 @@ class SecureJSONStorage:
         """Read and decrypt file"""
         try:
             if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    encrypted_data = f.read()
+                with span('storage.read') as timing:
+                    with open(file_path, 'rb') as f:
+                        encrypted_data = f.read()
+                    timing.nbytes = len(encrypted_data)
                 return self._decrypt_data(encrypted_data)
             return {}
         except Exception:
@@ -77,9 +85,12 @@ class SecureJSONStorage:
         """Encrypt and write file"""
         try:
             encrypted_data = self._encrypt_data(data)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
+            with span('storage.write') as timing:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(encrypted_data)
+                timing.nbytes = len(encrypted_data)
+            storage_manifest.record(file_path, data, encrypted_data)
             return True
         except Exception:
             return False
@@ -116,41 +127,51 @@ class SecureJSONStorage:
     
     def save_project_data(self, user_id: int, project_data: Dict[str, Any]) -> bool:
         """Save project data for specific user"""
+        return self.save_projects_data(user_id, [project_data])
+    
+    def save_projects_data(self, user_id: int, projects: List[Dict[str, Any]]) -> bool:
+        """Append several projects with one read and one write of the file"""
         file_path = self._get_file_path('projects', user_id)
         existing_data = self._read_secure_file(file_path)
         
         if 'projects' not in existing_data:
             existing_data = {'projects': [], 'updated_at': None}
         
-        project_data['id'] = len(existing_data['projects']) + 1
-        project_data['created_at'] = datetime.now().isoformat()
-        project_data['owner_id'] = user_id
-        
-        existing_data['projects'].append(project_data)
-        existing_data['updated_at'] = datetime.now().isoformat()
+        now = datetime.now().isoformat()
+        for project_data in projects:
+            project_data['id'] = len(existing_data['projects']) + 1
+            project_data['created_at'] = now
+            project_data['owner_id'] = user_id
+            existing_data['projects'].append(project_data)
+        existing_data['updated_at'] = now
         
         return self._write_secure_file(file_path, existing_data)
     
     def save_task_data(self, user_id: int, task_data: Dict[str, Any]) -> bool:
         """Save task data with hierarchical structure"""
+        return self.save_tasks_data(user_id, [task_data])
+    
+    def save_tasks_data(self, user_id: int, tasks: List[Dict[str, Any]]) -> bool:
+        """Append several tasks with one read and one write of the file"""
         file_path = self._get_file_path('tasks', user_id)
         existing_data = self._read_secure_file(file_path)
         
         if 'tasks' not in existing_data:
             existing_data = {'tasks': [], 'updated_at': None}
         
-        # Generate task number if not provided
-        if 'task_number' not in task_data:
-            task_data['task_number'] = str(len(existing_data['tasks']) + 1)
-        
-        task_data['id'] = len(existing_data['tasks']) + 1
-        task_data['created_at'] = datetime.now().isoformat()
-        task_data['owner_id'] = user_id
-        task_data['progress_percentage'] = task_data.get('progress_percentage', 0)
-        task_data['status'] = task_data.get('status', 'not_started')
-        
-        existing_data['tasks'].append(task_data)
-        existing_data['updated_at'] = datetime.now().isoformat()
+        now = datetime.now().isoformat()
+        for task_data in tasks:
+            # Generate task number if not provided
+            if 'task_number' not in task_data:
+                task_data['task_number'] = str(len(existing_data['tasks']) + 1)
+            
+            task_data['id'] = len(existing_data['tasks']) + 1
+            task_data['created_at'] = now
+            task_data['owner_id'] = user_id
+            task_data['progress_percentage'] = task_data.get('progress_percentage', 0)
+            task_data['status'] = task_data.get('status', 'not_started')
+            existing_data['tasks'].append(task_data)
+        existing_data['updated_at'] = now
         
         return self._write_secure_file(file_path, existing_data)
     
@@ -204,9 +225,9 @@ class SecureJSONStorage:
         return self._write_secure_file(file_path, data)
     
     def get_user_connections(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get user connections"""
-        user_data = self.get_user_data(user_id)
-        return user_data.get('connections', [])
+        """Get user connections (kept in the UserConnection table, not the user file)"""
+        from core.models import UserConnection
+        return [c.as_dict(user_id) for c in UserConnection.objects.involving(user_id)]
     
     def get_user_automations(self, user_id: int) -> List[Dict[str, Any]]:
         """Get user automations"""
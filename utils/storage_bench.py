@@ -0,0 +1,148 @@
+"""
+Synthetic data and timing helpers for the bench_storage command
+Boards hold hierarchical task trees of a given depth and fan-out, written in
+one file per user (the bulk path) rather than through save_board_task, which
+re-reads and re-encrypts the whole file per task.
+"""
+import math
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+STATUSES = ['Not Started', 'in_progress', 'completed']
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """Latency percentiles (ms) and throughput of one operation"""
+    values = sorted(durations)
+    total = sum(values)
+    return {
+        'iterations': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'mean_ms': round(total / len(values) * 1000, 3) if values else 0.0,
+        'ops_per_sec': round(len(values) / total, 1) if total else 0.0,
+    }
+
+
+def time_operation(fn: Callable[[int], Any], iterations: int) -> Dict[str, float]:
+    durations = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def generate_task_tree(board_id: str, owner_id: int, count: int, depth: int, fanout: int,
+                       rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+    """count tasks in breadth-first order, numbered the way BoardStorage numbers them.
+
+    Each task gets up to fanout children until depth levels are reached; once
+    every open slot is filled a new root starts the next tree.
+    """
+    rng = rng or random.Random(0)
+    base = datetime(2024, 1, 1)
+    tasks: List[Dict[str, Any]] = []
+    queue: deque = deque()
+    roots = 0
+
+    def add(parent, number, level):
+        status = rng.choice(STATUSES)
+        index = len(tasks)
+        task = {
+            'id': f'task_{index + 1}_{board_id}',
+            'parent_id': parent['id'] if parent else None,
+            'task_number': number,
+            'board_id': board_id,
+            'owner_id': owner_id,
+            'title': f'Task {number}',
+            'status': status,
+            'progress': 100 if status == 'completed' else rng.randint(0, 90),
+            # renumbering orders siblings by created_at
+            'created_at': (base + timedelta(seconds=index)).isoformat(),
+            'end_date': (base + timedelta(days=rng.randint(1, 365))).isoformat(),
+        }
+        tasks.append(task)
+        if level < depth:
+            queue.append((task, level))
+
+    while len(tasks) < count:
+        if not queue:
+            roots += 1
+            add(None, str(roots), 1)
+            continue
+        parent, level = queue.popleft()
+        for i in range(1, fanout + 1):
+            if len(tasks) >= count:
+                break
+            add(parent, f"{parent['task_number']}.{i}", level + 1)
+    return tasks
+
+
+def seed_user(board_storage, secure_storage, json_storage, user, boards: int, tasks: int,
+              depth: int, fanout: int, rng: random.Random) -> List[str]:
+    """Write one user's boards, board tasks and flat task lists; returns the board ids"""
+    now = datetime.now().isoformat()
+    board_ids = [f'board_bench_{user.id}_{b}' for b in range(boards)]
+    board_storage._write_secure_file(board_storage._get_file_path('boards', user.id), {
+        'boards': [{
+            'id': board_id, 'name': f'Board {board_id}', 'description': '', 'type': 'mindmap',
+            'owner_id': user.id, 'created_at': now, 'updated_at': now, 'settings': {},
+            'task_counter': 0, 'project_counter': 0,
+        } for board_id in board_ids],
+        'user_id': user.id,
+        'updated_at': now,
+    })
+
+    per_board = [tasks // boards + (1 if b < tasks % boards else 0) for b in range(boards)]
+    board_tasks = {}
+    all_tasks = []
+    for board_id, count in zip(board_ids, per_board):
+        tree = generate_task_tree(board_id, user.id, count, depth, fanout, rng)
+        board_tasks[board_id] = {'tasks': tree, 'updated_at': now, 'user_id': user.id}
+        all_tasks.extend(tree)
+    board_storage._write_secure_file(board_storage._get_file_path('board_tasks', user.id), board_tasks)
+
+    # The dashboard aggregates the flat task list of SecureJSONStorage
+    flat = [dict(task, id=i + 1, progress_percentage=task['progress'])
+            for i, task in enumerate(all_tasks)]
+    secure_storage._write_secure_file(secure_storage._get_file_path('tasks', user.id),
+                                      {'tasks': flat, 'updated_at': now})
+    secure_storage.save_user_data(user)
+    json_storage._write_json_file(json_storage._get_task_file_path(user.id), {
+        'tasks': [dict(task, id=i + 1, user_id=user.id) for i, task in enumerate(all_tasks)],
+        'updated_at': now,
+    })
+    json_storage.save_user_data(user)
+    return board_ids
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Operations whose p95 grew by more than tolerance (0.2 = 20%) against the baseline"""
+    regressions = []
+    for name, current in report.get('operations', {}).items():
+        previous = baseline.get('operations', {}).get(name)
+        if not previous or not previous.get('p95_ms'):
+            continue
+        ratio = current['p95_ms'] / previous['p95_ms']
+        if ratio > 1 + tolerance:
+            regressions.append({
+                'operation': name,
+                'baseline_p95_ms': previous['p95_ms'],
+                'p95_ms': current['p95_ms'],
+                'ratio': round(ratio, 2),
+            })
+    return regressions
@@ -0,0 +1,360 @@
+"""
+Storage manifest
+Every JSON storage write records the file's record count, size, modified
+time and content checksum. Entries are buffered and upserted in bulk, like
+the usage counters, so storage stats, integrity validation and per-user
+usage are database queries instead of walks that open and parse every file.
+rebuild() rescans the files on disk into the manifest; `setup_data --full`
+runs it, which also backfills files written before the manifest existed.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, Q, Sum
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Storage roots under BASE_DIR; secure_data files are encrypted
+STORAGES = ('data', 'secure_data')
+
+# Files holding one record, valid when these keys are present
+SINGLE_RECORD_TYPES = {
+    'users': ('user_id', 'email'),
+    'analytics': (),
+}
+
+FileKey = Tuple[str, str, str]
+
+
+def file_key(path: str) -> Optional[FileKey]:
+    """(storage, data_type, owner_key) of a storage file, or None for other files"""
+    path = os.path.abspath(path)
+    directory, filename = os.path.split(path)
+    root, data_type = os.path.split(directory)
+    storage = os.path.basename(root)
+    if storage not in STORAGES or os.path.dirname(root) != os.path.abspath(str(settings.BASE_DIR)):
+        return None
+    if filename.startswith('_') or not filename.endswith('.json'):
+        return None
+    prefix, _, owner_key = filename[:-len('.json')].rpartition('_')
+    if not prefix or not owner_key:
+        return None
+    return storage, data_type, owner_key
+
+
+def count_records(data_type: str, data) -> int:
+    """Records in a parsed storage file; a single-record file missing its keys counts 0"""
+    if not isinstance(data, dict):
+        return -1
+    if data_type in SINGLE_RECORD_TYPES:
+        return 1 if all(k in data for k in SINGLE_RECORD_TYPES[data_type]) else 0
+    if data_type.startswith('board_'):
+        # {board_id: {'tasks': [...]}, ...}
+        key = data_type[len('board_'):]
+        return sum(len(v.get(key, [])) for v in data.values() if isinstance(v, dict))
+    records = data.get(data_type, [])
+    return len(records) if isinstance(records, list) else 0
+
+
+def owner_keys(user_id: int) -> Dict[str, str]:
+    """storage -> owner_key of a user's files"""
+    from .secure_json_storage import secure_storage
+    return {'data': str(user_id), 'secure_data': secure_storage._get_user_hash(user_id)}
+
+
+class StorageManifest:
+    """Buffered manifest updates plus the queries that read it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[FileKey, Dict] = {}
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'STORAGE_MANIFEST_ENABLED', True)
+
+    @property
+    def flush_interval(self) -> float:
+        return float(getattr(settings, 'STORAGE_MANIFEST_FLUSH_INTERVAL', 5))
+
+    @property
+    def max_pending(self) -> int:
+        return int(getattr(settings, 'STORAGE_MANIFEST_MAX_PENDING', 1000))
+
+    def _entry(self, data_type: str, path: str, data, raw: bytes) -> Dict:
+        stat = os.stat(path)
+        return {
+            'records': count_records(data_type, data),
+            'size': stat.st_size,
+            'modified_at': datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc),
+            'checksum': hashlib.sha256(raw).hexdigest(),
+            # Used by flush() to tell whether the file changed since
+            'mtime_ns': stat.st_mtime_ns,
+            'prefix': os.path.basename(path)[:-len('.json')].rpartition('_')[0],
+        }
+
+    def record(self, path: str, data, raw: bytes):
+        """Note a file just written with these contents (raw: the bytes on disk)"""
+        if not self.enabled:
+            return
+        key = file_key(path)
+        if key is None:
+            return
+        try:
+            entry = self._entry(key[1], path, data, raw)
+        except OSError:
+            return
+        with self._lock:
+            self._pending[key] = entry
+            size = len(self._pending)
+        if size >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _take(self) -> Dict[FileKey, Dict]:
+        with self._lock:
+            taken, self._pending = self._pending, {}
+        return taken
+
+    def _restore(self, entries: Dict[FileKey, Dict]):
+        with self._lock:
+            for key, entry in entries.items():
+                # A newer write of the same file wins
+                self._pending.setdefault(key, entry)
+
+    def forget(self, paths: Iterable[str]) -> int:
+        """Drop the entries of storage files that were removed; returns how many rows went"""
+        if not self.enabled:
+            return 0
+        keys = {key for key in map(file_key, paths) if key is not None}
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+        from core.models import StorageManifestEntry
+        keys, deleted = list(keys), 0
+        for start in range(0, len(keys), 100):
+            condition = Q()
+            for storage, data_type, owner_key in keys[start:start + 100]:
+                condition |= Q(storage=storage, data_type=data_type, owner_key=owner_key)
+            deleted += StorageManifestEntry.objects.filter(condition).delete()[0]
+        return deleted
+
+    def discard(self) -> int:
+        """Drop pending entries without writing them; returns how many were dropped"""
+        return len(self._take())
+
+    def _current(self, entries: Dict[FileKey, Dict]) -> Tuple[Dict[FileKey, Dict], list]:
+        """Split off entries whose file changed or vanished since they were buffered.
+
+        A changed file was written again, possibly by another process whose
+        own (newer) entry must not be overwritten by this one.
+        """
+        current, vanished = {}, []
+        for key, entry in entries.items():
+            storage, data_type, owner_key = key
+            path = os.path.join(settings.BASE_DIR, storage, data_type, f'{entry["prefix"]}_{owner_key}.json')
+            try:
+                stat = os.stat(path)
+            except OSError:
+                vanished.append(key)
+                continue
+            if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+                current[key] = entry
+        return current, vanished
+
+    def _save(self, entries: Dict[FileKey, Dict], model=None):
+        """Upsert entries; a row already holding a newer write is left alone"""
+        if model is None:
+            from core.models import StorageManifestEntry as model
+        fields = ['records', 'size', 'modified_at', 'checksum']
+        connection = connections[router.db_for_write(model)]
+        rows = [
+            (s, t, k, entry['records'], entry['size'], entry['modified_at'], entry['checksum'])
+            for (s, t, k), entry in entries.items()
+        ]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            # No conditional upsert; _current() already dropped stale entries
+            model.objects.bulk_create(
+                [model(storage=row[0], data_type=row[1], owner_key=row[2],
+                       **dict(zip(fields, row[3:]))) for row in rows],
+                batch_size=500, update_conflicts=True,
+                unique_fields=['storage', 'data_type', 'owner_key'], update_fields=fields,
+            )
+            return
+        qn = connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        columns = ['storage', 'data_type', 'owner_key'] + fields
+        sql_head = (f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES ")
+        sql_tail = (
+            f" ON CONFLICT ({qn('storage')}, {qn('data_type')}, {qn('owner_key')}) DO UPDATE SET "
+            + ', '.join(f'{qn(f)} = excluded.{qn(f)}' for f in fields)
+            + f" WHERE excluded.{qn('modified_at')} >= {table}.{qn('modified_at')}"
+        )
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        with connection.cursor() as cursor:
+            # 100 rows stay under SQLite's 999 parameter limit
+            for start in range(0, len(rows), 100):
+                batch = rows[start:start + 100]
+                params = []
+                for row in batch:
+                    params.extend(row[:5])
+                    params.append(connection.ops.adapt_datetimefield_value(row[5]))
+                    params.append(row[6])
+                cursor.execute(sql_head + ', '.join([placeholders] * len(batch)) + sql_tail, params)
+
+    def flush(self) -> int:
+        """Write pending entries; returns how many were written"""
+        self._last_flush = time.monotonic()
+        entries = self._take()
+        if not entries:
+            return 0
+        current, vanished = self._current(entries)
+        try:
+            from core.models import StorageManifestEntry
+            with transaction.atomic():
+                self._save(current)
+                for storage, data_type, owner_key in vanished:
+                    StorageManifestEntry.objects.filter(
+                        storage=storage, data_type=data_type, owner_key=owner_key,
+                    ).delete()
+        except Exception as e:
+            logger.error(f"Storage manifest flush failed, will retry: {str(e)}")
+            self._restore(entries)
+            return 0
+        return len(current)
+
+    def _scan_file(self, storage: str, data_type: str, path: str) -> Dict:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        try:
+            if storage == 'secure_data':
+                from .secure_json_storage import secure_storage
+                data = json.loads(secure_storage.cipher.decrypt(raw).decode())
+            else:
+                data = json.loads(raw.decode('utf-8'))
+        except Exception:
+            data = None
+        return self._entry(data_type, path, data, raw)
+
+    def rebuild(self, storages: Iterable[str] = STORAGES,
+                on_progress: Optional[Callable[[str], None]] = None, model=None) -> int:
+        """Rescan every file of the given storages into the manifest
+
+        Files are read outside any transaction and saved 500 at a time, so
+        writers are only held up for one batch. Rows of files that are gone
+        are dropped at the end; rows written since the scan began are kept.
+        """
+        if model is None:
+            from core.models import StorageManifestEntry as model
+        storages = list(storages)
+        started = datetime.now(tz=dt_timezone.utc)
+        seen = set()
+        batch = {}
+
+        def save_batch():
+            with transaction.atomic(using=router.db_for_write(model)):
+                self._save(batch, model)
+            seen.update(batch)
+            batch.clear()
+
+        for storage in storages:
+            root = os.path.join(settings.BASE_DIR, storage)
+            if not os.path.isdir(root):
+                continue
+            for data_type in sorted(os.listdir(root)):
+                directory = os.path.join(root, data_type)
+                if not os.path.isdir(directory):
+                    continue
+                for filename in os.listdir(directory):
+                    path = os.path.join(directory, filename)
+                    key = file_key(path)
+                    if key is None or not os.path.isfile(path):
+                        continue
+                    try:
+                        batch[key] = self._scan_file(storage, data_type, path)
+                    except OSError:
+                        # Removed since it was listed
+                        continue
+                    if len(batch) >= 500:
+                        save_batch()
+                if on_progress:
+                    on_progress(f'{storage}/{data_type}: {len(seen) + len(batch)} files scanned')
+        save_batch()
+
+        stale = [
+            pk for pk, *key in model.objects.filter(storage__in=storages, modified_at__lt=started)
+            .values_list('pk', 'storage', 'data_type', 'owner_key').iterator(chunk_size=2000)
+            if tuple(key) not in seen
+        ]
+        for start in range(0, len(stale), 500):
+            model.objects.filter(pk__in=stale[start:start + 500]).delete()
+        return len(seen)
+
+    def totals(self) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """(storage, data_type) -> files, records and bytes"""
+        from core.models import StorageManifestEntry
+        self.flush()
+        rows = (StorageManifestEntry.objects.values('storage', 'data_type')
+                .annotate(files=Count('id'), records=Sum('records', filter=Q(records__gt=0)), size=Sum('size')))
+        return {
+            (row['storage'], row['data_type']): {
+                'files': row['files'], 'records': row['records'] or 0, 'size': row['size'] or 0,
+            }
+            for row in rows
+        }
+
+    def usage(self, user_id: int) -> Dict:
+        """A user's files across both storages: bytes in total and records per storage/type"""
+        from core.models import StorageManifestEntry
+        self.flush()
+        keys = owner_keys(user_id)
+        rows = StorageManifestEntry.objects.filter(
+            Q(storage='data', owner_key=keys['data']) | Q(storage='secure_data', owner_key=keys['secure_data'])
+        ).values_list('storage', 'data_type', 'records', 'size')
+        usage = {'bytes': 0, 'records': {}}
+        for storage, data_type, records, size in rows:
+            usage['bytes'] += size
+            usage['records'][f'{storage}/{data_type}'] = max(records, 0)
+        return usage
+
+    def within_quota(self, user_id: int, limit_bytes: int) -> bool:
+        return self.usage(user_id)['bytes'] <= limit_bytes
+
+    def user_file_issues(self, users, storage: str = 'data') -> list:
+        """Integrity issues of each user's profile file, as read from the manifest"""
+        from core.models import StorageManifestEntry
+        self.flush()
+        entries = dict(StorageManifestEntry.objects.filter(storage=storage, data_type='users')
+                       .values_list('owner_key', 'records'))
+        issues = []
+        for user_id, username in users.order_by('pk').values_list('pk', 'username').iterator(chunk_size=2000):
+            records = entries.get(owner_keys(user_id)[storage])
+            if records is None:
+                issues.append(f"Missing user data file for user {username}")
+            elif records < 0:
+                issues.append(f"Corrupted JSON file for user {username}")
+            elif records == 0:
+                issues.append(f"Invalid user data structure for user {username}")
+        return issues
+
+
+# Global instance
+storage_manifest = StorageManifest()
+
+
+def _flush_at_exit():
+    try:
+        storage_manifest.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,190 @@
+"""
+Bulk storage migrations
+A StorageMigration is a UserJob that moves one or more record collections
+from a source format to a target format. Each Collection reads a user's
+source file once, transforms every record in memory, writes the target once
+and re-counts the target to verify that the expected records arrived. Runs
+go through UserJobRunner, so they use worker processes, checkpoints and the
+usual --dry-run. A future format change only needs new Collection
+definitions.
+"""
+import json
+import os
+from typing import Callable, Dict, List, Optional, Sequence
+from .json_storage import json_storage
+from .maintenance import UserJob
+from .secure_json_storage import secure_storage
+
+
+class Collection:
+    """How one record type of one user moves to its new format.
+
+    read(user_id) returns the source records, or None when the user has no
+    source file, and raises ValueError on a source it cannot parse.
+    write(user, records) stores every record in one write and returns success.
+    count(user_id) returns the number of records in the target.
+    When replace is set the target ends up holding exactly the migrated
+    records; otherwise they are appended to what is already there, and
+    pending(user_id, records) must return only the records the target does
+    not hold yet, so a rerun or a replayed batch never duplicates anything.
+    All of them must be module-level callables so the job can be sent to workers.
+    """
+
+    def __init__(self, name: str, read: Callable, write: Callable, count: Callable,
+                 replace: bool = False, pending: Optional[Callable] = None):
+        if not replace and pending is None:
+            raise ValueError(f'Appending collection {name} needs pending() to stay idempotent')
+        self.name = name
+        self.read = read
+        self.write = write
+        self.count = count
+        self.replace = replace
+        self.pending = pending
+
+
+class StorageMigration(UserJob):
+    """Run every collection for each user; counters are records migrated per collection"""
+
+    name = 'storage_migration'
+    collections: Sequence[Collection] = ()
+
+    def process(self, user):
+        counters = {}
+        for collection in self.collections:
+            try:
+                records = collection.read(user.id)
+            except ValueError as e:
+                self.log(f'  ✗ Skipped invalid {collection.name} source for user {user.id}: {str(e)}')
+                counters['invalid'] = counters.get('invalid', 0) + 1
+                continue
+            if records is None:
+                continue
+            if collection.pending is not None:
+                fresh = collection.pending(user.id, records)
+                if len(fresh) < len(records):
+                    counters['already_migrated'] = counters.get('already_migrated', 0) + len(records) - len(fresh)
+                records = fresh
+                if not records:
+                    continue
+
+            if self.dry_run:
+                counters[collection.name] = counters.get(collection.name, 0) + len(records)
+                continue
+
+            before = 0 if collection.replace else collection.count(user.id)
+            if not collection.write(user, records):
+                self.log(f'  ✗ Failed to write {collection.name} for user {user.id}')
+                counters['failed'] = counters.get('failed', 0) + 1
+                continue
+
+            # Verify: the target holds exactly what was there plus what was migrated
+            after = collection.count(user.id)
+            if after != before + len(records):
+                self.log(f'  ✗ {collection.name} count mismatch for user {user.id}: '
+                         f'expected {before + len(records)}, found {after}')
+                counters['mismatches'] = counters.get('mismatches', 0) + 1
+                continue
+            counters[collection.name] = counters.get(collection.name, 0) + len(records)
+            self.log(f'  ✓ Migrated {len(records)} {collection.name} for user {user.id}')
+        return counters
+
+
+def _read_legacy(path: str, key: Optional[str]) -> Optional[List[Dict]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(str(e))
+    if key is None:
+        return [data]
+    records = data.get(key, []) if isinstance(data, dict) else None
+    if not isinstance(records, list):
+        raise ValueError(f"'{key}' is not a list")
+    return records
+
+
+def read_legacy_user(user_id: int):
+    return _read_legacy(json_storage._get_user_file_path(user_id), None)
+
+
+def read_legacy_tasks(user_id: int):
+    return _read_legacy(json_storage._get_task_file_path(user_id), 'tasks')
+
+
+def read_legacy_projects(user_id: int):
+    return _read_legacy(json_storage._get_project_file_path(user_id), 'projects')
+
+
+def write_secure_user(user, records):
+    # The secure record is rebuilt from the database row, as save_user_data always has
+    return secure_storage.save_user_data(user)
+
+
+def write_secure_tasks(user, records):
+    return secure_storage.save_tasks_data(user.id, records)
+
+
+def write_secure_projects(user, records):
+    return secure_storage.save_projects_data(user.id, records)
+
+
+def _unmigrated(records, existing):
+    # Migrated records keep the legacy id; records without one are identified by position
+    migrated = {r.get('legacy_id') for r in existing if r.get('legacy_id') is not None}
+    pending = []
+    for position, record in enumerate(records, 1):
+        legacy_id = record.get('id', position)
+        if legacy_id not in migrated:
+            pending.append({**record, 'legacy_id': legacy_id})
+    return pending
+
+
+def pending_secure_tasks(user_id: int, records):
+    return _unmigrated(records, secure_storage.get_user_tasks(user_id))
+
+
+def pending_secure_projects(user_id: int, records):
+    return _unmigrated(records, secure_storage.get_user_projects(user_id))
+
+
+def count_secure_user(user_id: int) -> int:
+    return 1 if secure_storage.get_user_data(user_id) else 0
+
+
+def count_secure_tasks(user_id: int) -> int:
+    return len(secure_storage.get_user_tasks(user_id))
+
+
+def count_secure_projects(user_id: int) -> int:
+    return len(secure_storage.get_user_projects(user_id))
+
+
+class LegacyToSecureMigration(StorageMigration):
+    """data/ JSON files -> encrypted secure_data/ files"""
+
+    name = 'legacy_to_secure'
+    collections = (
+        Collection('user_data', read_legacy_user, write_secure_user, count_secure_user, replace=True),
+        Collection('tasks', read_legacy_tasks, write_secure_tasks, count_secure_tasks,
+                   pending=pending_secure_tasks),
+        Collection('projects', read_legacy_projects, write_secure_projects, count_secure_projects,
+                   pending=pending_secure_projects),
+    )
+
+
+def orphaned_legacy_files(users) -> List[str]:
+    """Legacy files whose user is not in the users queryset; a per-user migration never visits them"""
+    files = {}
+    for path, prefix in ((json_storage.users_path, 'user_'),
+                         (json_storage.tasks_path, 'tasks_'),
+                         (json_storage.projects_path, 'projects_')):
+        if not os.path.exists(path):
+            continue
+        for filename in os.listdir(path):
+            if filename.startswith(prefix) and filename.endswith('.json'):
+                user_id = filename[len(prefix):-len('.json')]
+                files[filename] = int(user_id) if user_id.isdigit() else None
+    known = set(users.filter(pk__in={i for i in files.values() if i is not None}).values_list('pk', flat=True))
+    return sorted(filename for filename, user_id in files.items() if user_id not in known)
@@ -0,0 +1,21 @@
+"""
+Test runner for the project
+Flushes the in-process storage manifest buffer while the test database still
+exists; left for the atexit hook it would be written to the real database.
+Background counter flushes are off: a timer thread writing to the test
+database would race the test's own transaction.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.USAGE_COUNTER_BACKGROUND_FLUSH = False
+
+    def teardown_databases(self, old_config, **kwargs):
+        from utils.storage_manifest import storage_manifest
+        storage_manifest.flush()
+        storage_manifest.discard()
+        super().teardown_databases(old_config, **kwargs)